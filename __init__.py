@@ -1,20 +1,52 @@
 from flask import Flask
-from app.config import Config
-from flask_sqlalchemy import SQLAlchemy
-from flask_migrate import Migrate
+from app.config import config_do_ambiente
+from app.extensoes import db, iniciar_migracoes
+from app.cache import cache
+from app.instrumentacao import instrumentacao
 
-db = SQLAlchemy()
-migrate = Migrate()
+def create_app(config=None):
+    app = Flask(__name__, template_folder='app/templates', static_folder='app/static')
+    app.config.from_object(config or config_do_ambiente())
 
-def create_app():
-    app = Flask(__name__, template_folder='app/templates')
-    app.config.from_object(Config)
+    # Perfil do banco: pool (Postgres/MySQL) e PRAGMAs por conexão (SQLite)
+    from app import banco
+    app.config['SQLALCHEMY_ENGINE_OPTIONS'] = banco.opcoes_do_engine(app.config)
+    # Engine só de leitura (bind 'leitura') para as requisições GET
+    app.config['SQLALCHEMY_BINDS'] = banco.binds(app.config)
     
     db.init_app(app)
-    migrate.init_app(app, db)
+    banco.init_app(app, db)
+    if app.config.get('MIGRACOES', True):
+        iniciar_migracoes(app)
+    cache.init_app(app)
+    instrumentacao.init_app(app, db)
     
     # Importar e registrar as rotas
     from app import routes
+    from app.sugestoes import sugestoes
     app.register_blueprint(routes.bp)
+    sugestoes.init_app(app)
+
+    from app.tarefas import fila
+    fila.init_app(app)
+
+    from app import inicializacao
+    inicializacao.configurar_bytecode(app)
+
+    # Estáticos com hash no nome e compressão das respostas
+    from app.estaticos import estaticos, cli as estaticos_cli
+    from app.compressao import compressao
+    estaticos.init_app(app)
+    compressao.init_app(app)
+
+    from app import busca, contadores, importacao, similaridade, tarefas
+    app.cli.add_command(busca.cli)
+    app.cli.add_command(similaridade.cli)
+    app.cli.add_command(contadores.cli)
+    app.cli.add_command(importacao.cli)
+    app.cli.add_command(banco.cli)
+    app.cli.add_command(inicializacao.cli)
+    app.cli.add_command(tarefas.cli)
+    app.cli.add_command(estaticos_cli)
     
     return app
\ No newline at end of file
@@ -0,0 +1,54 @@
+import sqlalchemy as sa
+
+from app.models import ProjetoComponente
+from app import lote
+
+# Atualização das associações projeto <-> componente por diferença de
+# conjuntos, direto em projeto_componente: um DELETE ... IN e um INSERT em
+# executemany, sem carregar objetos Componente.
+
+associacao_t = ProjetoComponente.__table__
+
+
+def aplicar_delta(conexao, projeto_id, adicionar=(), remover=()):
+    """Adiciona/remove componentes de um projeto.
+
+    Devolve (adicionados, removidos) com os ids que de fato mudaram.
+    """
+    adicionar, remover = set(adicionar), set(remover) - set(adicionar)
+    if not adicionar and not remover:
+        return set(), set()
+
+    # Só as linhas envolvidas no delta são consultadas
+    existentes = set(conexao.scalars(
+        sa.select(associacao_t.c.componente_id)
+        .where(associacao_t.c.projeto_id == projeto_id)
+        .where(associacao_t.c.componente_id.in_(adicionar | remover))
+    ))
+    adicionados = adicionar - existentes
+    removidos = remover & existentes
+
+    if removidos:
+        conexao.execute(
+            sa.delete(associacao_t)
+            .where(associacao_t.c.projeto_id == projeto_id)
+            .where(associacao_t.c.componente_id.in_(removidos))
+        )
+    if adicionados:
+        conexao.execute(
+            sa.insert(associacao_t),
+            [{'projeto_id': projeto_id, 'componente_id': componente_id} for componente_id in adicionados]
+        )
+
+    if adicionados or removidos:
+        lote.sincronizar(conexao, projetos=[projeto_id], componentes=adicionados | removidos)
+    return adicionados, removidos
+
+
+def definir_componentes(conexao, projeto_id, componente_ids):
+    # Substitui o conjunto de componentes do projeto pelo informado
+    atuais = set(conexao.scalars(
+        sa.select(associacao_t.c.componente_id).where(associacao_t.c.projeto_id == projeto_id)
+    ))
+    novos = set(componente_ids)
+    return aplicar_delta(conexao, projeto_id, novos - atuais, atuais - novos)
@@ -0,0 +1,325 @@
+import os
+import threading
+import time
+import weakref
+from collections import Counter
+
+import click
+import sqlalchemy as sa
+from flask import current_app, g, has_request_context, request, session
+from flask.cli import AppGroup
+from flask_sqlalchemy.session import Session
+from sqlalchemy.engine import make_url
+
+# Perfil do engine: PRAGMAs por conexão no SQLite e opções de pool nos
+# bancos servidores (Postgres/MySQL), lidos do Config.
+
+# PRAGMAs que não se aplicam a bancos em memória
+PRAGMAS_DE_ARQUIVO = ('journal_mode', 'mmap_size')
+
+
+def _eh_memoria(url):
+    return url.database in (None, '', ':memory:') or url.query.get('mode') == 'memory'
+
+
+def opcoes_do_engine(config):
+    """Opções para SQLALCHEMY_ENGINE_OPTIONS (antes do db.init_app)."""
+    opcoes = dict(config.get('SQLALCHEMY_ENGINE_OPTIONS', {}))
+    url = make_url(config['SQLALCHEMY_DATABASE_URI'])
+    if url.get_backend_name() == 'sqlite':
+        return opcoes
+
+    opcoes.setdefault('pool_size', config['POOL_SIZE'])
+    opcoes.setdefault('max_overflow', config['POOL_MAX_OVERFLOW'])
+    opcoes.setdefault('pool_timeout', config['POOL_TIMEOUT'])
+    opcoes.setdefault('pool_recycle', config['POOL_RECYCLE'])
+    opcoes.setdefault('pool_pre_ping', config['POOL_PRE_PING'])
+    return opcoes
+
+
+def aplicar_pragmas(engine, pragmas):
+    if engine.dialect.name != 'sqlite' or not pragmas:
+        return
+    if _eh_memoria(engine.url):
+        pragmas = {nome: valor for nome, valor in pragmas.items() if nome not in PRAGMAS_DE_ARQUIVO}
+
+    @sa.event.listens_for(engine, 'connect')
+    def _ao_conectar(conexao_dbapi, registro):
+        cursor = conexao_dbapi.cursor()
+        for nome, valor in pragmas.items():
+            cursor.execute(f'PRAGMA {nome} = {valor}')
+        cursor.close()
+
+
+# Transações de escrita: no SQLite abrem com BEGIN IMMEDIATE, que pega o
+# lock de escrita logo no início e espera pelo busy_timeout, em vez de
+# falhar (SQLITE_BUSY) ao passar de leitura a escrita depois que outro
+# processo gravou. As demais (leituras da fila, métricas, comandos de
+# consulta) usam BEGIN, que só pega o lock na primeira escrita.
+ESCRITA = 'transacao_de_escrita'
+_engines_de_escrita = weakref.WeakKeyDictionary()
+
+
+def de_escrita(engine):
+    """O mesmo engine (e pool), com as transações abertas como de escrita."""
+    escrita = _engines_de_escrita.get(engine)
+    if escrita is None:
+        escrita = _engines_de_escrita[engine] = engine.execution_options(**{ESCRITA: True})
+    return escrita
+
+
+def sessao_de_escrita(sessao):
+    """Marca a sessão (comandos de CLI que gravam): as próximas transações são de escrita."""
+    sessao.info[ESCRITA] = True
+
+
+def transacoes_explicitas(engine):
+    # O pysqlite só abre a transação antes do primeiro INSERT/UPDATE/DELETE:
+    # os SELECTs anteriores ficam fora dela e um SAVEPOINT aberto antes da
+    # primeira escrita vira a transação externa (o RELEASE confirma tudo).
+    # A transação passa a ser aberta pelo SQLAlchemy, com um BEGIN explícito
+    if engine.dialect.name != 'sqlite':
+        return
+
+    @sa.event.listens_for(engine, 'connect')
+    def _sem_transacao_implicita(conexao_dbapi, registro):
+        conexao_dbapi.isolation_level = None
+
+    @sa.event.listens_for(engine, 'begin')
+    def _iniciar(conexao):
+        escrita = conexao.get_execution_options().get(ESCRITA, False)
+        conexao.exec_driver_sql('BEGIN IMMEDIATE' if escrita else 'BEGIN')
+
+
+def init_app(app, db):
+    with app.app_context():
+        aplicar_pragmas(db.engine, app.config.get('SQLITE_PRAGMAS'))
+        leitura = db.engines.get(BIND_LEITURA)
+        transacoes_explicitas(db.engine)
+        if leitura is not None:
+            # journal_mode é do arquivo (já definido pelo principal) e não pode ser
+            # alterado por uma conexão mode=ro; query_only recusa qualquer escrita
+            pragmas = {nome: valor for nome, valor in (app.config.get('SQLITE_PRAGMAS') or {}).items()
+                       if nome != 'journal_mode'}
+            aplicar_pragmas(leitura, {**pragmas, 'query_only': 'ON'})
+            transacoes_explicitas(leitura)
+    roteamento.init_app(app, db)
+
+
+# Roteamento de leitura: requisições GET/HEAD usam o engine só de leitura
+# (bind 'leitura': o mesmo arquivo SQLite aberto com mode=ro, ou a réplica
+# em SQLALCHEMY_DATABASE_URI_LEITURA); as demais usam o principal. Depois
+# de uma escrita o navegador lê do principal por LEITURA_FIXAR_SEGUNDOS,
+# para enxergar o que acabou de gravar mesmo com uma réplica atrasada.
+
+BIND_LEITURA = 'leitura'
+METODOS_DE_LEITURA = ('GET', 'HEAD')
+
+
+def url_de_leitura(config):
+    """URL do engine só de leitura, ou None para ler do principal."""
+    if not config.get('LEITURA_SEPARADA', True):
+        return None
+    if config.get('SQLALCHEMY_DATABASE_URI_LEITURA'):
+        return config['SQLALCHEMY_DATABASE_URI_LEITURA']
+    url = make_url(config['SQLALCHEMY_DATABASE_URI'])
+    # Bancos em memória não são compartilhados entre conexões
+    if url.get_backend_name() != 'sqlite' or _eh_memoria(url):
+        return None
+    return f'sqlite:///file:{os.path.abspath(url.database)}?mode=ro&uri=true'
+
+
+def binds(config):
+    """SQLALCHEMY_BINDS com o bind de leitura, quando houver (antes do db.init_app)."""
+    binds = dict(config.get('SQLALCHEMY_BINDS') or {})
+    url = url_de_leitura(config)
+    if url:
+        binds.setdefault(BIND_LEITURA, url)
+    return binds
+
+
+class SessaoRoteada(Session):
+    # Consultas de uma requisição de leitura vão para o engine de leitura;
+    # um flush (escrita) sempre vai para o principal. Requisições de escrita
+    # e sessões marcadas por sessao_de_escrita abrem transações de escrita
+    def get_bind(self, mapper=None, clause=None, bind=None, **kwargs):
+        requisicao = bind is None and has_request_context()
+        if requisicao and not self._flushing:
+            engine = g.get('engine_leitura')
+            if engine is not None:
+                return engine
+        engine = super().get_bind(mapper=mapper, clause=clause, bind=bind, **kwargs)
+        if bind is None and (self.info.get(ESCRITA) or (requisicao and g.get('banco_escrita'))):
+            return de_escrita(engine)
+        return engine
+
+
+def primario(view):
+    """Marca uma rota GET que escreve no banco: ela usa o engine principal."""
+    view.banco_primario = True
+    return view
+
+
+class Roteamento:
+    def __init__(self):
+        self.db = None
+        self.fixar = 5
+        self.contagens = Counter()
+        self._lock = threading.Lock()
+
+    def init_app(self, app, db):
+        app.config.setdefault('LEITURA_FIXAR_SEGUNDOS', 5)
+        self.db = db
+        self.fixar = app.config['LEITURA_FIXAR_SEGUNDOS']
+        app.before_request(self._escolher)
+        app.after_request(self._depois)
+        from app.instrumentacao import instrumentacao
+        instrumentacao.registrar(self.exportar)
+        app.extensions['roteamento'] = self
+
+    def _contar(self, destino):
+        with self._lock:
+            self.contagens[destino] += 1
+
+    def _escolher(self):
+        view = current_app.view_functions.get(request.endpoint)
+        if request.method not in METODOS_DE_LEITURA or getattr(view, 'banco_primario', False):
+            g.banco_escrita = True
+        leitura = self.db.engines.get(BIND_LEITURA)
+        if leitura is None:
+            return
+        if g.get('banco_escrita'):
+            self._contar('principal')
+        elif session.get('_primario_ate', 0) > time.time():
+            self._contar('fixadas')
+        else:
+            g.engine_leitura = leitura
+            self._contar('leitura')
+
+    def _depois(self, resposta):
+        if g.get('banco_escrita') and resposta.status_code < 400 and BIND_LEITURA in self.db.engines:
+            session['_primario_ate'] = time.time() + self.fixar
+        return resposta
+
+    def pools(self):
+        resultado = {}
+        for chave, engine in self.db.engines.items():
+            pool = engine.pool
+            dados = {'url': engine.url.render_as_string(hide_password=True), 'pool': type(pool).__name__}
+            for medida in ('size', 'checkedin', 'checkedout', 'overflow'):
+                if hasattr(pool, medida):
+                    dados[medida] = getattr(pool, medida)()
+            resultado[chave or 'principal'] = dados
+        return resultado
+
+    def estatisticas(self):
+        return {'engines': self.pools(), 'requisicoes': dict(self.contagens)}
+
+    def exportar(self):
+        linhas = [
+            '# HELP wallecreator_pool_conexoes Conexões de cada pool por estado.',
+            '# TYPE wallecreator_pool_conexoes gauge',
+        ]
+        for engine, dados in self.pools().items():
+            for medida in ('checkedin', 'checkedout', 'overflow'):
+                if medida in dados:
+                    linhas.append(f'wallecreator_pool_conexoes{{engine="{engine}",estado="{medida}"}} {dados[medida]}')
+        linhas += [
+            '# HELP wallecreator_requisicoes_por_engine_total Requisições por engine escolhido.',
+            '# TYPE wallecreator_requisicoes_por_engine_total counter',
+        ]
+        linhas += [f'wallecreator_requisicoes_por_engine_total{{destino="{destino}"}} {total}'
+                   for destino, total in sorted(self.contagens.items())]
+        return linhas
+
+
+roteamento = Roteamento()
+
+
+# Verificação dos planos de execução das consultas mais usadas pelas rotas
+
+cli = AppGroup('banco', help='Perfil e índices do banco.')
+
+
+def consultas_quentes():
+    # (descrição, consulta, aceita varredura em ordem de chave primária interrompida pelo LIMIT)
+    from app.models import Projeto, Componente, ProjetoComponente
+    from app.tarefas import Tarefa, PENDENTE
+
+    ids = [1, 2, 3]
+    return [
+        ('lista_projetos (página seguinte)',
+         sa.select(Projeto).where(sa.tuple_(Projeto.id) > sa.tuple_(24)).order_by(Projeto.id).limit(25),
+         False),
+        ('lista_componentes (página seguinte)',
+         sa.select(Componente).where(sa.tuple_(Componente.nome, Componente.id) > sa.tuple_('m', 0))
+         .order_by(Componente.nome, Componente.id).limit(25),
+         False),
+        ('index (últimos componentes)',
+         sa.select(Componente).order_by(Componente.id.desc()).limit(5),
+         True),
+        ('Projeto.componentes (selectinload)',
+         sa.select(ProjetoComponente.projeto_id, Componente)
+         .join(Componente, Componente.id == ProjetoComponente.componente_id)
+         .where(ProjetoComponente.projeto_id.in_(ids)),
+         False),
+        ('Componente.projetos (selectinload)',
+         sa.select(ProjetoComponente.componente_id, Projeto)
+         .join(Projeto, Projeto.id == ProjetoComponente.projeto_id)
+         .where(ProjetoComponente.componente_id.in_(ids)),
+         False),
+        ('contadores (total_projetos)',
+         sa.select(sa.func.count()).select_from(ProjetoComponente).where(ProjetoComponente.componente_id == 1),
+         False),
+        ('painel (mais usados)',
+         sa.select(Componente).where(Componente.total_projetos > 0)
+         .order_by(Componente.total_projetos.desc(), Componente.id.desc()).limit(5),
+         False),
+        ('painel (maiores projetos)',
+         sa.select(Projeto).where(Projeto.total_componentes > 0)
+         .order_by(Projeto.total_componentes.desc(), Projeto.id.desc()).limit(5),
+         False),
+        ('importação (componentes por nome)',
+         sa.select(sa.func.min(Componente.id), Componente.nome)
+         .where(Componente.nome.in_(['Servo SG90', 'Sensor ultrassônico'])).group_by(Componente.nome),
+         False),
+        ('tarefas (próxima pronta)',
+         sa.select(Tarefa.id).where(Tarefa.estado == PENDENTE, Tarefa.executar_em <= 0)
+         .order_by(Tarefa.executar_em, Tarefa.id).limit(1),
+         False),
+    ]
+
+
+def plano(conexao, consulta):
+    sql = consulta.compile(dialect=conexao.dialect, compile_kwargs={'literal_binds': True})
+    return [linha[-1] for linha in conexao.exec_driver_sql(f'EXPLAIN QUERY PLAN {sql}')]
+
+
+def sem_indice(passos, aceita_varredura=False):
+    # Ordenação fora de índice ou varredura completa de tabela
+    return [
+        passo for passo in passos
+        if 'TEMP B-TREE' in passo
+        or (passo.startswith('SCAN') and 'INDEX' not in passo and not aceita_varredura)
+    ]
+
+
+@cli.command('verificar-indices')
+def verificar_indices_comando():
+    """Falha se alguma consulta das rotas não usa índice (EXPLAIN QUERY PLAN, SQLite)."""
+    from app.models import db
+
+    if db.engine.dialect.name != 'sqlite':
+        click.echo('EXPLAIN QUERY PLAN só é verificado no SQLite.')
+        return
+
+    falhas = 0
+    with db.engine.connect() as conexao:
+        for nome, consulta, aceita_varredura in consultas_quentes():
+            passos = plano(conexao, consulta)
+            problemas = sem_indice(passos, aceita_varredura)
+            click.echo(f"{'FALHA' if problemas else 'ok':>5}  {nome}: {'; '.join(passos)}")
+            falhas += bool(problemas)
+
+    if falhas:
+        raise click.ClickException(f'{falhas} consulta(s) sem índice.')
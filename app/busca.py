@@ -0,0 +1,260 @@
+import itertools
+import re
+import unicodedata
+
+import click
+import sqlalchemy as sa
+import sqlalchemy.orm as so
+from flask.cli import AppGroup
+
+from app.models import db, Componente, Projeto, ProjetoComponente
+from app import versoes
+from app.tarefas import fila
+
+# Índice de busca dos componentes.
+# No SQLite usamos uma tabela virtual FTS5; nos demais bancos um índice
+# invertido simples (tabela componente_termo) com os termos normalizados.
+
+TABELA_FTS = 'componente_fts'
+PESO_NOME = 10
+# Componentes por tarefa de indexação enfileirada por operações em lote
+IDS_POR_TAREFA = 1000
+
+
+def normalizar(texto):
+    # Remove acentos e deixa em minúsculas ("Motor Elétrico" -> "motor eletrico")
+    texto = unicodedata.normalize('NFKD', texto or '')
+    return ''.join(c for c in texto if not unicodedata.combining(c)).lower()
+
+
+def tokenizar(texto):
+    # Mesmos termos do tokenizador unicode61 da FTS5, que também separa no "_"
+    return re.findall(r'[^\W_]+', normalizar(texto))
+
+
+# Índice invertido usado quando o banco não é SQLite
+class ComponenteTermo(db.Model):
+    __tablename__ = 'componente_termo'
+    termo: so.Mapped[str] = so.mapped_column(sa.String(100), primary_key=True)
+    componente_id: so.Mapped[int] = so.mapped_column(
+        sa.ForeignKey('componente.id', ondelete='CASCADE'),
+        primary_key=True,
+        index=True
+    )
+    peso: so.Mapped[int] = so.mapped_column(sa.Integer, default=1)
+
+
+fts = sa.table(TABELA_FTS, sa.column('rowid'), sa.column('nome'), sa.column('descricao'))
+
+CRIAR_FTS = (
+    f"CREATE VIRTUAL TABLE IF NOT EXISTS {TABELA_FTS} USING fts5("
+    "nome, descricao, tokenize = 'unicode61 remove_diacritics 2', prefix = '2 3')"
+)
+
+# A tabela FTS5 é criada/removida junto com a tabela componente (db.create_all/drop_all)
+sa.event.listen(
+    Componente.__table__, 'after_create',
+    sa.DDL(CRIAR_FTS).execute_if(dialect='sqlite')
+)
+sa.event.listen(
+    Componente.__table__, 'before_drop',
+    sa.DDL(f'DROP TABLE IF EXISTS {TABELA_FTS}').execute_if(dialect='sqlite')
+)
+
+
+def usa_fts(conexao):
+    return conexao.dialect.name == 'sqlite'
+
+
+def _termos_pesados(nome, descricao):
+    pesos = {}
+    for termo in tokenizar(nome):
+        pesos[termo[:100]] = pesos.get(termo[:100], 0) + PESO_NOME
+    for termo in tokenizar(descricao):
+        pesos[termo[:100]] = pesos.get(termo[:100], 0) + 1
+    return pesos
+
+
+def remover(conexao, ids):
+    ids = list(ids)
+    if not ids:
+        return
+    if usa_fts(conexao):
+        conexao.execute(sa.delete(fts).where(fts.c.rowid.in_(ids)))
+    else:
+        conexao.execute(sa.delete(ComponenteTermo).where(ComponenteTermo.componente_id.in_(ids)))
+
+
+def indexar(conexao, ids):
+    # (Re)indexa os componentes informados a partir do conteúdo atual da tabela
+    ids = list(ids)
+    if not ids:
+        return
+    remover(conexao, ids)
+    origem = sa.select(Componente.id, Componente.nome, Componente.descricao).where(Componente.id.in_(ids))
+
+    if usa_fts(conexao):
+        conexao.execute(sa.insert(fts).from_select(['rowid', 'nome', 'descricao'], origem))
+        return
+
+    linhas = []
+    for componente_id, nome, descricao in conexao.execute(origem):
+        for termo, peso in _termos_pesados(nome, descricao).items():
+            linhas.append({'termo': termo, 'componente_id': componente_id, 'peso': peso})
+    if linhas:
+        conexao.execute(sa.insert(ComponenteTermo), linhas)
+
+
+def reindexar_tudo(conexao, lote=1000):
+    if usa_fts(conexao):
+        conexao.execute(sa.delete(fts))
+    else:
+        conexao.execute(sa.delete(ComponenteTermo))
+
+    ultimo_id = 0
+    while True:
+        ids = conexao.scalars(
+            sa.select(Componente.id).where(Componente.id > ultimo_id).order_by(Componente.id).limit(lote)
+        ).all()
+        if not ids:
+            break
+        indexar(conexao, ids)
+        ultimo_id = ids[-1]
+
+
+def consulta_ranqueada(conexao, texto):
+    """Subconsulta (componente_id, relevancia) para o texto pesquisado.
+
+    Cada termo casa por prefixo e sem acentos; todos os termos precisam
+    aparecer. Relevância menor significa resultado melhor.
+    Retorna None se o texto não tiver termos pesquisáveis.
+    """
+    termos = tokenizar(texto)
+    if not termos:
+        return None
+
+    if usa_fts(conexao):
+        expressao = ' '.join(f'"{termo}"*' for termo in termos)
+        return (
+            sa.select(
+                fts.c.rowid.label('componente_id'),
+                sa.func.bm25(sa.literal_column(TABELA_FTS), float(PESO_NOME), 1.0).label('relevancia')
+            )
+            .where(sa.literal_column(TABELA_FTS).op('MATCH')(expressao))
+            .subquery()
+        )
+
+    # Prefixo como intervalo (termo >= 'ab' AND termo < 'ab\uffff') para aproveitar o índice
+    condicoes = [
+        sa.and_(ComponenteTermo.termo >= termo, ComponenteTermo.termo < termo + '\uffff')
+        for termo in termos
+    ]
+    encontrados = sum(sa.func.max(sa.case((condicao, 1), else_=0)) for condicao in condicoes)
+    return (
+        sa.select(
+            ComponenteTermo.componente_id.label('componente_id'),
+            (-sa.func.sum(ComponenteTermo.peso)).label('relevancia')
+        )
+        .where(sa.or_(*condicoes))
+        .group_by(ComponenteTermo.componente_id)
+        .having(encontrados == len(termos))
+        .subquery()
+    )
+
+
+def resultados_em_fluxo(ranking, limite=None, tamanho_lote=500):
+    """Gera os resultados da busca como dicts, com os projetos de cada componente.
+
+    Percorre linhas simples (sem entidades do ORM) de um único JOIN com
+    yield_per; só o componente atual fica na memória.
+    """
+    consulta = sa.select(
+        Componente.id, Componente.nome, Componente.descricao, Componente.url, Componente.quantidade,
+        Projeto.id.label('projeto_id'), Projeto.nome.label('projeto_nome'),
+        Projeto.descricao.label('projeto_descricao'), Projeto.url.label('projeto_url'),
+        Projeto.total_componentes,
+    ).join(
+        ranking, ranking.c.componente_id == Componente.id
+    ).outerjoin(
+        ProjetoComponente, ProjetoComponente.componente_id == Componente.id
+    ).outerjoin(
+        Projeto, Projeto.id == ProjetoComponente.projeto_id
+    ).order_by(ranking.c.relevancia, Componente.id, Projeto.id).execution_options(yield_per=tamanho_lote)
+
+    grupos = itertools.groupby(db.session.execute(consulta), key=lambda linha: linha.id)
+    for _, linhas in itertools.islice(grupos, limite):
+        primeira = next(linhas)
+        projetos = [
+            {
+                'id': linha.projeto_id,
+                'nome': linha.projeto_nome,
+                'descricao': linha.projeto_descricao,
+                'url': linha.projeto_url,
+                'total_componentes': linha.total_componentes,
+            }
+            for linha in itertools.chain([primeira], linhas) if linha.projeto_id is not None
+        ]
+        yield {
+            'id': primeira.id,
+            'nome': primeira.nome,
+            'descricao': primeira.descricao,
+            'url': primeira.url,
+            'quantidade': primeira.quantidade,
+            'projetos': projetos,
+        }
+
+
+def enfileirar(conexao, ids):
+    """Atualiza o índice dos componentes em segundo plano (tarefa busca.indexar).
+
+    Cada componente tem sua chave na fila: edições seguidas do mesmo
+    componente antes da tarefa rodar geram uma única reindexação.
+    """
+    ids = sorted(set(ids))
+    if len(ids) == 1:
+        fila.enfileirar(conexao, 'busca.indexar', chave=f'busca:componente:{ids[0]}', ids=ids)
+    else:
+        for inicio in range(0, len(ids), IDS_POR_TAREFA):
+            fila.enfileirar(conexao, 'busca.indexar', ids=ids[inicio:inicio + IDS_POR_TAREFA])
+
+
+@fila.tarefa('busca.indexar')
+def _indexar_tarefa(conexao, ids):
+    # indexar() remove os ids do índice e insere de novo os que ainda existem,
+    # então a mesma tarefa serve para componentes alterados e excluídos
+    indexar(conexao, ids)
+    # Resultados da busca e das sugestões mudam com o índice
+    versoes.incrementar_catalogo(conexao)
+    return ['busca']
+
+
+# Mantém o índice sincronizado com inserções, edições e exclusões feitas pelo ORM
+@sa.event.listens_for(so.Session, 'after_flush')
+def _sincronizar_indice(session, flush_context):
+    alterados = set()
+    for obj in list(session.new) + list(session.dirty):
+        if isinstance(obj, Componente):
+            estado = sa.inspect(obj)
+            if obj in session.new or estado.attrs.nome.history.has_changes() \
+                    or estado.attrs.descricao.history.has_changes():
+                alterados.add(obj.id)
+    excluidos = {obj.id for obj in session.deleted if isinstance(obj, Componente)}
+
+    if alterados or excluidos:
+        conexao = session.connection()
+        for id_ in alterados | excluidos:
+            enfileirar(conexao, [id_])
+
+
+cli = AppGroup('busca', help='Índice de busca de componentes.')
+
+
+@cli.command('reindexar')
+def reindexar_comando():
+    """Recria o índice de busca a partir da tabela componente."""
+    conexao = db.session.connection()
+    if usa_fts(conexao):
+        conexao.execute(sa.text(CRIAR_FTS))
+    reindexar_tudo(conexao)
+    db.session.commit()
+    click.echo('Índice de busca recriado.')
@@ -0,0 +1,190 @@
+import functools
+import threading
+import time
+from collections import OrderedDict
+
+from flask import g, make_response, request, session
+
+# Cache de respostas das páginas de leitura e do /api/search.
+# A chave inclui o ETag da requisição (calculado por versoes.condicional a
+# partir das versões gravadas no banco): uma escrita feita em outro processo
+# (outro worker, `flask tarefas trabalhar`) muda o ETag e a entrada antiga
+# deixa de ser usada, sem depender de aviso entre processos. Cada entrada
+# também é marcada com as entidades que aparecem nela ("componente:5",
+# "projeto:2", ...); as invalidações por tag só liberam memória mais cedo.
+
+
+class LRUCache:
+    # Cache em memória do processo, com expiração (TTL) e limite de entradas
+
+    def __init__(self, max_itens=512, ttl=300):
+        self.max_itens = max_itens
+        self.ttl = ttl
+        self._itens = OrderedDict()
+        self._por_tag = {}
+        self._lock = threading.Lock()
+        self.acertos = 0
+        self.falhas = 0
+        self.remocoes = 0
+        # Incrementada a cada invalidação; respostas geradas durante uma
+        # invalidação não são guardadas (poderiam conter dados antigos)
+        self.geracao = 0
+
+    def obter(self, chave):
+        with self._lock:
+            item = self._itens.get(chave)
+            if item is None:
+                self.falhas += 1
+                return None
+            valor, tags, expira_em = item
+            if expira_em < time.monotonic():
+                self._remover(chave)
+                self.falhas += 1
+                return None
+            self._itens.move_to_end(chave)
+            self.acertos += 1
+            return valor
+
+    def guardar(self, chave, valor, tags=(), geracao=None):
+        with self._lock:
+            if geracao is not None and geracao != self.geracao:
+                return
+            if chave in self._itens:
+                self._remover(chave)
+            self._itens[chave] = (valor, frozenset(tags), time.monotonic() + self.ttl)
+            for tag in tags:
+                self._por_tag.setdefault(tag, set()).add(chave)
+            while len(self._itens) > self.max_itens:
+                self._remover(next(iter(self._itens)))
+                self.remocoes += 1
+
+    def invalidar(self, *tags):
+        with self._lock:
+            self.geracao += 1
+            chaves = set()
+            for tag in tags:
+                chaves.update(self._por_tag.get(tag, ()))
+            for chave in chaves:
+                self._remover(chave)
+            return len(chaves)
+
+    def limpar(self):
+        with self._lock:
+            self.geracao += 1
+            self._itens.clear()
+            self._por_tag.clear()
+
+    def estatisticas(self):
+        return {
+            'tipo': 'lru',
+            'itens': len(self._itens),
+            'max_itens': self.max_itens,
+            'ttl': self.ttl,
+            'acertos': self.acertos,
+            'falhas': self.falhas,
+            'remocoes': self.remocoes,
+        }
+
+    def _remover(self, chave):
+        _, tags, _ = self._itens.pop(chave)
+        for tag in tags:
+            chaves = self._por_tag.get(tag)
+            if chaves is not None:
+                chaves.discard(chave)
+                if not chaves:
+                    del self._por_tag[tag]
+
+
+class CacheNulo:
+    # Desliga o cache sem mudar as rotas (CACHE_TIPO = 'nulo')
+    geracao = 0
+
+    def obter(self, chave):
+        return None
+
+    def guardar(self, chave, valor, tags=(), geracao=None):
+        pass
+
+    def invalidar(self, *tags):
+        return 0
+
+    def limpar(self):
+        pass
+
+    def estatisticas(self):
+        return {'tipo': 'nulo'}
+
+
+BACKENDS = {
+    'lru': lambda config: LRUCache(config['CACHE_MAX_ITENS'], config['CACHE_TTL']),
+    'nulo': lambda config: CacheNulo(),
+}
+
+
+class Cache:
+    def __init__(self, app=None):
+        self.backend = CacheNulo()
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        app.config.setdefault('CACHE_TIPO', 'lru')
+        app.config.setdefault('CACHE_MAX_ITENS', 512)
+        app.config.setdefault('CACHE_TTL', 300)
+        self.backend = BACKENDS[app.config['CACHE_TIPO']](app.config)
+        app.extensions['cache'] = self
+
+    def marcar(self, *tags):
+        # Registra as entidades exibidas pela resposta que está sendo gerada
+        g.setdefault('cache_tags', set()).update(tags)
+
+    def invalidar(self, *tags):
+        return self.backend.invalidar(*tags)
+
+    def limpar(self):
+        self.backend.limpar()
+
+    def estatisticas(self):
+        return self.backend.estatisticas()
+
+    def pagina(self, *tags_fixas):
+        """Decorador que guarda a resposta (HTML ou JSON) de uma rota GET.
+
+        Vai abaixo de @condicional: o corpo guardado vale só para o ETag com
+        que foi gerado. Sem ETag a resposta não é guardada.
+        """
+        def decorador(view):
+            @functools.wraps(view)
+            def wrapper(*args, **kwargs):
+                # Mensagens flash pendentes fazem parte da página e não podem ir para o cache
+                etag = g.get('etag')
+                if request.method != 'GET' or session.get('_flashes') or etag is None:
+                    return view(*args, **kwargs)
+
+                chave = (etag, request.full_path)
+                geracao = self.backend.geracao
+                guardado = self.backend.obter(chave)
+                if guardado is not None:
+                    corpo, status, mimetype = guardado
+                    return make_response(corpo, status, {'Content-Type': mimetype})
+
+                resposta = make_response(view(*args, **kwargs))
+                # Respostas em fluxo não são guardadas: ler o corpo consumiria o gerador
+                if resposta.status_code == 200 and not resposta.is_streamed:
+                    tags = set(tags_fixas) | g.pop('cache_tags', set())
+                    self.backend.guardar(
+                        chave,
+                        (resposta.get_data(), resposta.status_code, resposta.content_type),
+                        tags,
+                        geracao
+                    )
+                return resposta
+            return wrapper
+        return decorador
+
+
+cache = Cache()
+
+
+def tags_de(prefixo, ids):
+    return [f'{prefixo}:{id_}' for id_ in ids]
@@ -0,0 +1,89 @@
+import gzip
+import zlib
+
+from flask import request
+
+try:
+    import brotli
+except ImportError:  # brotli é opcional; sem ele só gzip
+    brotli = None
+
+# Compressão das respostas dinâmicas (HTML, JSON e exportações) negociada
+# pelo Accept-Encoding. Respostas pequenas vão como estão; respostas em
+# fluxo são comprimidas parte a parte com gzip, sem juntar o corpo.
+# Os arquivos estáticos têm variantes já comprimidas (app/estaticos.py).
+
+TIPOS = ('text/html', 'application/json', 'application/x-ndjson', 'text/csv', 'text/plain')
+
+
+class Compressao:
+    def __init__(self, app=None):
+        self.minimo = 1024
+        self.nivel = 6
+        self.nivel_brotli = 4
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        app.config.setdefault('COMPRESSAO', True)
+        app.config.setdefault('COMPRESSAO_MINIMO', 1024)
+        app.config.setdefault('COMPRESSAO_NIVEL', 6)
+        app.config.setdefault('COMPRESSAO_NIVEL_BROTLI', 4)
+        if not app.config['COMPRESSAO']:
+            return
+        self.minimo = app.config['COMPRESSAO_MINIMO']
+        self.nivel = app.config['COMPRESSAO_NIVEL']
+        self.nivel_brotli = app.config['COMPRESSAO_NIVEL_BROTLI']
+        app.after_request(self.comprimir)
+        app.extensions['compressao'] = self
+
+    def _codificacao(self, em_fluxo):
+        if brotli is not None and not em_fluxo and request.accept_encodings['br']:
+            return 'br'
+        if request.accept_encodings['gzip']:
+            return 'gzip'
+        return None
+
+    def comprimir(self, resposta):
+        if resposta.mimetype not in TIPOS or resposta.direct_passthrough:
+            return resposta
+        # Caches intermediários guardam uma cópia por codificação
+        resposta.vary.add('Accept-Encoding')
+        if resposta.status_code != 200 or request.method == 'HEAD' or 'Content-Encoding' in resposta.headers:
+            return resposta
+
+        codificacao = self._codificacao(resposta.is_streamed)
+        if codificacao is None:
+            return resposta
+        if resposta.is_streamed:
+            resposta.response = self._em_fluxo(resposta.response)
+            resposta.headers.pop('Content-Length', None)
+        else:
+            corpo = resposta.get_data()
+            if len(corpo) < self.minimo:
+                return resposta
+            if codificacao == 'br':
+                resposta.set_data(brotli.compress(corpo, quality=self.nivel_brotli))
+            else:
+                resposta.set_data(gzip.compress(corpo, compresslevel=self.nivel, mtime=0))
+
+        resposta.headers['Content-Encoding'] = codificacao
+        # O corpo comprimido não tem os mesmos bytes: o ETag forte vira fraco
+        etag, fraco = resposta.get_etag()
+        if etag and not fraco:
+            resposta.set_etag(etag, weak=True)
+        return resposta
+
+    def _em_fluxo(self, partes):
+        compressor = zlib.compressobj(self.nivel, zlib.DEFLATED, 16 + zlib.MAX_WBITS)
+        for parte in partes:
+            if isinstance(parte, str):
+                parte = parte.encode()
+            # Z_SYNC_FLUSH entrega cada parte ao cliente assim que é gerada
+            dados = compressor.compress(parte) + compressor.flush(zlib.Z_SYNC_FLUSH)
+            if dados:
+                yield dados
+        yield compressor.flush()
+
+
+compressao = Compressao()
@@ -5,4 +5,108 @@ class Config:
     SECRET_KEY = os.environ.get('SECRET_KEY') or 'you-will-never-guess'
     SQLALCHEMY_DATABASE_URI = os.environ.get('DATABASE_URL') or \
         'sqlite:///' + os.path.join(basedir, 'app_new.db')  # Nome do novo banco de dados
-    SQLALCHEMY_TRACK_MODIFICATIONS = False
\ No newline at end of file
+    SQLALCHEMY_TRACK_MODIFICATIONS = False
+
+    # Paginação: itens por página padrão e limite máximo aceito em ?limite=
+    ITENS_POR_PAGINA = 24
+    MAXIMO_POR_PAGINA = 100
+
+    # Cache de páginas e do /api/search ('lru' ou 'nulo' para desligar)
+    CACHE_TIPO = os.environ.get('CACHE_TIPO') or 'lru'
+    CACHE_MAX_ITENS = 512
+    CACHE_TTL = 300
+    # Busca leve da caixa de pesquisa (app/sugestoes.py): resultados guardados
+    # em memória para reaproveitar prefixos e limite de itens por resultado
+    SUGESTOES_CONJUNTOS = 256
+    SUGESTOES_MAX_RESULTADOS = 500
+    # Perfil do banco (aplicado por app/banco.py)
+    # PRAGMAs executados em cada nova conexão SQLite
+    SQLITE_PRAGMAS = {
+        'journal_mode': 'WAL',       # leitores não bloqueiam o escritor
+        'synchronous': 'NORMAL',     # seguro com WAL e bem mais rápido que FULL
+        'busy_timeout': 5000,        # espera o lock (ms) em vez de "database is locked"
+        'cache_size': -16000,        # em KiB (valor negativo)
+        'mmap_size': 134217728,
+        'foreign_keys': 'ON',        # necessário para o ondelete='CASCADE'
+    }
+    # Pool de conexões para Postgres/MySQL
+    POOL_SIZE = int(os.environ.get('POOL_SIZE', 5))
+    POOL_MAX_OVERFLOW = int(os.environ.get('POOL_MAX_OVERFLOW', 10))
+    POOL_TIMEOUT = 30
+    POOL_RECYCLE = 1800
+    POOL_PRE_PING = True
+    # Engine só de leitura para GET/HEAD e /api/search (app/banco.py): réplica
+    # em DATABASE_URL_LEITURA ou, no SQLite, o mesmo arquivo aberto com mode=ro.
+    # Depois de uma escrita o navegador lê do principal por alguns segundos
+    LEITURA_SEPARADA = os.environ.get('LEITURA_SEPARADA', '1') == '1'
+    SQLALCHEMY_DATABASE_URI_LEITURA = os.environ.get('DATABASE_URL_LEITURA')
+    LEITURA_FIXAR_SEGUNDOS = 5
+
+    # Instrumentação por requisição (app/instrumentacao.py): Server-Timing,
+    # log JSON por requisição, /metrics e alerta de N+1
+    INSTRUMENTACAO = os.environ.get('INSTRUMENTACAO') == '1'
+    INSTRUMENTACAO_MAIS_LENTAS = 3    # consultas mais lentas no log
+    INSTRUMENTACAO_REPETICOES = 5     # repetições do mesmo comando que contam como N+1
+
+    # Fila de tarefas em segundo plano (app/tarefas.py): threads por processo
+    # web (0 para usar só `flask tarefas trabalhar`), intervalo de consulta à
+    # fila (dobra a cada consulta vazia, até o máximo) e espera exponencial
+    # entre tentativas, em segundos
+    TAREFAS_TRABALHADORES = int(os.environ.get('TAREFAS_TRABALHADORES', 2))
+    TAREFAS_INTERVALO = 1.0
+    TAREFAS_INTERVALO_MAXIMO = 10.0
+    TAREFAS_ESPERA_BASE = 2.0
+    TAREFAS_ESPERA_MAXIMA = 300.0
+    TAREFAS_MAX_TENTATIVAS = 5
+    TAREFAS_EXPIRACAO = 600.0       # tarefa "executando" há mais que isso volta para a fila
+    TAREFAS_IMEDIATAS = False       # executa na hora, na transação de quem enfileirou
+
+    # Compressão das respostas HTML/JSON (app/compressao.py): tamanho mínimo
+    # em bytes e níveis do gzip e do brotli (se o pacote estiver instalado)
+    COMPRESSAO = True
+    COMPRESSAO_MINIMO = 1024
+    COMPRESSAO_NIVEL = 6
+    COMPRESSAO_NIVEL_BROTLI = 4
+    # Estáticos com hash no nome (app/estaticos.py): Cache-Control max-age
+    ESTATICOS_MAX_AGE = 365 * 24 * 3600
+
+    # Componentes quase duplicados (app/similaridade.py): semelhança mínima
+    # (0 a 1) para o "você quis dizer" do formulário de componente
+    SIMILARIDADE_LIMIAR = 0.5
+
+    # Partida da aplicação (app/inicializacao.py): pasta do bytecode dos
+    # templates gerado no build e Flask-Migrate (desligado nos workers web)
+    TEMPLATES_BYTECODE = os.environ.get('TEMPLATES_BYTECODE') or os.path.join(basedir, 'templates_compilados')
+    MIGRACOES = os.environ.get('MIGRACOES', '1') == '1'
+
+class DevelopmentConfig(Config):
+    DEBUG = True
+    CACHE_TTL = 30
+    INSTRUMENTACAO = True
+
+class ProductionConfig(Config):
+    SQLITE_PRAGMAS = {
+        **Config.SQLITE_PRAGMAS,
+        'cache_size': -64000,
+        'mmap_size': 536870912,
+    }
+    POOL_SIZE = int(os.environ.get('POOL_SIZE', 10))
+    POOL_MAX_OVERFLOW = int(os.environ.get('POOL_MAX_OVERFLOW', 20))
+    CACHE_MAX_ITENS = 4096
+
+class TestingConfig(Config):
+    TESTING = True
+    WTF_CSRF_ENABLED = False
+    SQLALCHEMY_DATABASE_URI = os.environ.get('TEST_DATABASE_URL') or 'sqlite://'
+    CACHE_TIPO = 'nulo'
+    TAREFAS_IMEDIATAS = True
+
+# Perfis selecionados pela variável de ambiente APP_ENV
+configuracoes = {
+    'development': DevelopmentConfig,
+    'production': ProductionConfig,
+    'testing': TestingConfig,
+}
+
+def config_do_ambiente():
+    return configuracoes.get(os.environ.get('APP_ENV', ''), Config)
@@ -0,0 +1,139 @@
+from collections import namedtuple
+
+import sqlalchemy as sa
+
+from app.models import db, Projeto, Componente, ProjetoComponente
+from app.paginacao import paginar
+
+# Caminho de leitura das listagens e páginas de detalhes: consultas que
+# selecionam só as colunas exibidas (a descrição já vem cortada pelo banco)
+# e devolvem objetos simples, fora do identity map da sessão.
+# As entidades do ORM ficam para as rotas de escrita.
+
+# Os templates mostram descricao[:100] e "..." quando o texto é maior;
+# basta trazer um caractere além do corte
+CORTE_LISTA = 100
+CORTE_DETALHES = 80
+ASSOCIADOS_NA_LISTA = 3
+
+Referencia = namedtuple('Referencia', 'id nome')
+
+
+class ProjetoResumo:
+    __slots__ = ('id', 'nome', 'descricao', 'url', 'total_componentes', 'componentes')
+
+    def __init__(self, id, nome, descricao, url, total_componentes, componentes=()):
+        self.id = id
+        self.nome = nome
+        self.descricao = descricao
+        self.url = url
+        self.total_componentes = total_componentes
+        self.componentes = componentes
+
+
+class ComponenteResumo:
+    __slots__ = ('id', 'nome', 'descricao', 'url', 'quantidade', 'total_projetos', 'projetos')
+
+    def __init__(self, id, nome, descricao, url, quantidade, total_projetos, projetos=()):
+        self.id = id
+        self.nome = nome
+        self.descricao = descricao
+        self.url = url
+        self.quantidade = quantidade
+        self.total_projetos = total_projetos
+        self.projetos = projetos
+
+
+def _descricao(coluna, corte):
+    if corte is None:
+        return coluna
+    return sa.func.substr(coluna, 1, corte + 1).label('descricao')
+
+
+def _colunas_projeto(corte):
+    return (Projeto.id, Projeto.nome, _descricao(Projeto.descricao, corte), Projeto.url, Projeto.total_componentes)
+
+
+def _colunas_componente(corte):
+    return (Componente.id, Componente.nome, _descricao(Componente.descricao, corte), Componente.url,
+            Componente.quantidade, Componente.total_projetos)
+
+
+def _primeiros(coluna_dono, coluna_associado, entidade, donos, limite):
+    """{dono: [Referencia]} com os `limite` primeiros associados (por id) de cada dono."""
+    if not donos:
+        return {}
+    posicao = sa.func.row_number().over(partition_by=coluna_dono, order_by=coluna_associado).label('posicao')
+    sub = sa.select(coluna_dono.label('dono'), entidade.id, entidade.nome, posicao).join(
+        entidade, entidade.id == coluna_associado
+    ).where(coluna_dono.in_(donos)).subquery()
+
+    resultado = {}
+    consulta = sa.select(sub.c.dono, sub.c.id, sub.c.nome).where(sub.c.posicao <= limite) \
+        .order_by(sub.c.dono, sub.c.id)
+    for linha in db.session.execute(consulta):
+        resultado.setdefault(linha.dono, []).append(Referencia(linha.id, linha.nome))
+    return resultado
+
+
+def pagina_de_projetos(cursor=None):
+    pagina = paginar(
+        sa.select(*_colunas_projeto(CORTE_LISTA)),
+        [Projeto.id],
+        lambda linha: (linha.id,),
+        cursor=cursor
+    )
+    componentes = _primeiros(
+        ProjetoComponente.projeto_id, ProjetoComponente.componente_id, Componente,
+        [linha.id for linha in pagina.itens], ASSOCIADOS_NA_LISTA
+    )
+    pagina.itens = [ProjetoResumo(*linha, componentes.get(linha.id, [])) for linha in pagina.itens]
+    return pagina
+
+
+def pagina_de_componentes(cursor=None):
+    pagina = paginar(
+        sa.select(*_colunas_componente(CORTE_LISTA)),
+        [Componente.nome, Componente.id],
+        lambda linha: (linha.nome, linha.id),
+        cursor=cursor
+    )
+    projetos = _primeiros(
+        ProjetoComponente.componente_id, ProjetoComponente.projeto_id, Projeto,
+        [linha.id for linha in pagina.itens], ASSOCIADOS_NA_LISTA
+    )
+    pagina.itens = [ComponenteResumo(*linha, projetos.get(linha.id, [])) for linha in pagina.itens]
+    return pagina
+
+
+def detalhes_do_projeto(id):
+    linha = db.session.execute(sa.select(*_colunas_projeto(None)).where(Projeto.id == id)).first()
+    if linha is None:
+        return None
+    componentes = [
+        ComponenteResumo(*componente)
+        for componente in db.session.execute(
+            sa.select(*_colunas_componente(CORTE_DETALHES))
+            .join(ProjetoComponente, ProjetoComponente.componente_id == Componente.id)
+            .where(ProjetoComponente.projeto_id == id)
+            # Mesma ordem de Componente.id, mas já é a do índice da associação
+            .order_by(ProjetoComponente.componente_id)
+        )
+    ]
+    return ProjetoResumo(*linha, componentes)
+
+
+def detalhes_do_componente(id):
+    linha = db.session.execute(sa.select(*_colunas_componente(None)).where(Componente.id == id)).first()
+    if linha is None:
+        return None
+    projetos = [
+        ProjetoResumo(*projeto)
+        for projeto in db.session.execute(
+            sa.select(*_colunas_projeto(CORTE_DETALHES))
+            .join(ProjetoComponente, ProjetoComponente.projeto_id == Projeto.id)
+            .where(ProjetoComponente.componente_id == id)
+            .order_by(ProjetoComponente.projeto_id)
+        )
+    ]
+    return ComponenteResumo(*linha, projetos)
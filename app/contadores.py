@@ -0,0 +1,161 @@
+import click
+import sqlalchemy as sa
+import sqlalchemy.orm as so
+from flask.cli import AppGroup
+
+from app.models import db, Projeto, Componente, ProjetoComponente
+from app import banco
+
+# Contadores desnormalizados Projeto.total_componentes e Componente.total_projetos.
+# São recalculados a partir de projeto_componente sempre que uma associação
+# muda, seja pelas coleções (projeto.componentes / componente.projetos), seja
+# por objetos ProjetoComponente, seja pela exclusão de um dos lados.
+# O recálculo também incrementa a versão das linhas afetadas.
+
+
+def _contagem_componentes():
+    return (
+        sa.select(sa.func.count())
+        .where(ProjetoComponente.projeto_id == Projeto.id)
+        .scalar_subquery()
+    )
+
+
+def _contagem_projetos():
+    return (
+        sa.select(sa.func.count())
+        .where(ProjetoComponente.componente_id == Componente.id)
+        .scalar_subquery()
+    )
+
+
+def recalcular(conexao, projeto_ids=(), componente_ids=()):
+    projeto_ids, componente_ids = set(projeto_ids), set(componente_ids)
+    if projeto_ids:
+        conexao.execute(
+            sa.update(Projeto)
+            .where(Projeto.id.in_(projeto_ids))
+            .values(total_componentes=_contagem_componentes(), versao=Projeto.versao + 1)
+        )
+    if componente_ids:
+        conexao.execute(
+            sa.update(Componente)
+            .where(Componente.id.in_(componente_ids))
+            .values(total_projetos=_contagem_projetos(), versao=Componente.versao + 1)
+        )
+
+
+def recalcular_tudo(conexao):
+    conexao.execute(sa.update(Projeto).values(total_componentes=_contagem_componentes()))
+    conexao.execute(sa.update(Componente).values(total_projetos=_contagem_projetos()))
+
+
+def divergencias(conexao):
+    # Linhas cujo contador não bate com projeto_componente: (tabela, id, gravado, real)
+    real = _contagem_componentes()
+    for projeto_id, gravado, contado in conexao.execute(
+        sa.select(Projeto.id, Projeto.total_componentes, real).where(Projeto.total_componentes != real)
+    ):
+        yield 'projeto', projeto_id, gravado, contado
+
+    real = _contagem_projetos()
+    for componente_id, gravado, contado in conexao.execute(
+        sa.select(Componente.id, Componente.total_projetos, real).where(Componente.total_projetos != real)
+    ):
+        yield 'componente', componente_id, gravado, contado
+
+
+def _pendentes(session):
+    return session.info.setdefault('contadores', {'projetos': set(), 'componentes': set()})
+
+
+@sa.event.listens_for(ProjetoComponente, 'after_insert')
+@sa.event.listens_for(ProjetoComponente, 'after_delete')
+def _associacao_alterada(mapper, conexao, associacao):
+    pendentes = _pendentes(so.object_session(associacao))
+    pendentes['projetos'].add(associacao.projeto_id)
+    pendentes['componentes'].add(associacao.componente_id)
+
+
+@sa.event.listens_for(so.Session, 'before_flush')
+def _coletar_alteracoes(session, flush_context, instances):
+    pendentes = _pendentes(session)
+
+    for obj in list(session.new) + list(session.dirty):
+        if isinstance(obj, Projeto):
+            historico = sa.inspect(obj).attrs.componentes.history
+            if historico.added or historico.deleted:
+                pendentes['projetos'].add(obj)
+                pendentes['componentes'].update(historico.added + historico.deleted)
+        elif isinstance(obj, Componente):
+            historico = sa.inspect(obj).attrs.projetos.history
+            if historico.added or historico.deleted:
+                pendentes['componentes'].add(obj)
+                pendentes['projetos'].update(historico.added + historico.deleted)
+
+    # Ao excluir um lado, o outro lado perde a associação
+    projetos_excluidos = [obj.id for obj in session.deleted if isinstance(obj, Projeto)]
+    componentes_excluidos = [obj.id for obj in session.deleted if isinstance(obj, Componente)]
+    if projetos_excluidos:
+        pendentes['componentes'].update(session.scalars(
+            sa.select(ProjetoComponente.componente_id).where(ProjetoComponente.projeto_id.in_(projetos_excluidos))
+        ))
+    if componentes_excluidos:
+        pendentes['projetos'].update(session.scalars(
+            sa.select(ProjetoComponente.projeto_id).where(ProjetoComponente.componente_id.in_(componentes_excluidos))
+        ))
+
+
+def _ids(itens):
+    # Os pendentes podem ser ids ou objetos (que só têm id depois do flush)
+    return {getattr(item, 'id', item) for item in itens} - {None}
+
+
+@sa.event.listens_for(so.Session, 'after_flush')
+def _aplicar_contadores(session, flush_context):
+    pendentes = session.info.pop('contadores', None)
+    if not pendentes:
+        return
+    projeto_ids, componente_ids = _ids(pendentes['projetos']), _ids(pendentes['componentes'])
+    if projeto_ids or componente_ids:
+        recalcular(session.connection(), projeto_ids, componente_ids)
+        session.info['contadores_expirar'] = (projeto_ids, componente_ids)
+
+
+@sa.event.listens_for(so.Session, 'after_flush_postexec')
+def _expirar_contadores(session, flush_context):
+    # Os valores em memória ficaram desatualizados pelo UPDATE direto
+    projeto_ids, componente_ids = session.info.pop('contadores_expirar', ((), ()))
+    for obj in list(session.identity_map.values()):
+        if isinstance(obj, Projeto) and obj.id in projeto_ids:
+            session.expire(obj, ['total_componentes', 'versao'])
+        elif isinstance(obj, Componente) and obj.id in componente_ids:
+            session.expire(obj, ['total_projetos', 'versao'])
+
+
+cli = AppGroup('contadores', help='Contadores de uso de projetos e componentes.')
+
+
+@cli.command('verificar')
+@click.option('--corrigir', is_flag=True, help='Recalcula os contadores divergentes.')
+def verificar_comando(corrigir):
+    """Compara os contadores com a tabela projeto_componente."""
+    if corrigir:
+        banco.sessao_de_escrita(db.session)
+    conexao = db.session.connection()
+    encontradas = list(divergencias(conexao))
+    for tabela, id_, gravado, contado in encontradas:
+        click.echo(f'{tabela} {id_}: gravado={gravado} real={contado}')
+
+    if not encontradas:
+        click.echo('Contadores consistentes.')
+    elif corrigir:
+        recalcular(
+            conexao,
+            [id_ for tabela, id_, _, _ in encontradas if tabela == 'projeto'],
+            [id_ for tabela, id_, _, _ in encontradas if tabela == 'componente']
+        )
+        db.session.commit()
+        click.echo(f'{len(encontradas)} contador(es) corrigido(s).')
+    else:
+        raise SystemExit(1)
@@ -0,0 +1,132 @@
+import gzip
+import hashlib
+import mimetypes
+import os
+
+import click
+from flask import abort, request, send_file
+from flask.cli import AppGroup
+from werkzeug.security import safe_join
+
+try:
+    import brotli
+except ImportError:  # brotli é opcional; sem ele só há variantes .gz
+    brotli = None
+
+# Arquivos de app/static com o hash do conteúdo no nome: url_for('static',
+# filename='js/busca.js') gera /static/js/busca.<hash>.js, servido com
+# Cache-Control immutable (o nome muda quando o conteúdo muda).
+# `flask estaticos comprimir` grava ao lado de cada arquivo as variantes
+# .br/.gz, entregues conforme o Accept-Encoding sem comprimir a cada acesso.
+
+UM_ANO = 365 * 24 * 3600
+EXTENSOES_COMPRIMIVEIS = ('.css', '.js', '.svg', '.json', '.txt', '.html')
+# Em ordem de preferência
+VARIANTES = (('br', '.br'), ('gzip', '.gz'))
+
+
+def _com_hash(nome, conteudo):
+    raiz, extensao = os.path.splitext(nome)
+    return f'{raiz}.{hashlib.sha256(conteudo).hexdigest()[:12]}{extensao}'
+
+
+class Estaticos:
+    def __init__(self, app=None):
+        self.pasta = None
+        self.max_age = UM_ANO
+        self.nomes = {}        # nome -> nome com hash
+        self.originais = {}    # nome com hash -> nome
+        self.variantes = {}    # nome -> {codificação: caminho}
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        app.config.setdefault('ESTATICOS_MAX_AGE', UM_ANO)
+        self.pasta = app.static_folder
+        self.max_age = app.config['ESTATICOS_MAX_AGE']
+        self.mapear()
+        # A regra /static/<path:filename> continua a do Flask; só a view e a URL mudam
+        app.view_functions['static'] = self.servir
+        app.url_defaults(self._nome_com_hash)
+        app.extensions['estaticos'] = self
+
+    def arquivos(self):
+        for raiz, _, nomes in os.walk(self.pasta):
+            for nome in nomes:
+                if not nome.endswith(tuple(extensao for _, extensao in VARIANTES)):
+                    caminho = os.path.join(raiz, nome)
+                    yield os.path.relpath(caminho, self.pasta).replace(os.sep, '/'), caminho
+
+    def mapear(self):
+        """Calcula os nomes com hash e as variantes comprimidas em dia com o original."""
+        self.nomes, self.originais, self.variantes = {}, {}, {}
+        if not self.pasta or not os.path.isdir(self.pasta):
+            return
+        for nome, caminho in self.arquivos():
+            with open(caminho, 'rb') as arquivo:
+                self.nomes[nome] = _com_hash(nome, arquivo.read())
+            self.originais[self.nomes[nome]] = nome
+            modificado = os.path.getmtime(caminho)
+            self.variantes[nome] = {
+                codificacao: caminho + extensao
+                for codificacao, extensao in VARIANTES
+                if os.path.isfile(caminho + extensao) and os.path.getmtime(caminho + extensao) >= modificado
+            }
+
+    def _nome_com_hash(self, endpoint, valores):
+        if endpoint == 'static' and 'filename' in valores:
+            valores['filename'] = self.nomes.get(valores['filename'], valores['filename'])
+
+    def servir(self, filename):
+        nome = self.originais.get(filename, filename)
+        caminho = safe_join(self.pasta, nome)
+        if caminho is None or not os.path.isfile(caminho):
+            abort(404)
+
+        codificacao = None
+        for candidata, variante in self.variantes.get(nome, {}).items():
+            if request.accept_encodings[candidata]:
+                codificacao, caminho = candidata, variante
+                break
+
+        # O tipo é o do arquivo original, não o da variante .gz/.br.
+        # Sem hash no nome, o navegador revalida a cada uso (no-cache)
+        imutavel = filename in self.originais
+        resposta = send_file(caminho, mimetype=mimetypes.guess_type(nome)[0], conditional=True,
+                             max_age=self.max_age if imutavel else None)
+        resposta.vary.add('Accept-Encoding')
+        if codificacao:
+            resposta.headers['Content-Encoding'] = codificacao
+        if imutavel:
+            resposta.cache_control.immutable = True
+        return resposta
+
+
+estaticos = Estaticos()
+
+cli = AppGroup('estaticos', help='Arquivos estáticos com hash e variantes comprimidas.')
+
+
+@cli.command('comprimir')
+def comprimir_comando():
+    """Grava as variantes .gz (e .br, com o pacote brotli) dos arquivos estáticos (passo de build)."""
+    total = 0
+    for nome, caminho in estaticos.arquivos():
+        if not nome.endswith(EXTENSOES_COMPRIMIVEIS):
+            continue
+        with open(caminho, 'rb') as arquivo:
+            conteudo = arquivo.read()
+        # mtime=0: o mesmo arquivo gera sempre os mesmos bytes
+        variantes = {'.gz': gzip.compress(conteudo, compresslevel=9, mtime=0)}
+        if brotli is not None:
+            variantes['.br'] = brotli.compress(conteudo, quality=11)
+        for extensao, dados in variantes.items():
+            with open(caminho + extensao, 'wb') as arquivo:
+                arquivo.write(dados)
+            total += 1
+        click.echo(f"{nome}: {len(conteudo)} bytes -> "
+                   + ', '.join(f'{extensao} {len(dados)}' for extensao, dados in variantes.items()))
+    if brotli is None:
+        click.echo('Pacote brotli não instalado: só variantes .gz.')
+    estaticos.mapear()
+    click.echo(f'{total} variantes gravadas.')
@@ -0,0 +1,167 @@
+import sqlalchemy as sa
+
+from app.models import Projeto, Componente, ProjetoComponente
+from app import versoes
+
+# Reserva de estoque. Toda baixa é um único UPDATE condicional
+# (quantidade = quantidade - n WHERE quantidade >= n), então dois workers
+# reservando o mesmo componente nunca deixam o estoque negativo nem perdem
+# uma atualização: quem chega por último simplesmente não encontra a linha.
+# ProjetoComponente.quantidade é quanto de cada componente o projeto usa.
+
+componente_t = Componente.__table__
+associacao_t = ProjetoComponente.__table__
+
+
+class EstoqueInsuficiente(Exception):
+    def __init__(self, faltas):
+        super().__init__('Estoque insuficiente.')
+        self.faltas = faltas
+
+
+def _validar(n):
+    if not isinstance(n, int) or isinstance(n, bool) or n <= 0:
+        raise ValueError('A quantidade deve ser um inteiro positivo.')
+
+
+def reservar(conexao, componente_id, n):
+    """Baixa n unidades; devolve o estoque restante ou levanta EstoqueInsuficiente."""
+    _validar(n)
+    restante = conexao.scalar(
+        sa.update(componente_t)
+        .where(componente_t.c.id == componente_id, componente_t.c.quantidade >= n)
+        .values(quantidade=componente_t.c.quantidade - n, versao=componente_t.c.versao + 1)
+        .returning(componente_t.c.quantidade)
+    )
+    if restante is None:
+        disponivel = conexao.scalar(sa.select(componente_t.c.quantidade).where(componente_t.c.id == componente_id))
+        if disponivel is None:
+            raise LookupError('Componente não encontrado.')
+        raise EstoqueInsuficiente([{'componente_id': componente_id, 'necessario': n, 'disponivel': disponivel}])
+    versoes.incrementar_catalogo(conexao)
+    return restante
+
+
+def devolver(conexao, componente_id, n):
+    """Devolve n unidades ao estoque; devolve o novo estoque."""
+    _validar(n)
+    quantidade = conexao.scalar(
+        sa.update(componente_t)
+        .where(componente_t.c.id == componente_id)
+        .values(quantidade=componente_t.c.quantidade + n, versao=componente_t.c.versao + 1)
+        .returning(componente_t.c.quantidade)
+    )
+    if quantidade is None:
+        raise LookupError('Componente não encontrado.')
+    versoes.incrementar_catalogo(conexao)
+    return quantidade
+
+
+def _necessaria(projeto_id, vezes):
+    # Quantidade que o projeto usa do componente da linha sendo atualizada
+    return (
+        sa.select(associacao_t.c.quantidade * vezes)
+        .where(associacao_t.c.projeto_id == projeto_id, associacao_t.c.componente_id == componente_t.c.id)
+        .scalar_subquery()
+    )
+
+
+def faltas(conexao, projeto_id, vezes=1):
+    """Componentes do projeto sem estoque para `vezes` montagens."""
+    necessario = associacao_t.c.quantidade * vezes
+    return [
+        linha._asdict() for linha in conexao.execute(
+            sa.select(
+                componente_t.c.id.label('componente_id'), componente_t.c.nome,
+                necessario.label('necessario'), componente_t.c.quantidade.label('disponivel')
+            )
+            .join(associacao_t, associacao_t.c.componente_id == componente_t.c.id)
+            .where(associacao_t.c.projeto_id == projeto_id, componente_t.c.quantidade < necessario)
+            .order_by(componente_t.c.id)
+        )
+    ]
+
+
+def reservar_projeto(conexao, projeto_id, vezes=1):
+    """Reserva todos os componentes do projeto de uma vez (tudo ou nada).
+
+    Um único UPDATE baixa o estoque dos componentes que têm o suficiente;
+    se algum ficou de fora, o savepoint é desfeito e EstoqueInsuficiente
+    traz a lista de faltas. Devolve {componente_id: estoque restante}.
+    """
+    _validar(vezes)
+    total = conexao.scalar(
+        sa.select(sa.func.count()).select_from(associacao_t).where(associacao_t.c.projeto_id == projeto_id)
+    )
+    if not total:
+        return {}
+
+    necessaria = _necessaria(projeto_id, vezes)
+    savepoint = conexao.begin_nested()
+    try:
+        restantes = dict(conexao.execute(
+            sa.update(componente_t)
+            .where(
+                componente_t.c.id.in_(
+                    sa.select(associacao_t.c.componente_id).where(associacao_t.c.projeto_id == projeto_id)
+                ),
+                componente_t.c.quantidade >= necessaria
+            )
+            .values(quantidade=componente_t.c.quantidade - necessaria, versao=componente_t.c.versao + 1)
+            .returning(componente_t.c.id, componente_t.c.quantidade)
+        ).all())
+    except Exception:
+        savepoint.rollback()
+        raise
+    if len(restantes) < total:
+        savepoint.rollback()
+        raise EstoqueInsuficiente(faltas(conexao, projeto_id, vezes))
+    savepoint.commit()
+
+    versoes.incrementar_catalogo(conexao)
+    return restantes
+
+
+def definir_necessarias(conexao, projeto_id, quantidades):
+    """Altera quanto o projeto usa de cada componente ({componente_id: n}).
+
+    Devolve os ids de fato alterados (componentes associados ao projeto).
+    """
+    for n in quantidades.values():
+        _validar(n)
+    if not quantidades:
+        return set()
+
+    associados = set(conexao.scalars(
+        sa.select(associacao_t.c.componente_id)
+        .where(associacao_t.c.projeto_id == projeto_id, associacao_t.c.componente_id.in_(quantidades))
+    ))
+    if associados:
+        conexao.execute(
+            sa.update(associacao_t)
+            .where(associacao_t.c.projeto_id == projeto_id, associacao_t.c.componente_id == sa.bindparam('b_componente_id'))
+            .values(quantidade=sa.bindparam('b_quantidade')),
+            [{'b_componente_id': id_, 'b_quantidade': quantidades[id_]} for id_ in associados]
+        )
+        conexao.execute(
+            sa.update(Projeto.__table__).where(Projeto.__table__.c.id == projeto_id)
+            .values(versao=Projeto.__table__.c.versao + 1)
+        )
+        versoes.incrementar_catalogo(conexao)
+    return associados
+
+
+def consulta_montaveis():
+    """Projetos que podem ser montados com o estoque atual, calculado no banco.
+
+    `unidades` é quantas vezes o projeto pode ser montado: o menor
+    estoque / quantidade usada entre seus componentes.
+    """
+    unidades = sa.func.min(Componente.quantidade // ProjetoComponente.quantidade).label('unidades')
+    return (
+        sa.select(Projeto.id, Projeto.nome, Projeto.total_componentes, unidades)
+        .join(ProjetoComponente, ProjetoComponente.projeto_id == Projeto.id)
+        .join(Componente, Componente.id == ProjetoComponente.componente_id)
+        .group_by(Projeto.id, Projeto.nome, Projeto.total_componentes)
+        .having(unidades >= 1)
+    )
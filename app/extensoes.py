@@ -0,0 +1,16 @@
+from flask_sqlalchemy import SQLAlchemy
+
+from app.banco import SessaoRoteada
+
+# Instâncias das extensões compartilhadas. Os módulos da aplicação importam
+# o db daqui, nunca do __init__ da raiz: assim existe um único SQLAlchemy,
+# seja a aplicação carregada pelo run.py, pelo gunicorn ou pelo flask CLI.
+# A sessão escolhe o engine de leitura nas requisições GET (app/banco.py)
+db = SQLAlchemy(session_options={'class_': SessaoRoteada})
+
+
+def iniciar_migracoes(app):
+    # O Flask-Migrate importa o Alembic inteiro; os workers web não precisam
+    # dele, então a importação só acontece quando as migrações estão ligadas
+    from flask_migrate import Migrate
+    return Migrate(app, db)
@@ -0,0 +1,50 @@
+import json
+
+from flask import Response, stream_with_context
+
+# Respostas JSON geradas aos poucos: cada item é codificado e enviado em
+# partes (transfer-encoding chunked), sem montar a lista inteira, os dicts
+# e a string final na memória ao mesmo tempo.
+
+TAMANHO_PARTE = 16 * 1024
+
+
+def codificar(valor):
+    return json.dumps(valor, ensure_ascii=False, separators=(',', ':'))
+
+
+def agrupar(pedacos, tamanho=TAMANHO_PARTE):
+    # Junta pedaços pequenos para não enviar uma parte por item
+    buffer, acumulado = [], 0
+    for pedaco in pedacos:
+        buffer.append(pedaco)
+        acumulado += len(pedaco)
+        if acumulado >= tamanho:
+            yield ''.join(buffer)
+            buffer, acumulado = [], 0
+    if buffer:
+        yield ''.join(buffer)
+
+
+def _objeto(chave, itens, campos):
+    yield '{' + codificar(chave) + ':['
+    for i, item in enumerate(itens):
+        yield (',' if i else '') + codificar(item)
+    yield ']'
+    for nome, valor in campos.items():
+        yield ',' + codificar(nome) + ':' + codificar(valor)
+    yield '}'
+
+
+def objeto_json(chave, itens, **campos):
+    """Gera o texto de `{chave: [itens...], **campos}` em partes."""
+    return agrupar(_objeto(chave, itens, campos))
+
+
+def ndjson(itens):
+    """Gera um item JSON por linha (application/x-ndjson)."""
+    return agrupar(codificar(item) + '\n' for item in itens)
+
+
+def resposta(partes, mimetype='application/json', headers=None):
+    return Response(stream_with_context(partes), mimetype=mimetype, headers=headers)
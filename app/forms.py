@@ -1,17 +1,36 @@
 from flask_wtf import FlaskForm
-from wtforms import StringField, SubmitField, IntegerField, SelectMultipleField, TextAreaField
+from flask import current_app
+from wtforms import StringField, SubmitField, IntegerField, SelectMultipleField, TextAreaField, BooleanField
 from wtforms.validators import DataRequired, Optional, Length, NumberRange, ValidationError, URL
-from wtforms.widgets import ListWidget, CheckboxInput
+import sqlalchemy as sa
 
-class MultiCheckboxField(SelectMultipleField):
-    widget = ListWidget(prefix_label=False)
-    option_widget = CheckboxInput()
+from app.models import db, Componente
+from app import similaridade
+
+# Lista de ids de componentes escolhidos no seletor do projeto_form.
+# Em vez de montar choices com o catálogo inteiro, os ids enviados são
+# conferidos com uma única consulta IN.
+class ComponentesField(SelectMultipleField):
+    def process_formdata(self, valuelist):
+        super().process_formdata(valuelist)
+        # Remove repetições mantendo a ordem
+        self.data = list(dict.fromkeys(self.data))
+
+    def pre_validate(self, form):
+        if not self.data:
+            return
+        existentes = set(db.session.scalars(
+            sa.select(Componente.id).where(Componente.id.in_(self.data))
+        ))
+        invalidos = [str(id_) for id_ in self.data if id_ not in existentes]
+        if invalidos:
+            raise ValidationError(f"Componente(s) inexistente(s): {', '.join(invalidos)}")
 
 class ProjetoForm(FlaskForm):
     nome = StringField('Nome do Projeto', validators=[DataRequired(), Length(max=100)])
     descricao = TextAreaField('Descrição', validators=[DataRequired()])
     url = StringField('URL', validators=[DataRequired(), URL(), Length(max=200)])
-    componentes = MultiCheckboxField('Componentes', coerce=int, validators=[Optional()])
+    componentes = ComponentesField('Componentes', coerce=int, validators=[Optional()])
     submit = SubmitField('Salvar')
 
 class ComponenteForm(FlaskForm):
@@ -19,8 +38,33 @@ class ComponenteForm(FlaskForm):
     descricao = TextAreaField('Descrição', validators=[DataRequired()])
     url = StringField('URL', validators=[DataRequired(), URL(), Length(max=200)])
     quantidade = IntegerField('Quantidade', validators=[DataRequired(), NumberRange(min=0)])
+    confirmar = BooleanField('Cadastrar mesmo assim')
     submit = SubmitField('Salvar')
 
+    # Componente em edição, que não conta como parecido com ele mesmo
+    ignorar_id = None
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.semelhantes = []
+
+    # "Você quis dizer": nome parecido com o de um componente já cadastrado
+    # só passa se o usuário confirmar
+    def validate_nome(self, field):
+        if self.confirmar.data or field.data == field.object_data:
+            return
+        self.semelhantes = similaridade.semelhantes(
+            db.session.connection(), field.data, self.descricao.data or '',
+            limiar=current_app.config['SIMILARIDADE_LIMIAR'], ignorar=self.ignorar_id
+        )
+        if self.semelhantes:
+            nomes = ', '.join(f'"{item.nome}"' for item in self.semelhantes)
+            raise ValidationError(f'Você quis dizer {nomes}? Já existe componente com nome parecido.')
+
 # Formulário para edição de componente
 class ComponenteEditForm(ComponenteForm):
-    pass
\ No newline at end of file
+    confirmar = BooleanField('Salvar mesmo assim')
+
+    def __init__(self, *args, obj=None, **kwargs):
+        super().__init__(*args, obj=obj, **kwargs)
+        self.ignorar_id = obj.id if obj is not None else None
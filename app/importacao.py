@@ -0,0 +1,389 @@
+import csv
+import io
+import itertools
+import json
+import re
+from urllib.parse import urlparse
+
+import click
+import sqlalchemy as sa
+from flask.cli import AppGroup
+
+from app.models import db, Projeto, Componente, ProjetoComponente
+from app.cache import cache
+from app import banco, fluxo, lote
+
+# Importação e exportação do catálogo em CSV ou JSON Lines.
+#
+# Cada registro tem um campo "tipo" ("componente" ou "projeto"). Componentes
+# e projetos são atualizados pelo nome quando já existem (upsert); projetos
+# trazem a lista de nomes dos seus componentes, que substitui as associações.
+# O arquivo é lido em lotes e cada lote é gravado em uma transação, com
+# INSERT/UPDATE em executemany.
+
+TAMANHO_LOTE = 1000
+MAX_ERROS_LISTADOS = 1000
+CAMPOS_CSV = ['tipo', 'nome', 'descricao', 'url', 'quantidade', 'componentes']
+SEPARADOR_COMPONENTES = '|'
+
+componente_t = Componente.__table__
+projeto_t = Projeto.__table__
+associacao_t = ProjetoComponente.__table__
+
+
+class ErroRegistro(ValueError):
+    pass
+
+
+class ErroArquivo(ValueError):
+    # Arquivo ilegível (fora do UTF-8 ou CSV malformado): a leitura para na linha indicada
+    def __init__(self, linha, mensagem):
+        super().__init__(mensagem)
+        self.linha = linha
+
+
+class Resumo:
+    def __init__(self):
+        self.componentes_inseridos = 0
+        self.componentes_atualizados = 0
+        self.projetos_inseridos = 0
+        self.projetos_atualizados = 0
+        self.total_erros = 0
+        self.erros = []
+        self.erro_de_arquivo = None
+
+    def erro(self, linha, mensagem):
+        self.total_erros += 1
+        if len(self.erros) < MAX_ERROS_LISTADOS:
+            self.erros.append({'linha': linha, 'erro': mensagem})
+
+    def como_dict(self):
+        return {
+            'componentes_inseridos': self.componentes_inseridos,
+            'componentes_atualizados': self.componentes_atualizados,
+            'projetos_inseridos': self.projetos_inseridos,
+            'projetos_atualizados': self.projetos_atualizados,
+            'total_erros': self.total_erros,
+            'erros': self.erros,
+        }
+
+
+# Bytes fora do UTF-8 num arquivo aberto com errors='surrogateescape'
+_FORA_DO_UTF8 = re.compile('[\udc80-\udcff]')
+
+
+def _linhas(arquivo):
+    numero = 0
+    try:
+        for numero, texto in enumerate(arquivo, 1):
+            if _FORA_DO_UTF8.search(texto):
+                raise ErroArquivo(numero, 'o arquivo não está em UTF-8')
+            yield texto
+    except UnicodeDecodeError:
+        # Aberto sem surrogateescape: o erro vem do bloco decodificado, não da linha exata
+        raise ErroArquivo(numero + 1, 'o arquivo não está em UTF-8')
+
+
+# Leitores: geram (número da linha, registro); erros de leitura vêm como
+# ErroRegistro e erros que impedem ler o resto do arquivo são levantados como ErroArquivo
+def ler_jsonl(arquivo):
+    for numero, texto in enumerate(_linhas(arquivo), 1):
+        if not texto.strip():
+            continue
+        try:
+            yield numero, json.loads(texto)
+        except ValueError as e:
+            yield numero, ErroRegistro(f'JSON inválido: {e}')
+
+
+def ler_csv(arquivo):
+    leitor = csv.DictReader(_linhas(arquivo))
+    try:
+        for registro in leitor:
+            componentes = registro.get('componentes')
+            if componentes is not None:
+                registro['componentes'] = [nome for nome in componentes.split(SEPARADOR_COMPONENTES) if nome.strip()]
+            yield leitor.line_num, registro
+    except csv.Error as e:
+        # line_num ainda não conta a linha com problema
+        raise ErroArquivo(leitor.line_num + 1, f'CSV inválido: {e}')
+
+
+LEITORES = {'jsonl': ler_jsonl, 'csv': ler_csv}
+# A exportação também gera um documento JSON único ({"registros": [...]})
+FORMATOS_EXPORTACAO = ('jsonl', 'csv', 'json')
+
+
+def _texto(registro, campo, maximo=None):
+    valor = registro.get(campo)
+    valor = valor.strip() if isinstance(valor, str) else ''
+    if not valor:
+        raise ErroRegistro(f'campo "{campo}" é obrigatório')
+    if maximo and len(valor) > maximo:
+        raise ErroRegistro(f'campo "{campo}" tem mais de {maximo} caracteres')
+    return valor
+
+
+def validar(registro):
+    # Mesmas regras do ComponenteForm/ProjetoForm
+    if not isinstance(registro, dict):
+        raise ErroRegistro('o registro deve ser um objeto')
+
+    tipo = registro.get('tipo')
+    if tipo not in ('componente', 'projeto'):
+        raise ErroRegistro('campo "tipo" deve ser "componente" ou "projeto"')
+
+    dados = {
+        'nome': _texto(registro, 'nome', 100),
+        'descricao': _texto(registro, 'descricao'),
+        'url': _texto(registro, 'url', 200),
+    }
+    endereco = urlparse(dados['url'])
+    if endereco.scheme not in ('http', 'https') or not endereco.netloc:
+        raise ErroRegistro('campo "url" não é uma URL válida')
+
+    if tipo == 'componente':
+        try:
+            dados['quantidade'] = int(registro.get('quantidade'))
+        except (TypeError, ValueError):
+            raise ErroRegistro('campo "quantidade" deve ser um número inteiro')
+        if dados['quantidade'] < 0:
+            raise ErroRegistro('campo "quantidade" não pode ser negativo')
+    else:
+        componentes = registro.get('componentes') or []
+        if not isinstance(componentes, list) or not all(isinstance(nome, str) for nome in componentes):
+            raise ErroRegistro('campo "componentes" deve ser uma lista de nomes')
+        dados['componentes'] = sorted({nome.strip() for nome in componentes if nome.strip()})
+    return tipo, dados
+
+
+def _ids_por_nome(conexao, tabela, nomes):
+    # Nome de componente não é único: em caso de repetição vale o menor id
+    if not nomes:
+        return {}
+    return dict(conexao.execute(
+        sa.select(tabela.c.nome, sa.func.min(tabela.c.id))
+        .where(tabela.c.nome.in_(nomes))
+        .group_by(tabela.c.nome)
+    ).all())
+
+
+def _upsert(conexao, tabela, registros, colunas):
+    # registros: {nome: dados}. Devolve (ids inseridos, ids atualizados)
+    existentes = _ids_por_nome(conexao, tabela, list(registros))
+
+    atualizar = [
+        {'b_id': existentes[nome], **{f'b_{coluna}': dados[coluna] for coluna in colunas}}
+        for nome, dados in registros.items() if nome in existentes
+    ]
+    if atualizar:
+        conexao.execute(
+            sa.update(tabela)
+            .where(tabela.c.id == sa.bindparam('b_id'))
+            .values(versao=tabela.c.versao + 1, **{coluna: sa.bindparam(f'b_{coluna}') for coluna in colunas}),
+            atualizar
+        )
+
+    inserir = [
+        {'nome': nome, **{coluna: dados[coluna] for coluna in colunas}}
+        for nome, dados in registros.items() if nome not in existentes
+    ]
+    inseridos = []
+    if inserir:
+        inseridos = conexao.execute(sa.insert(tabela).returning(tabela.c.id), inserir).scalars().all()
+
+    return inseridos, [linha['b_id'] for linha in atualizar]
+
+
+def _gravar_lote(conexao, componentes, projetos, erro):
+    contagem = {}
+
+    inseridos, atualizados = _upsert(
+        conexao, componente_t,
+        {nome: dados for nome, (_, dados) in componentes.items()},
+        ['descricao', 'url', 'quantidade']
+    )
+    contagem['componentes_inseridos'] = len(inseridos)
+    contagem['componentes_atualizados'] = len(atualizados)
+    componentes_alterados = inseridos + atualizados
+
+    # Projetos que citam componentes inexistentes são rejeitados
+    nomes = {nome for _, dados in projetos.values() for nome in dados['componentes']}
+    mapa = _ids_por_nome(conexao, componente_t, list(nomes))
+    validos = {}
+    for nome, (numero, dados) in projetos.items():
+        faltando = [c for c in dados['componentes'] if c not in mapa]
+        if faltando:
+            erro(numero, 'componentes não encontrados: ' + ', '.join(faltando))
+        else:
+            validos[nome] = dados
+
+    inseridos, atualizados = _upsert(conexao, projeto_t, validos, ['descricao', 'url'])
+    contagem['projetos_inseridos'] = len(inseridos)
+    contagem['projetos_atualizados'] = len(atualizados)
+
+    # Substitui as associações dos projetos gravados
+    projeto_ids = _ids_por_nome(conexao, projeto_t, list(validos))
+    componentes_afetados = set()
+    if projeto_ids:
+        componentes_afetados.update(conexao.scalars(
+            sa.select(associacao_t.c.componente_id).where(associacao_t.c.projeto_id.in_(projeto_ids.values()))
+        ))
+        conexao.execute(sa.delete(associacao_t).where(associacao_t.c.projeto_id.in_(projeto_ids.values())))
+        pares = [
+            {'projeto_id': projeto_ids[nome], 'componente_id': mapa[componente]}
+            for nome, dados in validos.items() for componente in dados['componentes']
+        ]
+        if pares:
+            conexao.execute(sa.insert(associacao_t), pares)
+        componentes_afetados.update(par['componente_id'] for par in pares)
+
+    lote.sincronizar(
+        conexao,
+        indexar=componentes_alterados,
+        projetos=projeto_ids.values(),
+        componentes=componentes_afetados
+    )
+    return contagem
+
+
+def importar(arquivo, formato='jsonl', tamanho_lote=TAMANHO_LOTE):
+    """Importa um arquivo de texto (CSV ou JSON Lines) e devolve um Resumo.
+
+    Abra o arquivo com errors='surrogateescape' para que um trecho fora do
+    UTF-8 seja apontado na linha exata. Um erro de arquivo interrompe a
+    importação; os registros lidos antes dele ainda são gravados.
+    """
+    resumo = Resumo()
+    registros = LEITORES[formato](arquivo)
+
+    while resumo.erro_de_arquivo is None:
+        bloco = []
+        try:
+            for item in itertools.islice(registros, tamanho_lote):
+                bloco.append(item)
+        except ErroArquivo as e:
+            resumo.erro(e.linha, str(e))
+            resumo.erro_de_arquivo = e
+        if not bloco:
+            break
+
+        # Dentro do lote, o último registro com o mesmo nome prevalece
+        componentes, projetos = {}, {}
+        for numero, registro in bloco:
+            try:
+                if isinstance(registro, ErroRegistro):
+                    raise registro
+                tipo, dados = validar(registro)
+            except ErroRegistro as e:
+                resumo.erro(numero, str(e))
+                continue
+            destino = componentes if tipo == 'componente' else projetos
+            destino[dados['nome']] = (numero, dados)
+
+        if not componentes and not projetos:
+            continue
+
+        erros_do_lote = []
+        try:
+            contagem = _gravar_lote(
+                db.session.connection(), componentes, projetos,
+                lambda numero, mensagem: erros_do_lote.append((numero, mensagem))
+            )
+            db.session.commit()
+        except sa.exc.SQLAlchemyError as e:
+            db.session.rollback()
+            for numero, _ in itertools.chain(componentes.values(), projetos.values()):
+                resumo.erro(numero, f'erro ao gravar o lote: {e}')
+            continue
+
+        for numero, mensagem in erros_do_lote:
+            resumo.erro(numero, mensagem)
+        for campo, valor in contagem.items():
+            setattr(resumo, campo, getattr(resumo, campo) + valor)
+        cache.limpar()
+
+    return resumo
+
+
+def exportar_registros(tamanho_lote=TAMANHO_LOTE):
+    # Percorre o catálogo com yield_per, sem carregar tudo na memória
+    consulta = sa.select(
+        Componente.nome, Componente.descricao, Componente.url, Componente.quantidade
+    ).order_by(Componente.id).execution_options(yield_per=tamanho_lote)
+    for linha in db.session.execute(consulta):
+        yield {'tipo': 'componente', **linha._asdict()}
+
+    consulta = sa.select(
+        Projeto.id, Projeto.nome, Projeto.descricao, Projeto.url, Componente.nome.label('componente')
+    ).outerjoin(
+        ProjetoComponente, ProjetoComponente.projeto_id == Projeto.id
+    ).outerjoin(
+        Componente, Componente.id == ProjetoComponente.componente_id
+    ).order_by(Projeto.id, Componente.nome).execution_options(yield_per=tamanho_lote)
+
+    for _, linhas in itertools.groupby(db.session.execute(consulta), key=lambda linha: linha.id):
+        linhas = list(linhas)
+        yield {
+            'tipo': 'projeto',
+            'nome': linhas[0].nome,
+            'descricao': linhas[0].descricao,
+            'url': linhas[0].url,
+            'componentes': [linha.componente for linha in linhas if linha.componente is not None],
+        }
+
+
+def exportar(formato='jsonl', tamanho_lote=TAMANHO_LOTE):
+    """Gera o catálogo em texto, em partes."""
+    if formato == 'jsonl':
+        yield from fluxo.ndjson(exportar_registros(tamanho_lote))
+        return
+    if formato == 'json':
+        yield from fluxo.objeto_json('registros', exportar_registros(tamanho_lote))
+        return
+
+    buffer = io.StringIO()
+    escritor = csv.DictWriter(buffer, fieldnames=CAMPOS_CSV)
+    escritor.writeheader()
+    for registro in exportar_registros(tamanho_lote):
+        if 'componentes' in registro:
+            registro['componentes'] = SEPARADOR_COMPONENTES.join(registro['componentes'])
+        escritor.writerow(registro)
+        yield buffer.getvalue()
+        buffer.seek(0)
+        buffer.truncate()
+
+
+def formato_do_arquivo(nome):
+    return 'csv' if nome.lower().endswith('.csv') else 'jsonl'
+
+
+cli = AppGroup('catalogo', help='Importação e exportação do catálogo.')
+
+
+@cli.command('importar')
+@click.argument('arquivo', type=click.Path(exists=True, dir_okay=False))
+@click.option('--formato', type=click.Choice(['jsonl', 'csv']), help='Padrão: pela extensão do arquivo.')
+@click.option('--lote', 'tamanho_lote', default=TAMANHO_LOTE, show_default=True, help='Registros por transação.')
+def importar_comando(arquivo, formato, tamanho_lote):
+    """Importa componentes e projetos de um arquivo CSV ou JSON Lines."""
+    banco.sessao_de_escrita(db.session)
+    with open(arquivo, encoding='utf-8', errors='surrogateescape', newline='') as entrada:
+        resumo = importar(entrada, formato or formato_do_arquivo(arquivo), tamanho_lote)
+
+    dados = resumo.como_dict()
+    for erro in dados.pop('erros'):
+        click.echo(f"linha {erro['linha']}: {erro['erro']}", err=True)
+    for campo, valor in dados.items():
+        click.echo(f'{campo}: {valor}')
+    if resumo.total_erros:
+        raise SystemExit(1)
+
+
+@cli.command('exportar')
+@click.argument('saida', type=click.File('w', encoding='utf-8'), default='-')
+@click.option('--formato', type=click.Choice(FORMATOS_EXPORTACAO), default='jsonl', show_default=True)
+def exportar_comando(saida, formato):
+    """Exporta o catálogo para um arquivo (ou para a saída padrão)."""
+    for linha in exportar(formato):
+        saida.write(linha)
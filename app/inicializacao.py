@@ -0,0 +1,75 @@
+import os
+import time
+
+import click
+import sqlalchemy as sa
+import sqlalchemy.orm as so
+from flask import current_app
+from flask.cli import AppGroup
+from jinja2 import FileSystemBytecodeCache
+
+from app.extensoes import db
+
+# Partida rápida dos workers: os templates são compilados para bytecode na
+# hora do build (flask inicializacao compilar-templates) e o processo mestre
+# do gunicorn (preload_app) configura os mappers, carrega os templates e
+# inicializa o dialeto do banco antes do fork; os workers herdam tudo pronto
+# e só abrem as próprias conexões (gunicorn.conf.py).
+
+
+def configurar_bytecode(app):
+    # Só usa a pasta se ela já existe: em desenvolvimento nada é gravado
+    pasta = app.config.get('TEMPLATES_BYTECODE')
+    if pasta and os.path.isdir(pasta):
+        app.jinja_env.bytecode_cache = FileSystemBytecodeCache(pasta)
+
+
+def compilar_templates(app):
+    """Carrega todos os templates; devolve os nomes compilados."""
+    nomes = app.jinja_env.list_templates(extensions=['html'])
+    for nome in nomes:
+        app.jinja_env.get_template(nome)
+    return nomes
+
+
+def aquecer(app):
+    """Deixa pronto no processo mestre o que todo worker faria na primeira requisição."""
+    so.configure_mappers()
+    compilar_templates(app)
+    with app.app_context():
+        # A primeira conexão inicializa o dialeto (versão do servidor etc.);
+        # o principal primeiro, que é quem define o journal_mode do arquivo
+        for engine in db.engines.values():
+            with engine.connect() as conexao:
+                conexao.execute(sa.text('SELECT 1'))
+        # Nenhuma conexão aberta pode atravessar o fork
+        for engine in db.engines.values():
+            engine.dispose()
+
+
+cli = AppGroup('inicializacao', help='Compilação de templates e aquecimento da aplicação.')
+
+
+@cli.command('compilar-templates')
+def compilar_templates_comando():
+    """Grava o bytecode de todos os templates em TEMPLATES_BYTECODE (passo de build)."""
+    pasta = current_app.config.get('TEMPLATES_BYTECODE')
+    if not pasta:
+        raise click.ClickException('TEMPLATES_BYTECODE não está configurado.')
+    os.makedirs(pasta, exist_ok=True)
+    for arquivo in os.listdir(pasta):
+        if arquivo.endswith('.cache'):
+            os.remove(os.path.join(pasta, arquivo))
+    configurar_bytecode(current_app)
+    # O cache em memória já pode ter templates carregados sem passar pelo bytecode
+    current_app.jinja_env.cache.clear()
+    nomes = compilar_templates(current_app)
+    click.echo(f'{len(nomes)} templates compilados em {pasta}')
+
+
+@cli.command('aquecer')
+def aquecer_comando():
+    """Executa o aquecimento e mostra quanto ele levou."""
+    inicio = time.perf_counter()
+    aquecer(current_app)
+    click.echo(f'Aquecimento em {(time.perf_counter() - inicio) * 1000:.1f} ms')
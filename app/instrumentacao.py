@@ -0,0 +1,193 @@
+import json
+import logging
+import threading
+import time
+from collections import Counter
+
+import sqlalchemy as sa
+from flask import Response, before_render_template, g, has_request_context, request, request_finished, \
+    request_started, template_rendered
+
+# Instrumentação por requisição (opcional, INSTRUMENTACAO = True):
+# número de consultas, tempo no banco, consultas mais lentas e tempo de
+# renderização dos templates. Os dados saem no cabeçalho Server-Timing, numa
+# linha de log JSON por requisição e em /metrics (formato do Prometheus).
+
+logger = logging.getLogger('app.instrumentacao')
+
+# Limites dos buckets, em segundos (latência e tempo de banco) e em consultas
+BUCKETS_SEGUNDOS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5)
+BUCKETS_CONSULTAS = (1, 2, 5, 10, 20, 50, 100)
+
+IGNORADOS = ('static', 'metrics')
+
+
+class Histograma:
+    def __init__(self, nome, ajuda, buckets, rotulo='endpoint'):
+        self.nome = nome
+        self.ajuda = ajuda
+        self.buckets = buckets
+        self.rotulo = rotulo
+        # valor do rótulo -> [contagem por bucket..., soma, total]
+        self._series = {}
+
+    def observar(self, serie, valor):
+        contagens = self._series.setdefault(serie, [0] * (len(self.buckets) + 2))
+        for i, limite in enumerate(self.buckets):
+            if valor <= limite:
+                contagens[i] += 1
+        contagens[-2] += valor
+        contagens[-1] += 1
+
+    def exportar(self):
+        linhas = [f'# HELP {self.nome} {self.ajuda}', f'# TYPE {self.nome} histogram']
+        for serie, contagens in sorted(self._series.items()):
+            rotulo = f'{self.rotulo}="{serie}"'
+            for limite, contagem in zip(self.buckets, contagens):
+                linhas.append(f'{self.nome}_bucket{{{rotulo},le="{limite}"}} {contagem}')
+            linhas.append(f'{self.nome}_bucket{{{rotulo},le="+Inf"}} {contagens[-1]}')
+            linhas.append(f'{self.nome}_sum{{{rotulo}}} {contagens[-2]}')
+            linhas.append(f'{self.nome}_count{{{rotulo}}} {contagens[-1]}')
+        return linhas
+
+
+class Instrumentacao:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.duracao = Histograma('wallecreator_requisicao_segundos', 'Duração das requisições.', BUCKETS_SEGUNDOS)
+        self.tempo_sql = Histograma('wallecreator_sql_segundos', 'Tempo no banco por requisição.', BUCKETS_SEGUNDOS)
+        self.consultas = Histograma('wallecreator_sql_consultas', 'Consultas SQL por requisição.', BUCKETS_CONSULTAS)
+        self.alertas_n_mais_1 = Counter()
+        # Funções de outros módulos que acrescentam linhas ao /metrics
+        self.exportadores = []
+
+    def init_app(self, app, db):
+        app.config.setdefault('INSTRUMENTACAO', False)
+        app.config.setdefault('INSTRUMENTACAO_MAIS_LENTAS', 3)
+        app.config.setdefault('INSTRUMENTACAO_REPETICOES', 5)
+        if not app.config['INSTRUMENTACAO']:
+            return
+
+        with app.app_context():
+            # Principal e, se houver, o engine de leitura (app/banco.py)
+            for engine in db.engines.values():
+                sa.event.listen(engine, 'before_cursor_execute', self._antes_do_comando)
+                sa.event.listen(engine, 'after_cursor_execute', self._depois_do_comando)
+
+        request_started.connect(self._inicio, app)
+        request_finished.connect(self._fim, app)
+        before_render_template.connect(self._antes_do_template, app)
+        template_rendered.connect(self._depois_do_template, app)
+        app.add_url_rule('/metrics', 'metrics', self.metrics)
+        app.extensions['instrumentacao'] = self
+
+    def registrar(self, exportador):
+        self.exportadores.append(exportador)
+
+    # Coleta
+
+    def _dados(self):
+        if has_request_context():
+            return g.get('instrumentacao')
+        return None
+
+    def _inicio(self, app, **extra):
+        g.instrumentacao = {
+            'inicio': time.perf_counter(),
+            'comandos': [],
+            'template': 0.0,
+            'templates_abertos': [],
+        }
+
+    def _antes_do_comando(self, conexao, cursor, comando, parametros, contexto, executemany):
+        if self._dados() is not None:
+            conexao.info.setdefault('instrumentacao_inicio', []).append(time.perf_counter())
+
+    def _depois_do_comando(self, conexao, cursor, comando, parametros, contexto, executemany):
+        dados = self._dados()
+        if dados is None or not conexao.info.get('instrumentacao_inicio'):
+            return
+        inicio = conexao.info['instrumentacao_inicio'].pop()
+        dados['comandos'].append((comando, time.perf_counter() - inicio))
+
+    def _antes_do_template(self, app, template, context, **extra):
+        dados = self._dados()
+        if dados is not None:
+            dados['templates_abertos'].append(time.perf_counter())
+
+    def _depois_do_template(self, app, template, context, **extra):
+        dados = self._dados()
+        if dados is not None and dados['templates_abertos']:
+            inicio = dados['templates_abertos'].pop()
+            # Templates aninhados (render_template dentro de outro) não contam duas vezes
+            if not dados['templates_abertos']:
+                dados['template'] += time.perf_counter() - inicio
+
+    # Publicação
+
+    def _fim(self, app, response, **extra):
+        dados = g.pop('instrumentacao', None)
+        endpoint = request.endpoint or 'desconhecido'
+        if dados is None or endpoint in IGNORADOS:
+            return
+
+        duracao = time.perf_counter() - dados['inicio']
+        comandos = dados['comandos']
+        tempo_sql = sum(tempo for _, tempo in comandos)
+        mais_lentas = sorted(comandos, key=lambda item: item[1], reverse=True)
+        mais_lentas = mais_lentas[:app.config['INSTRUMENTACAO_MAIS_LENTAS']]
+
+        # N+1: o mesmo comando (com parâmetros diferentes) repetido na requisição
+        repetidos = [
+            (comando, vezes) for comando, vezes in Counter(comando for comando, _ in comandos).items()
+            if vezes >= app.config['INSTRUMENTACAO_REPETICOES']
+        ]
+        for comando, vezes in repetidos:
+            logger.warning('Possível N+1 em %s: comando executado %d vezes: %s', endpoint, vezes, _resumir(comando))
+
+        with self._lock:
+            self.duracao.observar(endpoint, duracao)
+            self.tempo_sql.observar(endpoint, tempo_sql)
+            self.consultas.observar(endpoint, len(comandos))
+            if repetidos:
+                self.alertas_n_mais_1[endpoint] += 1
+
+        response.headers.add(
+            'Server-Timing',
+            f'db;dur={tempo_sql * 1000:.1f};desc="{len(comandos)} consultas", '
+            f'tpl;dur={dados["template"] * 1000:.1f}, '
+            f'total;dur={duracao * 1000:.1f}'
+        )
+        logger.info(json.dumps({
+            'metodo': request.method,
+            'caminho': request.path,
+            'endpoint': endpoint,
+            'status': response.status_code,
+            'duracao_ms': round(duracao * 1000, 2),
+            'consultas': len(comandos),
+            'sql_ms': round(tempo_sql * 1000, 2),
+            'template_ms': round(dados['template'] * 1000, 2),
+            'mais_lentas': [{'sql': _resumir(comando), 'ms': round(tempo * 1000, 2)} for comando, tempo in mais_lentas],
+            'n_mais_1': [{'sql': _resumir(comando), 'vezes': vezes} for comando, vezes in repetidos],
+        }, ensure_ascii=False))
+
+    def metrics(self):
+        with self._lock:
+            linhas = self.duracao.exportar() + self.tempo_sql.exportar() + self.consultas.exportar()
+            linhas += [
+                '# HELP wallecreator_n_mais_1_total Requisições com comandos SQL repetidos (possível N+1).',
+                '# TYPE wallecreator_n_mais_1_total counter',
+            ]
+            linhas += [f'wallecreator_n_mais_1_total{{endpoint="{endpoint}"}} {total}'
+                       for endpoint, total in sorted(self.alertas_n_mais_1.items())]
+        for exportador in self.exportadores:
+            linhas += exportador()
+        return Response('\n'.join(linhas) + '\n', mimetype='text/plain; version=0.0.4')
+
+
+def _resumir(comando, tamanho=200):
+    comando = ' '.join(comando.split())
+    return comando if len(comando) <= tamanho else comando[:tamanho] + '...'
+
+
+instrumentacao = Instrumentacao()
@@ -0,0 +1,16 @@
+from app import busca, contadores, similaridade, versoes
+
+# Escritas feitas direto em SQL (importação, operações em lote) não passam
+# pelos eventos do ORM; estas funções aplicam os mesmos efeitos colaterais.
+
+
+def sincronizar(conexao, indexar=(), remover=(), projetos=(), componentes=()):
+    """Atualiza contadores/versões, a versão do catálogo e o índice de trigramas e enfileira o índice de busca.
+
+    `indexar`/`remover`: ids de componentes criados/alterados ou excluídos.
+    `projetos`/`componentes`: ids cujas associações mudaram.
+    """
+    busca.enfileirar(conexao, set(indexar) | set(remover))
+    similaridade.atualizar(conexao, set(indexar) | set(remover))
+    contadores.recalcular(conexao, projetos, componentes)
+    versoes.incrementar_catalogo(conexao)
@@ -4,17 +4,16 @@ from typing import Optional, List
 import sqlalchemy as sa
 import sqlalchemy.orm as so
 
-# Importar db do módulo raiz
-try:
-    from __init__ import db
-except ImportError:
-    # Para quando executado dentro do contexto da aplicação
-    from flask_sqlalchemy import SQLAlchemy
-    db = SQLAlchemy()
+from app.extensoes import db
 
 # Tabela de associação para muitos-para-muitos entre Projeto e Componente
 class ProjetoComponente(db.Model):
     __tablename__ = 'projeto_componente'
+    # A chave primária começa por projeto_id; o índice inverso atende
+    # componente.projetos e as contagens por componente
+    __table_args__ = (
+        sa.Index('ix_projeto_componente_componente_id', 'componente_id', 'projeto_id'),
+    )
     projeto_id: so.Mapped[int] = so.mapped_column(
         sa.ForeignKey('projeto.id', ondelete='CASCADE'),
         primary_key=True
@@ -23,12 +22,18 @@ class ProjetoComponente(db.Model):
         sa.ForeignKey('componente.id', ondelete='CASCADE'), 
         primary_key=True
     )
+    # Unidades do componente usadas pelo projeto (reservas em app/estoque.py)
+    quantidade: so.Mapped[int] = so.mapped_column(sa.Integer, default=1, server_default='1')
 
 class Projeto(db.Model):
     id: so.Mapped[int] = so.mapped_column(primary_key=True)
     nome: so.Mapped[str] = so.mapped_column(sa.String(100), index=True, unique=True)
     descricao: so.Mapped[str] = so.mapped_column(sa.Text)
     url: so.Mapped[str] = so.mapped_column(sa.String(200))
+    # Contador mantido por app/contadores.py (evita carregar a coleção só para contar)
+    total_componentes: so.Mapped[int] = so.mapped_column(sa.Integer, default=0, server_default='0', index=True)
+    # Incrementada a cada escrita (app/versoes.py); usada nos ETags
+    versao: so.Mapped[int] = so.mapped_column(sa.Integer, default=1, server_default='1')
     
     # Relacionamento muitos-para-muitos com componentes
     componentes: so.Mapped[List['Componente']] = so.relationship(
@@ -41,11 +46,19 @@ class Projeto(db.Model):
         return f'<Projeto {self.nome}>'
 
 class Componente(db.Model):
+    # (nome, id) é a ordenação da lista de componentes e do seletor
+    __table_args__ = (
+        sa.Index('ix_componente_nome_id', 'nome', 'id'),
+    )
     id: so.Mapped[int] = so.mapped_column(primary_key=True)
-    nome: so.Mapped[str] = so.mapped_column(sa.String(100), index=True)
+    nome: so.Mapped[str] = so.mapped_column(sa.String(100))
     descricao: so.Mapped[str] = so.mapped_column(sa.Text)
     url: so.Mapped[str] = so.mapped_column(sa.String(200))
     quantidade: so.Mapped[int] = so.mapped_column(sa.Integer, default=0)
+    # Contador mantido por app/contadores.py
+    total_projetos: so.Mapped[int] = so.mapped_column(sa.Integer, default=0, server_default='0', index=True)
+    # Incrementada a cada escrita (app/versoes.py); usada nos ETags
+    versao: so.Mapped[int] = so.mapped_column(sa.Integer, default=1, server_default='1')
     
     # Relacionamento muitos-para-muitos com projetos
     projetos: so.Mapped[List[Projeto]] = so.relationship(
@@ -55,4 +68,16 @@ class Componente(db.Model):
     )
 
     def __repr__(self):
-        return f'<Componente {self.nome}>'
\ No newline at end of file
+        return f'<Componente {self.nome}>'
+
+# Versão global do catálogo (linha única), incrementada a cada escrita.
+# Usada nos ETags das listagens e da busca.
+class CatalogoVersao(db.Model):
+    __tablename__ = 'catalogo_versao'
+    id: so.Mapped[int] = so.mapped_column(primary_key=True)
+    versao: so.Mapped[int] = so.mapped_column(sa.Integer, default=1)
+
+sa.event.listen(
+    CatalogoVersao.__table__, 'after_create',
+    sa.DDL('INSERT INTO catalogo_versao (id, versao) VALUES (1, 1)')
+)
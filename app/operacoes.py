@@ -0,0 +1,235 @@
+import sqlalchemy as sa
+
+from app.models import Projeto, Componente, ProjetoComponente
+from app import lote
+
+# Exclusão, edição e mescla em lote de componentes e projetos, em SQL sobre
+# conjuntos de ids: um DELETE/UPDATE ... WHERE id IN (...) por parte, sem
+# carregar objetos do ORM nem as coleções projetos/componentes. Quem chama
+# faz o commit (o lote inteiro numa transação) e invalida o cache com as
+# tags do resumo.
+
+projeto_t = Projeto.__table__
+componente_t = Componente.__table__
+associacao_t = ProjetoComponente.__table__
+
+# Ids por comando, abaixo do limite de parâmetros dos bancos
+TAMANHO_PARTE = 500
+MAXIMO_POR_LOTE = 5000
+
+# Colunas que podem ser alteradas em lote (nome é único no projeto e
+# identifica o componente, por isso fica de fora)
+CAMPOS_EDITAVEIS = {
+    'componente': {'descricao': str, 'url': str, 'quantidade': int},
+    'projeto': {'descricao': str, 'url': str},
+}
+
+
+def _partes(ids):
+    ids = sorted(ids)
+    for inicio in range(0, len(ids), TAMANHO_PARTE):
+        yield ids[inicio:inicio + TAMANHO_PARTE]
+
+
+def _filtro_componentes(filtro):
+    condicoes = []
+    if 'nome' in filtro:
+        condicoes.append(componente_t.c.nome.contains(str(filtro['nome']), autoescape=True))
+    if filtro.get('sem_projetos'):
+        condicoes.append(componente_t.c.total_projetos == 0)
+    if 'quantidade_ate' in filtro:
+        condicoes.append(componente_t.c.quantidade <= int(filtro['quantidade_ate']))
+    return condicoes
+
+
+def _filtro_projetos(filtro):
+    condicoes = []
+    if 'nome' in filtro:
+        condicoes.append(projeto_t.c.nome.contains(str(filtro['nome']), autoescape=True))
+    if filtro.get('sem_componentes'):
+        condicoes.append(projeto_t.c.total_componentes == 0)
+    return condicoes
+
+
+FILTROS = {'componente': (componente_t, _filtro_componentes), 'projeto': (projeto_t, _filtro_projetos)}
+
+
+def selecionar(conexao, tipo, ids=None, filtro=None):
+    """Ids existentes escolhidos por lista ou por filtro; devolve (ids, não encontrados)."""
+    tabela, condicoes_de = FILTROS[tipo]
+    if ids is not None:
+        if not isinstance(ids, list):
+            raise ValueError('"ids" deve ser uma lista de ids.')
+        try:
+            pedidos = {int(id_) for id_ in ids}
+        except (TypeError, ValueError):
+            raise ValueError('"ids" deve ser uma lista de ids.')
+        if len(pedidos) > MAXIMO_POR_LOTE:
+            raise ValueError(f'No máximo {MAXIMO_POR_LOTE} ids por lote.')
+        encontrados = set()
+        for parte in _partes(pedidos):
+            encontrados.update(conexao.scalars(sa.select(tabela.c.id).where(tabela.c.id.in_(parte))))
+        return encontrados, pedidos - encontrados
+
+    if not isinstance(filtro, dict):
+        raise ValueError('Informe "ids" (lista) ou "filtro" (objeto).')
+    try:
+        condicoes = condicoes_de(filtro)
+    except (TypeError, ValueError):
+        raise ValueError('Filtro inválido.')
+    if not condicoes:
+        raise ValueError('Informe "ids" ou um "filtro" com ao menos um critério.')
+    encontrados = set(conexao.scalars(
+        sa.select(tabela.c.id).where(*condicoes).order_by(tabela.c.id).limit(MAXIMO_POR_LOTE + 1)
+    ))
+    if len(encontrados) > MAXIMO_POR_LOTE:
+        raise ValueError(f'O filtro seleciona mais de {MAXIMO_POR_LOTE} registros; restrinja o filtro.')
+    return encontrados, set()
+
+
+def _associados(conexao, coluna, outra_coluna, ids):
+    associados = set()
+    for parte in _partes(ids):
+        associados.update(conexao.scalars(sa.select(outra_coluna).where(coluna.in_(parte)).distinct()))
+    return associados
+
+
+def _resumo(operacao, tipo, ids, nao_encontrados, **campos):
+    return {
+        'operacao': operacao,
+        'tipo': tipo,
+        'ids': sorted(ids),
+        'total': len(ids),
+        'nao_encontrados': sorted(nao_encontrados),
+        **campos,
+    }
+
+
+def excluir_componentes(conexao, ids, nao_encontrados=()):
+    """Exclui os componentes e suas associações; devolve o resumo do lote."""
+    projetos = _associados(conexao, associacao_t.c.componente_id, associacao_t.c.projeto_id, ids)
+    associacoes = 0
+    for parte in _partes(ids):
+        associacoes += conexao.execute(
+            sa.delete(associacao_t).where(associacao_t.c.componente_id.in_(parte))
+        ).rowcount
+        conexao.execute(sa.delete(componente_t).where(componente_t.c.id.in_(parte)))
+    if ids:
+        lote.sincronizar(conexao, remover=ids, projetos=projetos)
+    return _resumo('excluir', 'componente', ids, nao_encontrados,
+                   associacoes_removidas=associacoes, afetados=sorted(projetos))
+
+
+def excluir_projetos(conexao, ids, nao_encontrados=()):
+    """Exclui os projetos e suas associações; devolve o resumo do lote."""
+    componentes = _associados(conexao, associacao_t.c.projeto_id, associacao_t.c.componente_id, ids)
+    associacoes = 0
+    for parte in _partes(ids):
+        associacoes += conexao.execute(
+            sa.delete(associacao_t).where(associacao_t.c.projeto_id.in_(parte))
+        ).rowcount
+        conexao.execute(sa.delete(projeto_t).where(projeto_t.c.id.in_(parte)))
+    if ids:
+        lote.sincronizar(conexao, componentes=componentes)
+    return _resumo('excluir', 'projeto', ids, nao_encontrados,
+                   associacoes_removidas=associacoes, afetados=sorted(componentes))
+
+
+def mesclar_componentes(conexao, manter, ids, nao_encontrados=()):
+    """Mescla os componentes `ids` no componente `manter`; devolve o resumo do lote.
+
+    As associações dos duplicados passam para o mantido (somando a
+    quantidade quando o projeto já usava os dois), o estoque é somado e os
+    duplicados são excluídos.
+    """
+    if not isinstance(manter, int) or isinstance(manter, bool):
+        raise ValueError('"manter" deve ser o id do componente que fica.')
+    if conexao.scalar(sa.select(componente_t.c.id).where(componente_t.c.id == manter)) is None:
+        raise ValueError(f'Componente {manter} não encontrado.')
+    ids = set(ids) - {manter}
+
+    # Quantidade por projeto somada entre os duplicados
+    por_projeto = {}
+    for parte in _partes(ids):
+        for projeto_id, quantidade in conexao.execute(
+            sa.select(associacao_t.c.projeto_id, associacao_t.c.quantidade)
+            .where(associacao_t.c.componente_id.in_(parte))
+        ):
+            por_projeto[projeto_id] = por_projeto.get(projeto_id, 0) + quantidade
+    ja_usam = _associados(conexao, associacao_t.c.componente_id, associacao_t.c.projeto_id, [manter]) \
+        & set(por_projeto)
+
+    if ja_usam:
+        conexao.execute(
+            sa.update(associacao_t)
+            .where(associacao_t.c.projeto_id == sa.bindparam('p_id'),
+                   associacao_t.c.componente_id == manter)
+            .values(quantidade=associacao_t.c.quantidade + sa.bindparam('somar')),
+            [{'p_id': projeto_id, 'somar': por_projeto[projeto_id]} for projeto_id in sorted(ja_usam)]
+        )
+    estoque = 0
+    for parte in _partes(ids):
+        conexao.execute(sa.delete(associacao_t).where(associacao_t.c.componente_id.in_(parte)))
+        estoque += conexao.scalar(
+            sa.select(sa.func.coalesce(sa.func.sum(componente_t.c.quantidade), 0))
+            .where(componente_t.c.id.in_(parte))
+        )
+        conexao.execute(sa.delete(componente_t).where(componente_t.c.id.in_(parte)))
+    movidas = [
+        {'projeto_id': projeto_id, 'componente_id': manter, 'quantidade': quantidade}
+        for projeto_id, quantidade in sorted(por_projeto.items()) if projeto_id not in ja_usam
+    ]
+    if movidas:
+        conexao.execute(sa.insert(associacao_t), movidas)
+    if ids:
+        conexao.execute(
+            sa.update(componente_t).where(componente_t.c.id == manter)
+            .values(quantidade=componente_t.c.quantidade + estoque)
+        )
+        lote.sincronizar(conexao, remover=ids, projetos=por_projeto, componentes=[manter])
+    return _resumo('mesclar', 'componente', ids, nao_encontrados, manter=manter,
+                   associacoes_movidas=len(por_projeto), estoque_somado=estoque, afetados=sorted(por_projeto))
+
+
+def validar_valores(tipo, valores):
+    campos = CAMPOS_EDITAVEIS[tipo]
+    if not isinstance(valores, dict) or not valores:
+        raise ValueError('"valores" deve ser um objeto com os campos a alterar.')
+    invalidos = sorted(set(valores) - set(campos))
+    if invalidos:
+        raise ValueError(f'Campo(s) não editáveis em lote: {", ".join(invalidos)}.')
+    convertidos = {}
+    for campo, valor in valores.items():
+        if campos[campo] is int:
+            if not isinstance(valor, int) or isinstance(valor, bool) or valor < 0:
+                raise ValueError(f'"{campo}" deve ser um inteiro não negativo.')
+        elif not isinstance(valor, str):
+            raise ValueError(f'"{campo}" deve ser um texto.')
+        convertidos[campo] = valor
+    return convertidos
+
+
+def atualizar(conexao, tipo, ids, valores, nao_encontrados=()):
+    """Aplica os mesmos valores a todos os ids (UPDATE ... WHERE id IN); devolve o resumo."""
+    valores = validar_valores(tipo, valores)
+    tabela = componente_t if tipo == 'componente' else projeto_t
+    for parte in _partes(ids):
+        conexao.execute(
+            sa.update(tabela).where(tabela.c.id.in_(parte)).values(**valores, versao=tabela.c.versao + 1)
+        )
+    if ids:
+        # A descrição do componente entra no índice de busca
+        indexar = ids if tipo == 'componente' and 'descricao' in valores else ()
+        lote.sincronizar(conexao, indexar=indexar)
+    return _resumo('atualizar', tipo, ids, nao_encontrados, campos=sorted(valores))
+
+
+def tags(resumo):
+    """Tags do cache afetadas pelo lote."""
+    outro = 'projeto' if resumo['tipo'] == 'componente' else 'componente'
+    return [
+        f"{resumo['tipo']}s",
+        *(f"{resumo['tipo']}:{id_}" for id_ in resumo['ids']),
+        *([f"{resumo['tipo']}:{resumo['manter']}", 'busca'] if 'manter' in resumo else ()),
+        *(f'{outro}:{id_}' for id_ in resumo.get('afetados', ())),
+    ]
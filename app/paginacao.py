@@ -0,0 +1,93 @@
+import base64
+import json
+
+import sqlalchemy as sa
+from flask import current_app
+
+from app.models import db
+
+# Paginação por cursor (keyset): em vez de OFFSET, cada página continua a
+# partir da chave de ordenação do último item exibido, então o custo de uma
+# página não depende de quão longe ela está do início.
+
+
+class Pagina:
+    def __init__(self, itens, proximo=None, anterior=None):
+        self.itens = itens
+        self.proximo = proximo
+        self.anterior = anterior
+
+
+def limitar(limite=None):
+    # Aplica o padrão e o teto de itens por página definidos na configuração
+    padrao = current_app.config['ITENS_POR_PAGINA']
+    maximo = current_app.config['MAXIMO_POR_PAGINA']
+    try:
+        limite = int(limite) if limite is not None else padrao
+    except (TypeError, ValueError):
+        limite = padrao
+    return max(1, min(limite, maximo))
+
+
+def codificar_cursor(direcao, valores):
+    dados = json.dumps({'d': direcao, 'v': list(valores)}, separators=(',', ':'))
+    return base64.urlsafe_b64encode(dados.encode()).decode().rstrip('=')
+
+
+def decodificar_cursor(cursor):
+    # Cursor inválido ou ausente volta para a primeira página
+    if not cursor:
+        return '>', None
+    try:
+        dados = json.loads(base64.urlsafe_b64decode(cursor + '=' * (-len(cursor) % 4)))
+        direcao, valores = dados['d'], dados['v']
+    except (ValueError, KeyError, TypeError):
+        return '>', None
+    if direcao not in ('>', '<') or not isinstance(valores, list):
+        return '>', None
+    return direcao, valores
+
+
+def paginar(consulta, ordem, chave, cursor=None, limite=None):
+    """Executa `consulta` paginada pelas colunas de `ordem` (crescente).
+
+    `chave(item)` devolve os valores das colunas de `ordem` para um item;
+    a última coluna deve tornar a ordenação única (normalmente o id).
+    """
+    limite = limitar(limite)
+    direcao, valores = decodificar_cursor(cursor)
+    if valores is not None and len(valores) != len(ordem):
+        direcao, valores = '>', None
+
+    if valores is not None:
+        if direcao == '>':
+            consulta = consulta.where(sa.tuple_(*ordem) > sa.tuple_(*valores))
+        else:
+            consulta = consulta.where(sa.tuple_(*ordem) < sa.tuple_(*valores))
+
+    if direcao == '>':
+        consulta = consulta.order_by(*ordem)
+    else:
+        consulta = consulta.order_by(*[coluna.desc() for coluna in ordem])
+
+    consulta = consulta.limit(limite + 1)
+    if len(consulta.column_descriptions) == 1:
+        itens = db.session.scalars(consulta).all()
+    else:
+        itens = db.session.execute(consulta).all()
+
+    tem_mais = len(itens) > limite
+    itens = itens[:limite]
+    if direcao == '<':
+        itens.reverse()
+
+    if not itens:
+        return Pagina(itens)
+
+    if direcao == '>':
+        proximo = codificar_cursor('>', chave(itens[-1])) if tem_mais else None
+        anterior = codificar_cursor('<', chave(itens[0])) if valores is not None else None
+    else:
+        proximo = codificar_cursor('>', chave(itens[-1]))
+        anterior = codificar_cursor('<', chave(itens[0])) if tem_mais else None
+    return Pagina(itens, proximo, anterior)
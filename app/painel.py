@@ -0,0 +1,88 @@
+import sqlalchemy as sa
+
+from app.models import db, Projeto, Componente, ProjetoComponente
+
+# Números e listas da página inicial em duas consultas: uma linha com os
+# totais (subconsultas escalares) e um UNION ALL com as listas curtas.
+# As listas de "mais usados" e "maiores projetos" leem os contadores
+# mantidos por app/contadores.py, sem agrupar projeto_componente.
+
+TAMANHO_LISTAS = 5
+PROJETOS_POR_COMPONENTE = 2
+
+
+def totais():
+    linha = db.session.execute(sa.select(
+        sa.select(sa.func.count()).select_from(Projeto).scalar_subquery().label('projetos'),
+        sa.select(sa.func.count()).select_from(Componente).scalar_subquery().label('componentes'),
+        sa.select(sa.func.coalesce(sa.func.sum(Componente.quantidade), 0)).scalar_subquery().label('estoque'),
+        sa.select(sa.func.count()).select_from(Componente).where(Componente.quantidade == 0)
+        .scalar_subquery().label('sem_estoque'),
+        sa.select(sa.func.count()).select_from(ProjetoComponente).scalar_subquery().label('associacoes'),
+    )).one()
+    return dict(linha._mapping)
+
+
+def _listas(tamanho):
+    ultimos = sa.select(Componente.id).order_by(Componente.id.desc()).limit(tamanho).scalar_subquery()
+
+    # Primeiros projetos (por id) de cada um dos últimos componentes
+    uso = sa.select(
+        ProjetoComponente.componente_id,
+        Projeto.id,
+        Projeto.nome,
+        sa.func.row_number().over(
+            partition_by=ProjetoComponente.componente_id, order_by=Projeto.id
+        ).label('posicao'),
+    ).join(Projeto, Projeto.id == ProjetoComponente.projeto_id) \
+        .where(ProjetoComponente.componente_id.in_(ultimos)).subquery()
+
+    partes = [
+        sa.select(sa.literal('ultimos').label('lista'), Componente.id, Componente.nome,
+                  Componente.quantidade.label('valor'), Componente.total_projetos.label('total'),
+                  sa.func.substr(Componente.descricao, 1, 101).label('texto'))
+        .order_by(Componente.id.desc()).limit(tamanho),
+        sa.select(sa.literal('mais_usados'), Componente.id, Componente.nome,
+                  Componente.total_projetos, Componente.quantidade, sa.null())
+        .where(Componente.total_projetos > 0)
+        .order_by(Componente.total_projetos.desc(), Componente.id.desc()).limit(tamanho),
+        sa.select(sa.literal('maiores_projetos'), Projeto.id, Projeto.nome,
+                  Projeto.total_componentes, sa.null(), sa.null())
+        .where(Projeto.total_componentes > 0)
+        .order_by(Projeto.total_componentes.desc(), Projeto.id.desc()).limit(tamanho),
+        sa.select(sa.literal('uso'), uso.c.componente_id, uso.c.nome, uso.c.id, sa.null(), sa.null())
+        .where(uso.c.posicao <= PROJETOS_POR_COMPONENTE),
+    ]
+    # O SQLite não aceita ORDER BY/LIMIT direto nas partes de um UNION
+    return sa.union_all(*[sa.select(parte.subquery()) for parte in partes])
+
+
+def listas(tamanho=TAMANHO_LISTAS):
+    resultado = {'ultimos': [], 'mais_usados': [], 'maiores_projetos': []}
+    uso = {}
+    for linha in db.session.execute(_listas(tamanho)):
+        if linha.lista == 'uso':
+            uso.setdefault(linha.id, []).append({'id': linha.valor, 'nome': linha.nome})
+        elif linha.lista == 'ultimos':
+            resultado['ultimos'].append({
+                'id': linha.id, 'nome': linha.nome, 'quantidade': linha.valor,
+                'total_projetos': linha.total, 'descricao': linha.texto,
+            })
+        elif linha.lista == 'mais_usados':
+            resultado['mais_usados'].append({
+                'id': linha.id, 'nome': linha.nome, 'total_projetos': linha.valor, 'quantidade': linha.total,
+            })
+        else:
+            resultado['maiores_projetos'].append({'id': linha.id, 'nome': linha.nome, 'total_componentes': linha.valor})
+
+    # UNION ALL não garante a ordem entre as partes nem dentro delas
+    resultado['ultimos'].sort(key=lambda item: item['id'], reverse=True)
+    resultado['mais_usados'].sort(key=lambda item: (item['total_projetos'], item['id']), reverse=True)
+    resultado['maiores_projetos'].sort(key=lambda item: (item['total_componentes'], item['id']), reverse=True)
+    for componente in resultado['ultimos']:
+        componente['projetos'] = sorted(uso.get(componente['id'], []), key=lambda item: item['id'])
+    return resultado
+
+
+def resumo(tamanho=TAMANHO_LISTAS):
+    return {'totais': totais(), **listas(tamanho)}
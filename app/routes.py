@@ -1,15 +1,20 @@
-from flask import render_template, flash, redirect, url_for, Blueprint, request, jsonify
+from flask import render_template, flash, redirect, url_for, Blueprint, request, jsonify, current_app
+import io
+import math
 
-# Importar db do módulo raiz
-try:
-    from __init__ import db
-except ImportError:
-    # Para quando executado dentro do contexto da aplicação
-    from flask_sqlalchemy import SQLAlchemy
-    db = SQLAlchemy()
-
-from app.models import Projeto, Componente
+from app.extensoes import db
+from app.models import Projeto, Componente, ProjetoComponente
+from app import busca, consultas, estoque, fluxo, operacoes, painel, similaridade
+from app.banco import primario, roteamento
+from app.paginacao import paginar, limitar
+from app.cache import cache, tags_de
+from app.versoes import condicional, etag_catalogo, etag_projeto, etag_componente
+from app.importacao import importar, exportar, formato_do_arquivo, LEITORES, FORMATOS_EXPORTACAO
+from app.associacoes import aplicar_delta, definir_componentes
+from app.sugestoes import sugestoes, Cancelada
+from app.tarefas import fila
 import sqlalchemy as sa   
+import sqlalchemy.orm as so
 from app.forms import ProjetoForm, ComponenteForm, ComponenteEditForm
 
 # Criar blueprint
@@ -17,6 +22,8 @@ bp = Blueprint('main', __name__)
 
 # API de Pesquisa
 @bp.route('/api/search')
+@condicional(etag_catalogo)
+@cache.pagina('busca')
 def api_search():
     query = request.args.get('q', '').strip()
     
@@ -24,58 +31,193 @@ def api_search():
         return jsonify({'componentes': []})
     
     try:
-        # Buscar componentes que contenham o termo no nome ou descrição
-        componentes_query = sa.select(Componente).where(
-            sa.or_(
-                Componente.nome.ilike(f'%{query}%'),
-                Componente.descricao.ilike(f'%{query}%')
-            )
-        ).order_by(Componente.nome)
-        
-        componentes = db.session.scalars(componentes_query).all()
-        
-        resultado = []
-        for componente in componentes:
-            # Para cada componente, buscar os projetos relacionados
-            projetos_data = []
-            for projeto in componente.projetos:
-                projetos_data.append({
-                    'id': projeto.id,
-                    'nome': projeto.nome,
-                    'descricao': projeto.descricao,
-                    'url': projeto.url,
-                    'total_componentes': len(projeto.componentes)
-                })
-            
-            resultado.append({
-                'id': componente.id,
-                'nome': componente.nome,
-                'descricao': componente.descricao,
-                'url': componente.url,
-                'quantidade': componente.quantidade,
-                'projetos': projetos_data
-            })
+        # Buscar no índice de busca (prefixo, sem acentos), ordenando por relevância
+        ranking = busca.consulta_ranqueada(db.session.connection(), query)
+        if ranking is None:
+            return jsonify({'componentes': []})
+
+        # ?formato=stream (mesmo JSON, gerado aos poucos) ou ndjson: todos os
+        # resultados (ou até ?limite=) sem paginação e sem montar a lista
+        formato = request.args.get('formato')
+        if formato in ('stream', 'ndjson'):
+            limite = request.args.get('limite', type=int)
+            resultados = busca.resultados_em_fluxo(ranking, limite if limite and limite > 0 else None)
+            if formato == 'ndjson':
+                return fluxo.resposta(fluxo.ndjson(resultados), 'application/x-ndjson')
+            return fluxo.resposta(fluxo.objeto_json('componentes', resultados, proximo=None))
+
+        # Os projetos vêm em uma única consulta extra (selectinload)
+        componentes_query = sa.select(Componente, ranking.c.relevancia).join(
+            ranking, ranking.c.componente_id == Componente.id
+        ).options(
+            so.selectinload(Componente.projetos)
+        )
+
+        pagina = paginar(
+            componentes_query,
+            [ranking.c.relevancia, Componente.id],
+            lambda linha: (linha.relevancia, linha.Componente.id),
+            cursor=request.args.get('cursor'),
+            limite=request.args.get('limite')
+        )
+        componentes = [linha.Componente for linha in pagina.itens]
+        cache.marcar(*tags_de('componente', [c.id for c in componentes]))
+        cache.marcar(*tags_de('projeto', {p.id for c in componentes for p in c.projetos}))
         
-        return jsonify({'componentes': resultado})
+        resultado = [dados_do_componente(componente) for componente in componentes]
+        return jsonify({'componentes': resultado, 'proximo': pagina.proximo})
         
     except Exception as e:
         return jsonify({'error': str(e), 'componentes': []}), 500
 
+def dados_do_componente(componente):
+    # Componente com seus projetos, no formato usado pelos resultados de busca
+    return {
+        'id': componente.id,
+        'nome': componente.nome,
+        'descricao': componente.descricao,
+        'url': componente.url,
+        'quantidade': componente.quantidade,
+        'projetos': [
+            {
+                'id': projeto.id,
+                'nome': projeto.nome,
+                'descricao': projeto.descricao,
+                'url': projeto.url,
+                'total_componentes': projeto.total_componentes
+            }
+            for projeto in componente.projetos
+        ]
+    }
+
+# Busca leve da caixa de pesquisa: ids e nomes, com voo único, reaproveitamento
+# de prefixo e cancelamento das buscas superadas (parâmetros cliente e seq)
+@bp.route('/api/search/sugestoes')
+def api_search_sugestoes():
+    texto = request.args.get('q', '').strip()
+    cliente = request.args.get('cliente', '')[:64]
+    seq = request.args.get('seq', 0, type=int)
+    inicio = max(request.args.get('inicio', 0, type=int), 0)
+    limite = limitar(request.args.get('limite'))
+
+    if len(texto) < 2:
+        return jsonify({'seq': seq, 'componentes': [], 'proximo': None})
+    if not sugestoes.registrar(cliente, seq):
+        sugestoes.cancelada()
+        return '', 204
+
+    try:
+        conjunto = sugestoes.buscar(texto, cliente, seq)
+    except Cancelada:
+        sugestoes.cancelada()
+        return '', 204
+
+    itens = conjunto.itens if conjunto is not None else []
+    fim = inicio + limite
+    return jsonify({
+        'seq': seq,
+        'componentes': [{'id': id_, 'nome': nome} for id_, nome, _, _ in itens[inicio:fim]],
+        'proximo': fim if fim < len(itens) else None,
+        # Falso quando há mais resultados do que os guardados; refinar a busca mostra o resto
+        'completo': conjunto is None or conjunto.completo,
+    })
+
+# Detalhes dos componentes exibidos pela busca leve (?ids=1,2,3), na ordem pedida
+@bp.route('/api/componentes/detalhes')
+@condicional(etag_catalogo)
+@cache.pagina('busca')
+def api_componentes_detalhes():
+    ids = []
+    for parte in request.args.get('ids', '').split(','):
+        if parte.strip().isdigit() and int(parte) not in ids:
+            ids.append(int(parte))
+    ids = ids[:limitar(len(ids) or None)]
+
+    componentes = {
+        componente.id: componente
+        for componente in db.session.scalars(
+            sa.select(Componente).where(Componente.id.in_(ids)).options(so.selectinload(Componente.projetos))
+        )
+    }
+    cache.marcar(*tags_de('componente', componentes))
+    cache.marcar(*tags_de('projeto', {p.id for c in componentes.values() for p in c.projetos}))
+    return jsonify({'componentes': [dados_do_componente(componentes[id_]) for id_ in ids if id_ in componentes]})
+
+# Opções do seletor de componentes do projeto_form (id, nome e quantidade)
+@bp.route('/api/componentes/opcoes')
+def api_componentes_opcoes():
+    texto = request.args.get('q', '').strip()
+    consulta = sa.select(Componente.id, Componente.nome, Componente.quantidade)
+
+    if texto:
+        ranking = busca.consulta_ranqueada(db.session.connection(), texto)
+        if ranking is None:
+            return jsonify({'componentes': [], 'proximo': None})
+        consulta = consulta.add_columns(ranking.c.relevancia).join(
+            ranking, ranking.c.componente_id == Componente.id
+        )
+        ordem = [ranking.c.relevancia, Componente.id]
+        chave = lambda linha: (linha.relevancia, linha.id)
+    else:
+        ordem = [Componente.nome, Componente.id]
+        chave = lambda linha: (linha.nome, linha.id)
+
+    pagina = paginar(
+        consulta, ordem, chave,
+        cursor=request.args.get('cursor'),
+        limite=request.args.get('limite')
+    )
+    return jsonify({
+        'componentes': [
+            {'id': linha.id, 'nome': linha.nome, 'quantidade': linha.quantidade}
+            for linha in pagina.itens
+        ],
+        'proximo': pagina.proximo
+    })
+
+# "Você quis dizer": componentes com nome parecido (?nome=...&descricao=...&ignorar=<id>)
+@bp.route('/api/componentes/semelhantes')
+def api_componentes_semelhantes():
+    nome = request.args.get('nome', '').strip()
+    if not nome:
+        return jsonify({'error': 'Informe o parâmetro "nome".'}), 400
+    try:
+        limiar = float(request.args.get('limiar', current_app.config['SIMILARIDADE_LIMIAR']))
+    except ValueError:
+        limiar = math.nan
+    # float() também aceita "nan" e "inf"
+    if not math.isfinite(limiar):
+        return jsonify({'error': '"limiar" deve ser um número entre 0 e 1.'}), 400
+    encontrados = similaridade.semelhantes(
+        db.session.connection(), nome, request.args.get('descricao', ''),
+        limiar=min(max(limiar, 0.0), 1.0), ignorar=request.args.get('ignorar', type=int)
+    )
+    return jsonify({'semelhantes': [item._asdict() for item in encontrados]})
+
+def opcoes_selecionadas(ids):
+    # Dados para exibir os componentes já escolhidos no formulário
+    if not ids:
+        return []
+    return db.session.execute(
+        sa.select(Componente.id, Componente.nome, Componente.quantidade)
+        .where(Componente.id.in_(ids))
+        .order_by(Componente.nome)
+    ).all()
+
 # Rotas para Projeto
 @bp.route('/projetos')
+@condicional(etag_catalogo)
+@cache.pagina('projetos')
 def lista_projetos():
-    query = sa.select(Projeto)
-    projetos = db.session.scalars(query).all()
-    return render_template('lista_projetos.html', title='Projetos', projetos=projetos)
+    pagina = consultas.pagina_de_projetos(request.args.get('cursor'))
+    cache.marcar(*tags_de('projeto', [p.id for p in pagina.itens]))
+    cache.marcar(*tags_de('componente', {c.id for p in pagina.itens for c in p.componentes}))
+    return render_template('lista_projetos.html', title='Projetos', projetos=pagina.itens, pagina=pagina)
 
 @bp.route('/projeto/novo', methods=['GET', 'POST'])
 def novo_projeto():
     form = ProjetoForm()
     
-    # Preencher as opções dos componentes disponíveis
-    componentes = Componente.query.order_by('nome').all()
-    form.componentes.choices = [(c.id, c.nome) for c in componentes]
-    
     if form.validate_on_submit():
         try:
             projeto = Projeto(
@@ -91,6 +233,7 @@ def novo_projeto():
             
             db.session.add(projeto)
             db.session.commit()
+            cache.invalidar('projetos', *tags_de('componente', form.componentes.data or []))
             flash('Projeto criado com sucesso!', 'success')
             return redirect(url_for('main.lista_projetos'))
             
@@ -98,7 +241,8 @@ def novo_projeto():
             db.session.rollback()
             flash(f'Erro ao criar projeto: {str(e)}', 'error')
     
-    return render_template('projeto_form.html', title='Novo Projeto', form=form, componentes=componentes)
+    return render_template('projeto_form.html', title='Novo Projeto', form=form,
+                           selecionados=opcoes_selecionadas(form.componentes.data))
 
 @bp.route('/projeto/editar/<int:id>', methods=['GET', 'POST'])
 def editar_projeto(id):
@@ -107,11 +251,15 @@ def editar_projeto(id):
         flash('Projeto não encontrado.', 'error')
         return redirect(url_for('main.lista_projetos'))
 
-    form = ProjetoForm(obj=projeto)
-    
-    # Preencher as opções dos componentes disponíveis
-    componentes = Componente.query.order_by('nome').all()
-    form.componentes.choices = [(c.id, c.nome) for c in componentes]
+    # Pre-selecionar os componentes atuais (apenas os ids, sem carregar a coleção)
+    form = ProjetoForm(data={
+        'nome': projeto.nome,
+        'descricao': projeto.descricao,
+        'url': projeto.url,
+        'componentes': db.session.scalars(
+            sa.select(ProjetoComponente.componente_id).where(ProjetoComponente.projeto_id == id)
+        ).all()
+    })
     
     if form.validate_on_submit():
         try:
@@ -119,14 +267,14 @@ def editar_projeto(id):
             projeto.descricao = form.descricao.data
             projeto.url = form.url.data
             
-            # Atualizar componentes
-            if form.componentes.data:
-                componentes_selecionados = Componente.query.filter(Componente.id.in_(form.componentes.data)).all()
-                projeto.componentes = componentes_selecionados
-            else:
-                projeto.componentes = []
+            # Atualizar componentes pela diferença com os ids atuais
+            adicionados, removidos = definir_componentes(
+                db.session.connection(), id, form.componentes.data or []
+            )
+            afetados = adicionados | removidos
             
             db.session.commit()
+            cache.invalidar(f'projeto:{id}', *tags_de('componente', afetados))
             flash('Projeto atualizado com sucesso!', 'success')
             return redirect(url_for('main.lista_projetos'))
             
@@ -134,18 +282,57 @@ def editar_projeto(id):
             db.session.rollback()
             flash(f'Erro ao atualizar projeto: {str(e)}', 'error')
 
-    # Pre-selecionar os componentes atuais
-    form.componentes.data = [c.id for c in projeto.componentes]
+    return render_template('projeto_form.html', title='Editar Projeto', form=form, projeto=projeto,
+                           selecionados=opcoes_selecionadas(form.componentes.data))
 
-    return render_template('projeto_form.html', title='Editar Projeto', form=form, projeto=projeto, componentes=componentes)
+# Adiciona/remove componentes de um projeto: {"adicionar": [ids], "remover": [ids]},
+# e opcionalmente a quantidade usada de cada um: {"quantidades": {"id": n}}
+@bp.route('/api/projeto/<int:id>/componentes', methods=['PATCH'])
+def api_projeto_componentes(id):
+    if db.session.get(Projeto, id) is None:
+        return jsonify({'error': 'Projeto não encontrado.'}), 404
+
+    dados = request.get_json(silent=True) or {}
+    try:
+        adicionar = {int(c) for c in dados.get('adicionar', [])}
+        remover = {int(c) for c in dados.get('remover', [])}
+        quantidades = {int(c): n for c, n in dados.get('quantidades', {}).items()}
+    except (AttributeError, TypeError, ValueError):
+        return jsonify({'error': '"adicionar" e "remover" devem ser listas de ids e "quantidades" um objeto.'}), 400
+
+    existentes = set(db.session.scalars(sa.select(Componente.id).where(Componente.id.in_(adicionar))))
+    if adicionar - existentes:
+        return jsonify({
+            'error': 'Componente(s) inexistente(s).',
+            'ids': sorted(adicionar - existentes)
+        }), 400
+
+    try:
+        adicionados, removidos = aplicar_delta(db.session.connection(), id, adicionar, remover)
+        estoque.definir_necessarias(db.session.connection(), id, quantidades)
+        db.session.commit()
+    except ValueError as e:
+        db.session.rollback()
+        return jsonify({'error': str(e)}), 400
+    except Exception as e:
+        db.session.rollback()
+        return jsonify({'error': str(e)}), 500
+
+    cache.invalidar(f'projeto:{id}', *tags_de('componente', adicionados | removidos))
+    return jsonify({
+        'adicionados': sorted(adicionados),
+        'removidos': sorted(removidos),
+        'total_componentes': db.session.scalar(sa.select(Projeto.total_componentes).where(Projeto.id == id))
+    })
 
 @bp.route('/projeto/excluir/<int:id>')
+@primario
 def excluir_projeto(id):
-    projeto = db.session.get(Projeto, id)
-    if projeto:
+    if db.session.get(Projeto, id):
         try:
-            db.session.delete(projeto)
+            resumo = operacoes.excluir_projetos(db.session.connection(), {id})
             db.session.commit()
+            cache.invalidar(*operacoes.tags(resumo))
             flash('Projeto excluído com sucesso!', 'success')
             
         except Exception as e:
@@ -157,20 +344,26 @@ def excluir_projeto(id):
     return redirect(url_for('main.lista_projetos'))
 
 @bp.route('/projeto/detalhes/<int:id>')
+@condicional(etag_projeto)
+@cache.pagina()
 def detalhes_projeto(id):
-    projeto = db.session.get(Projeto, id)
+    projeto = consultas.detalhes_do_projeto(id)
     if not projeto:
         flash('Projeto não encontrado.', 'error')
         return redirect(url_for('main.lista_projetos'))
     
+    cache.marcar(f'projeto:{id}', *tags_de('componente', [c.id for c in projeto.componentes]))
     return render_template('detalhes_projeto.html', title=projeto.nome, projeto=projeto)
 
 # Rotas para Componente
 @bp.route('/componentes')
+@condicional(etag_catalogo)
+@cache.pagina('componentes')
 def lista_componentes():
-    query = sa.select(Componente)
-    componentes = db.session.scalars(query).all()
-    return render_template('lista_componentes.html', title='Componentes', componentes=componentes)
+    pagina = consultas.pagina_de_componentes(request.args.get('cursor'))
+    cache.marcar(*tags_de('componente', [c.id for c in pagina.itens]))
+    cache.marcar(*tags_de('projeto', {p.id for c in pagina.itens for p in c.projetos}))
+    return render_template('lista_componentes.html', title='Componentes', componentes=pagina.itens, pagina=pagina)
 
 @bp.route('/componente/novo', methods=['GET', 'POST'])
 def novo_componente():
@@ -187,6 +380,7 @@ def novo_componente():
             
             db.session.add(componente)
             db.session.commit()
+            cache.invalidar('componentes', 'busca')
             
             flash('Componente criado com sucesso!', 'success')
             return redirect(url_for('main.lista_componentes'))
@@ -212,8 +406,17 @@ def editar_componente(id):
             componente.descricao = form.descricao.data
             componente.url = form.url.data
             componente.quantidade = form.quantidade.data
+
+            # Mudar nome/descrição altera a ordem das listas e os resultados de busca
+            estado = sa.inspect(componente)
+            tags = [f'componente:{id}']
+            if estado.attrs.nome.history.has_changes():
+                tags += ['componentes', 'busca']
+            elif estado.attrs.descricao.history.has_changes():
+                tags.append('busca')
             
             db.session.commit()
+            cache.invalidar(*tags)
             flash('Componente atualizado com sucesso!', 'success')
             return redirect(url_for('main.lista_componentes'))
             
@@ -224,39 +427,209 @@ def editar_componente(id):
     return render_template('componente_form.html', title='Editar Componente', form=form, componente=componente)
 
 @bp.route('/componente/excluir/<int:id>')
+@primario
 def excluir_componente(id):
-    componente = db.session.get(Componente, id)
-    if componente:
-        db.session.delete(componente)
+    if db.session.get(Componente, id):
+        resumo = operacoes.excluir_componentes(db.session.connection(), {id})
         db.session.commit()
+        cache.invalidar(*operacoes.tags(resumo))
         flash('Componente excluído com sucesso!', 'success')
     else:
         flash('Componente não encontrado.', 'error')
     return redirect(url_for('main.lista_componentes'))
 
 @bp.route('/componente/detalhes/<int:id>')
+@condicional(etag_componente)
+@cache.pagina()
 def detalhes_componente(id):
-    componente = db.session.get(Componente, id)
+    componente = consultas.detalhes_do_componente(id)
     if not componente:
         flash('Componente não encontrado.', 'error')
         return redirect(url_for('main.lista_componentes'))
     
+    cache.marcar(f'componente:{id}', *tags_de('projeto', [p.id for p in componente.projetos]))
     return render_template('detalhes_componente.html', title=componente.nome, componente=componente)
 
 # Rota principal (home)
+# Sem cache de resposta: as listas do painel mudam com escritas que não
+# invalidam 'projetos'/'componentes'; o ETag do catálogo cobre as revisitas
 @bp.route('/')
 @bp.route('/index')
+@condicional(etag_catalogo)
 def index():
-    # Mostrar estatísticas ou últimos componentes adicionados
-    total_projetos = db.session.scalar(sa.select(sa.func.count(Projeto.id)))
-    total_componentes = db.session.scalar(sa.select(sa.func.count(Componente.id)))
-    
-    ultimos_componentes = db.session.scalars(
-        sa.select(Componente).order_by(Componente.id.desc()).limit(5)
-    ).all()
-    
-    return render_template('index.html', 
-                         title='Home',
-                         total_projetos=total_projetos,
-                         total_componentes=total_componentes,
-                         ultimos_componentes=ultimos_componentes)
\ No newline at end of file
+    return render_template('index.html', title='Home', **painel.resumo())
+
+# Estatísticas da página inicial para widgets que consultam periodicamente
+@bp.route('/api/painel')
+@condicional(etag_catalogo)
+def api_painel():
+    return jsonify(painel.resumo())
+
+# Reserva e devolução de estoque de um componente: {"quantidade": n}
+def movimentar_estoque(id, operacao):
+    dados = request.get_json(silent=True) or {}
+    if not isinstance(dados, dict):
+        return jsonify({'error': 'Envie um objeto JSON com "quantidade".'}), 400
+    try:
+        quantidade = operacao(db.session.connection(), id, dados.get('quantidade', 1))
+        db.session.commit()
+    except LookupError as e:
+        db.session.rollback()
+        return jsonify({'error': str(e)}), 404
+    except ValueError as e:
+        db.session.rollback()
+        return jsonify({'error': str(e)}), 400
+    except estoque.EstoqueInsuficiente as e:
+        db.session.rollback()
+        return jsonify({'error': str(e), 'faltas': e.faltas}), 409
+
+    cache.invalidar(f'componente:{id}')
+    return jsonify({'id': id, 'quantidade': quantidade})
+
+@bp.route('/api/componente/<int:id>/reservar', methods=['POST'])
+def api_reservar_componente(id):
+    return movimentar_estoque(id, estoque.reservar)
+
+@bp.route('/api/componente/<int:id>/devolver', methods=['POST'])
+def api_devolver_componente(id):
+    return movimentar_estoque(id, estoque.devolver)
+
+# Reserva todos os componentes do projeto (tudo ou nada): {"vezes": n}
+@bp.route('/api/projeto/<int:id>/reservar', methods=['POST'])
+def api_reservar_projeto(id):
+    if db.session.get(Projeto, id) is None:
+        return jsonify({'error': 'Projeto não encontrado.'}), 404
+
+    dados = request.get_json(silent=True) or {}
+    if not isinstance(dados, dict):
+        return jsonify({'error': 'Envie um objeto JSON com "vezes".'}), 400
+    try:
+        restantes = estoque.reservar_projeto(db.session.connection(), id, dados.get('vezes', 1))
+        db.session.commit()
+    except ValueError as e:
+        db.session.rollback()
+        return jsonify({'error': str(e)}), 400
+    except estoque.EstoqueInsuficiente as e:
+        db.session.rollback()
+        return jsonify({'error': str(e), 'faltas': e.faltas}), 409
+
+    cache.invalidar(*tags_de('componente', restantes))
+    return jsonify({'componentes': [
+        {'id': componente_id, 'quantidade': quantidade} for componente_id, quantidade in sorted(restantes.items())
+    ]})
+
+# Projetos que podem ser montados com o estoque atual
+@bp.route('/api/projetos/montaveis')
+@condicional(etag_catalogo)
+def api_projetos_montaveis():
+    pagina = paginar(
+        estoque.consulta_montaveis(),
+        [Projeto.id],
+        lambda linha: (linha.id,),
+        cursor=request.args.get('cursor'),
+        limite=request.args.get('limite')
+    )
+    return jsonify({'projetos': [linha._asdict() for linha in pagina.itens], 'proximo': pagina.proximo})
+
+# Exclusão e edição em lote: {"ids": [...]} ou {"filtro": {...}}, numa única
+# transação; com "simular": true devolve o resumo sem gravar
+def operacao_em_lote(tipo, executar):
+    dados = request.get_json(silent=True)
+    if not isinstance(dados, dict):
+        return jsonify({'error': 'Envie um objeto JSON com "ids" ou "filtro".'}), 400
+
+    conexao = db.session.connection()
+    try:
+        ids, nao_encontrados = operacoes.selecionar(conexao, tipo, dados.get('ids'), dados.get('filtro'))
+        resumo = executar(conexao, ids, nao_encontrados, dados)
+    except ValueError as e:
+        db.session.rollback()
+        return jsonify({'error': str(e)}), 400
+    except Exception as e:
+        db.session.rollback()
+        return jsonify({'error': str(e)}), 500
+
+    if dados.get('simular'):
+        db.session.rollback()
+        return jsonify({**resumo, 'simulado': True})
+    db.session.commit()
+    cache.invalidar(*operacoes.tags(resumo))
+    return jsonify({**resumo, 'simulado': False})
+
+@bp.route('/api/componentes/excluir', methods=['POST'])
+def api_excluir_componentes():
+    return operacao_em_lote('componente', lambda conexao, ids, nao_encontrados, dados:
+                            operacoes.excluir_componentes(conexao, ids, nao_encontrados))
+
+@bp.route('/api/componentes/atualizar', methods=['POST'])
+def api_atualizar_componentes():
+    return operacao_em_lote('componente', lambda conexao, ids, nao_encontrados, dados:
+                            operacoes.atualizar(conexao, 'componente', ids, dados.get('valores'), nao_encontrados))
+
+# Mescla de duplicados: {"manter": id, "ids": [...]} move as associações e o
+# estoque dos ids para o componente mantido e exclui os ids
+@bp.route('/api/componentes/mesclar', methods=['POST'])
+def api_mesclar_componentes():
+    return operacao_em_lote('componente', lambda conexao, ids, nao_encontrados, dados:
+                            operacoes.mesclar_componentes(conexao, dados.get('manter'), ids, nao_encontrados))
+
+@bp.route('/api/projetos/excluir', methods=['POST'])
+def api_excluir_projetos():
+    return operacao_em_lote('projeto', lambda conexao, ids, nao_encontrados, dados:
+                            operacoes.excluir_projetos(conexao, ids, nao_encontrados))
+
+@bp.route('/api/projetos/atualizar', methods=['POST'])
+def api_atualizar_projetos():
+    return operacao_em_lote('projeto', lambda conexao, ids, nao_encontrados, dados:
+                            operacoes.atualizar(conexao, 'projeto', ids, dados.get('valores'), nao_encontrados))
+
+# Estatísticas do cache de páginas
+@bp.route('/api/cache')
+def api_cache():
+    return jsonify({**cache.estatisticas(), 'sugestoes': sugestoes.estatisticas()})
+
+# Profundidade da fila de tarefas, atraso e contagens por tipo
+@bp.route('/api/tarefas')
+def api_tarefas():
+    return jsonify(fila.estatisticas())
+
+# Pools de conexão dos engines principal e de leitura e requisições por engine
+@bp.route('/api/banco')
+def api_banco():
+    return jsonify(roteamento.estatisticas())
+
+# Importação em lote (CSV ou JSON Lines), via upload "arquivo" ou corpo da requisição
+@bp.route('/api/importar', methods=['POST'])
+def api_importar():
+    arquivo = request.files.get('arquivo')
+    if arquivo:
+        formato = request.args.get('formato') or formato_do_arquivo(arquivo.filename or '')
+        entrada = arquivo.stream
+    else:
+        formato = request.args.get('formato', 'jsonl')
+        entrada = io.BufferedReader(request.stream)
+
+    if formato not in LEITORES:
+        return jsonify({'error': 'Formato inválido. Use "jsonl" ou "csv".'}), 400
+
+    resumo = importar(io.TextIOWrapper(entrada, encoding='utf-8', errors='surrogateescape', newline=''), formato)
+    if resumo.erro_de_arquivo is not None:
+        # Os lotes lidos antes do erro já foram gravados e aparecem no resumo
+        erro = resumo.erro_de_arquivo
+        return jsonify({'error': f'Arquivo inválido na linha {erro.linha}: {erro}', **resumo.como_dict()}), 400
+    return jsonify(resumo.como_dict())
+
+# Exportação do catálogo, gerada em partes
+MIMETYPES_EXPORTACAO = {'jsonl': 'application/x-ndjson', 'csv': 'text/csv', 'json': 'application/json'}
+
+@bp.route('/api/exportar')
+def api_exportar():
+    formato = request.args.get('formato', 'jsonl')
+    if formato not in FORMATOS_EXPORTACAO:
+        return jsonify({'error': 'Formato inválido. Use "jsonl", "csv" ou "json".'}), 400
+
+    return fluxo.resposta(
+        exportar(formato),
+        MIMETYPES_EXPORTACAO[formato],
+        headers={'Content-Disposition': f'attachment; filename=catalogo.{formato}'}
+    )
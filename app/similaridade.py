@@ -0,0 +1,356 @@
+import json
+import math
+import random
+import re
+import zlib
+from collections import defaultdict, namedtuple
+
+import click
+import sqlalchemy as sa
+import sqlalchemy.orm as so
+from flask.cli import AppGroup
+
+from app.models import db, Componente
+from app.busca import normalizar
+from app.tarefas import fila
+from app import banco
+
+# Detecção de componentes quase duplicados ("Servo SG90", "servo sg-90",
+# "Micro Servo SG90").
+# - Índice de trigramas do nome (tabela componente_trigrama), atualizado na
+#   transação de cada escrita (lotes grandes vão pela fila), para que um
+#   componente recém-criado já apareça; semelhantes() busca os candidatos que dividem
+#   trigramas com um nome e confere a semelhança só deles: é o "você quis
+#   dizer" do ComponenteForm.
+# - `flask similaridade duplicados` agrupa os duplicados da tabela inteira
+#   com MinHash + LSH (só pares que caem no mesmo balde são comparados) e
+#   propõe as mesclas; com --aplicar, mescla com operacoes.mesclar_componentes.
+
+# Semelhança = PESO_NOME * Jaccard dos trigramas do nome
+#            + (1 - PESO_NOME) * Jaccard das palavras da descrição
+PESO_NOME = 0.75
+MAXIMO_CANDIDATOS = 50
+# Acima disto uma operação em lote (importação) indexa pela fila, em tarefas deste tamanho
+IDS_POR_TAREFA = 1000
+
+# MinHash: NUM_FAIXAS faixas de LINHAS_POR_FAIXA valores; dois nomes com
+# Jaccard 0,6 caem juntos em algum balde com probabilidade ~89% (0,8: ~100%)
+NUM_FAIXAS = 16
+LINHAS_POR_FAIXA = 4
+_PRIMO = (1 << 61) - 1
+# Semente fixa: as assinaturas são as mesmas em toda execução
+_sorteio = random.Random(20261018)
+_COEFICIENTES = [
+    (_sorteio.randrange(1, _PRIMO), _sorteio.randrange(0, _PRIMO))
+    for _ in range(NUM_FAIXAS * LINHAS_POR_FAIXA)
+]
+
+Semelhante = namedtuple('Semelhante', 'id nome semelhanca')
+
+
+def palavras(texto):
+    # "Servo SG-90" -> ['servo', 'sg', '90']: letras e números em palavras separadas
+    return re.findall(r'[^\W\d_]+|\d+', normalizar(texto))
+
+
+def trigramas(nome):
+    # Como no pg_trgm: cada palavra com dois espaços antes e um depois
+    resultado = set()
+    for palavra in palavras(nome):
+        palavra = f'  {palavra} '
+        resultado.update(palavra[i:i + 3] for i in range(len(palavra) - 2))
+    return resultado
+
+
+class Assinatura:
+    """O que a comparação usa de um componente: trigramas, números e palavras da descrição."""
+    __slots__ = ('trigramas', 'numeros', 'descricao')
+
+    def __init__(self, nome, descricao=''):
+        self.trigramas = trigramas(nome)
+        self.numeros = {palavra for palavra in palavras(nome) if palavra.isdigit()}
+        self.descricao = set(palavras(descricao))
+
+
+def _jaccard(a, b):
+    if not a or not b:
+        return 0.0
+    comuns = len(a & b)
+    return comuns / (len(a) + len(b) - comuns)
+
+
+def semelhanca(a, b):
+    """Semelhança entre 0 e 1 de duas Assinaturas."""
+    # Números diferentes indicam modelos diferentes (SG90 e SG91), mesmo com nomes quase iguais
+    if not (a.numeros <= b.numeros or b.numeros <= a.numeros):
+        return 0.0
+    nome = _jaccard(a.trigramas, b.trigramas)
+    if not a.descricao or not b.descricao:
+        return nome
+    return PESO_NOME * nome + (1 - PESO_NOME) * _jaccard(a.descricao, b.descricao)
+
+
+# Índice de trigramas do nome
+class ComponenteTrigrama(db.Model):
+    __tablename__ = 'componente_trigrama'
+    trigrama: so.Mapped[str] = so.mapped_column(sa.String(3), primary_key=True)
+    componente_id: so.Mapped[int] = so.mapped_column(
+        sa.ForeignKey('componente.id', ondelete='CASCADE'),
+        primary_key=True,
+        index=True
+    )
+
+
+trigrama_t = ComponenteTrigrama.__table__
+
+
+def indexar(conexao, ids):
+    # (Re)indexa os componentes informados a partir do conteúdo atual da tabela
+    ids = list(ids)
+    if not ids:
+        return
+    conexao.execute(sa.delete(trigrama_t).where(trigrama_t.c.componente_id.in_(ids)))
+    linhas = [
+        {'trigrama': trigrama, 'componente_id': componente_id}
+        for componente_id, nome in conexao.execute(
+            sa.select(Componente.id, Componente.nome).where(Componente.id.in_(ids))
+        )
+        for trigrama in trigramas(nome)
+    ]
+    if linhas:
+        conexao.execute(sa.insert(trigrama_t), linhas)
+
+
+def reindexar_tudo(conexao, lote=1000):
+    conexao.execute(sa.delete(trigrama_t))
+    ultimo_id = 0
+    while True:
+        ids = conexao.scalars(
+            sa.select(Componente.id).where(Componente.id > ultimo_id).order_by(Componente.id).limit(lote)
+        ).all()
+        if not ids:
+            break
+        indexar(conexao, ids)
+        ultimo_id = ids[-1]
+
+
+def semelhantes(conexao, nome, descricao='', limiar=0.5, ignorar=None, limite=5):
+    """Componentes parecidos com nome/descrição, do mais ao menos semelhante.
+
+    Só os componentes que dividem trigramas suficientes com o nome são
+    carregados e comparados.
+    """
+    procurado = Assinatura(nome, descricao)
+    if not procurado.trigramas:
+        return []
+    # Com a descrição valendo no máximo 1 - PESO_NOME, quem fica abaixo
+    # desta fração de trigramas em comum não alcança o limiar
+    fracao = max(limiar - (1 - PESO_NOME), 0) / PESO_NOME
+    minimo = max(1, math.ceil(fracao * len(procurado.trigramas)))
+
+    comuns = sa.func.count().label('comuns')
+    candidatos = (
+        sa.select(trigrama_t.c.componente_id)
+        .where(trigrama_t.c.trigrama.in_(sorted(procurado.trigramas)))
+        .group_by(trigrama_t.c.componente_id)
+        .having(comuns >= minimo)
+        .order_by(comuns.desc(), trigrama_t.c.componente_id)
+        .limit(MAXIMO_CANDIDATOS)
+    )
+    if ignorar is not None:
+        candidatos = candidatos.where(trigrama_t.c.componente_id != ignorar)
+
+    encontrados = []
+    for componente_id, nome_, descricao_ in conexao.execute(
+        sa.select(Componente.id, Componente.nome, Componente.descricao)
+        .where(Componente.id.in_(candidatos.scalar_subquery()))
+    ):
+        valor = semelhanca(procurado, Assinatura(nome_, descricao_))
+        if valor >= limiar:
+            encontrados.append(Semelhante(componente_id, nome_, round(valor, 3)))
+    encontrados.sort(key=lambda item: (-item.semelhanca, item.id))
+    return encontrados[:limite]
+
+
+def enfileirar(conexao, ids):
+    """Atualiza o índice de trigramas dos componentes em segundo plano."""
+    ids = sorted(set(ids))
+    for inicio in range(0, len(ids), IDS_POR_TAREFA):
+        fila.enfileirar(conexao, 'similaridade.indexar', ids=ids[inicio:inicio + IDS_POR_TAREFA])
+
+
+def atualizar(conexao, ids):
+    """Atualiza o índice de trigramas na transação atual; lotes grandes vão pela fila."""
+    ids = set(ids)
+    if len(ids) > IDS_POR_TAREFA:
+        enfileirar(conexao, ids)
+    else:
+        indexar(conexao, ids)
+
+
+@fila.tarefa('similaridade.indexar')
+def _indexar_tarefa(conexao, ids):
+    indexar(conexao, ids)
+
+
+# Mantém o índice em dia com inserções e mudanças de nome feitas pelo ORM
+# (exclusões saem pelo ON DELETE CASCADE)
+@sa.event.listens_for(so.Session, 'after_flush')
+def _sincronizar_indice(session, flush_context):
+    alterados = {
+        obj.id for obj in list(session.new) + list(session.dirty)
+        if isinstance(obj, Componente)
+        and (obj in session.new or sa.inspect(obj).attrs.nome.history.has_changes())
+    }
+    if alterados:
+        indexar(session.connection(), alterados)
+
+
+# Agrupamento dos duplicados da tabela inteira (MinHash + LSH)
+
+# O vocabulário de trigramas é bem menor que a tabela: cada um é espalhado uma vez só
+_hashes = {}
+
+
+def _hashes_do(trigrama):
+    valores = _hashes.get(trigrama)
+    if valores is None:
+        valor = zlib.crc32(trigrama.encode())
+        valores = _hashes[trigrama] = [(a * valor + b) % _PRIMO for a, b in _COEFICIENTES]
+    return valores
+
+
+def minhash(trigramas_):
+    return [min(coluna) for coluna in zip(*(_hashes_do(trigrama) for trigrama in trigramas_))]
+
+
+def faixas(assinatura_minhash):
+    for faixa in range(NUM_FAIXAS):
+        inicio = faixa * LINHAS_POR_FAIXA
+        yield faixa, tuple(assinatura_minhash[inicio:inicio + LINHAS_POR_FAIXA])
+
+
+def agrupar(conexao, limiar=0.6, lote=1000):
+    """Grupos de componentes quase duplicados: listas de ids com 2 ou mais itens.
+
+    Cada componente gera NUM_FAIXAS chaves de balde a partir da assinatura
+    MinHash; só componentes que dividem algum balde são comparados, e cada
+    um é comparado com os representantes dos grupos já formados no balde
+    (até o primeiro parecido), em vez de com todos os membros.
+    """
+    assinaturas = {}
+    baldes = defaultdict(list)
+    ultimo_id = 0
+    while True:
+        linhas = conexao.execute(
+            sa.select(Componente.id, Componente.nome, Componente.descricao)
+            .where(Componente.id > ultimo_id).order_by(Componente.id).limit(lote)
+        ).all()
+        if not linhas:
+            break
+        for componente_id, nome, descricao in linhas:
+            assinatura = Assinatura(nome, descricao)
+            if not assinatura.trigramas:
+                continue
+            assinaturas[componente_id] = assinatura
+            for chave in faixas(minhash(assinatura.trigramas)):
+                baldes[chave].append(componente_id)
+        ultimo_id = linhas[-1].id
+
+    # União-busca dos grupos
+    pai = {}
+
+    def raiz(id_):
+        while pai.get(id_, id_) != id_:
+            pai[id_] = pai.get(pai[id_], pai[id_])
+            id_ = pai[id_]
+        return id_
+
+    for membros in baldes.values():
+        if len(membros) < 2:
+            continue
+        representantes = []
+        for id_ in membros:
+            assinatura = assinaturas[id_]
+            for representante in representantes:
+                if semelhanca(assinatura, assinaturas[representante]) >= limiar:
+                    origem, destino = raiz(id_), raiz(representante)
+                    if origem != destino:
+                        pai[origem] = destino
+                    break
+            else:
+                representantes.append(id_)
+
+    grupos = defaultdict(list)
+    for id_ in assinaturas:
+        grupos[raiz(id_)].append(id_)
+    return [sorted(ids) for ids in grupos.values() if len(ids) > 1]
+
+
+def propostas(conexao, limiar=0.6):
+    """Proposta de mescla por grupo: mantém o componente mais usado (e o mais antigo no empate)."""
+    resultado = []
+    for ids in agrupar(conexao, limiar):
+        linhas = conexao.execute(
+            sa.select(Componente.id, Componente.nome, Componente.total_projetos, Componente.quantidade)
+            .where(Componente.id.in_(ids))
+        ).all()
+        if len(linhas) < 2:
+            continue
+        manter = min(linhas, key=lambda linha: (-linha.total_projetos, linha.id))
+        resultado.append({
+            'manter': {'id': manter.id, 'nome': manter.nome},
+            'duplicados': [
+                {'id': linha.id, 'nome': linha.nome, 'total_projetos': linha.total_projetos,
+                 'quantidade': linha.quantidade}
+                for linha in sorted(linhas, key=lambda linha: linha.id) if linha.id != manter.id
+            ],
+        })
+    resultado.sort(key=lambda proposta: proposta['manter']['id'])
+    return resultado
+
+
+cli = AppGroup('similaridade', help='Componentes quase duplicados.')
+
+
+@cli.command('reindexar')
+def reindexar_comando():
+    """Recria o índice de trigramas a partir da tabela componente."""
+    reindexar_tudo(db.session.connection())
+    db.session.commit()
+    click.echo('Índice de trigramas recriado.')
+
+
+@cli.command('duplicados')
+@click.option('--limiar', default=0.6, show_default=True, help='Semelhança mínima (0 a 1).')
+@click.option('--json', 'como_json', is_flag=True, help='Propostas em JSON.')
+@click.option('--aplicar', is_flag=True, help='Mescla cada grupo no componente mantido.')
+def duplicados_comando(limiar, como_json, aplicar):
+    """Agrupa os componentes quase duplicados e propõe (ou aplica) as mesclas."""
+    from app import operacoes
+    from app.cache import cache
+
+    if aplicar:
+        banco.sessao_de_escrita(db.session)
+    conexao = db.session.connection()
+    lista = propostas(conexao, limiar)
+    if como_json:
+        click.echo(json.dumps(lista, ensure_ascii=False, indent=2))
+    else:
+        for proposta in lista:
+            manter = proposta['manter']
+            click.echo(f"manter {manter['id']} {manter['nome']!r} <- "
+                       + ', '.join(f"{item['id']} {item['nome']!r}" for item in proposta['duplicados']))
+        click.echo(f'{len(lista)} grupo(s) de duplicados.')
+    if not aplicar or not lista:
+        return
+
+    tags = set()
+    for proposta in lista:
+        resumo = operacoes.mesclar_componentes(
+            conexao, proposta['manter']['id'], {item['id'] for item in proposta['duplicados']}
+        )
+        tags.update(operacoes.tags(resumo))
+    db.session.commit()
+    cache.invalidar(*tags)
+    click.echo(f'{len(lista)} mescla(s) aplicada(s).')
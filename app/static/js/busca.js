@@ -0,0 +1,248 @@
+// Caixa de pesquisa do cabeçalho (modal de busca e sugestões), usada por base.html
+let searchTimeout;
+let currentQuery = '';
+
+function showSearchModal() {
+    document.getElementById('searchOverlay').style.display = 'block';
+    document.getElementById('modalSearchInput').focus();
+    document.body.style.overflow = 'hidden';
+}
+
+function hideSearchModal(event) {
+    if (!event || event.target === document.getElementById('searchOverlay')) {
+        document.getElementById('searchOverlay').style.display = 'none';
+        document.body.style.overflow = 'auto';
+        document.getElementById('searchInput').value = '';
+        document.getElementById('modalSearchInput').value = '';
+    }
+}
+
+// Cada aba numera suas buscas; o servidor abandona as que já foram superadas
+const searchClient = Math.random().toString(36).slice(2);
+let searchSeq = 0;
+let searchController = null;
+
+function fetchSugestoes(query, inicio) {
+    // Cancela a busca anterior ainda em andamento
+    if (searchController) {
+        searchController.abort();
+    }
+    searchController = new AbortController();
+    searchSeq += 1;
+    const url = '/api/search/sugestoes?q=' + encodeURIComponent(query)
+        + '&cliente=' + searchClient + '&seq=' + searchSeq + '&inicio=' + inicio;
+    return fetch(url, {signal: searchController.signal})
+        .then(response => response.status === 204 ? null : response.json());
+}
+
+function performSearch(query) {
+    clearTimeout(searchTimeout);
+
+    if (query.length < 2) {
+        if (searchController) {
+            searchController.abort();
+        }
+        document.getElementById('searchResults').innerHTML = `
+            <div class="text-center text-muted py-5">
+                <i class="fas fa-search fa-3x mb-3"></i>
+                <p>Digite pelo menos 2 caracteres para buscar</p>
+            </div>
+        `;
+        return;
+    }
+
+    searchTimeout = setTimeout(() => {
+        currentQuery = query;
+        fetchSugestoes(query, 0)
+            .then(data => {
+                if (data && query === currentQuery) {
+                    displaySearchResults(data);
+                }
+            })
+            .catch(error => {
+                if (error.name === 'AbortError') {
+                    return;
+                }
+                console.error('Erro na busca:', error);
+                document.getElementById('searchResults').innerHTML = `
+                    <div class="alert alert-danger">
+                        <i class="fas fa-exclamation-triangle"></i>
+                        Erro ao realizar a busca. Tente novamente.
+                    </div>
+                `;
+            });
+    }, 150);
+}
+
+function displaySearchResults(data, append = false) {
+    const resultsContainer = document.getElementById('searchResults');
+
+    if (!append && data.componentes.length === 0) {
+        resultsContainer.innerHTML = `
+            <div class="text-center text-muted py-5">
+                <i class="fas fa-search fa-3x mb-3"></i>
+                <p>Nenhum componente encontrado</p>
+                <small>Tente usar termos diferentes</small>
+            </div>
+        `;
+        return;
+    }
+
+    // Primeiro só os nomes; os detalhes chegam em seguida, numa única requisição
+    const html = data.componentes.map(renderSugestao).join('');
+
+    if (append) {
+        const loadMore = document.getElementById('loadMoreResults');
+        if (loadMore) {
+            loadMore.remove();
+        }
+        resultsContainer.insertAdjacentHTML('beforeend', html);
+    } else {
+        resultsContainer.innerHTML = `<h6 class="mb-3 text-primary"><i class="fas fa-microchip"></i> Componentes encontrados</h6>` + html;
+    }
+
+    // "proximo" é a posição da página seguinte
+    if (data.proximo !== null) {
+        resultsContainer.insertAdjacentHTML('beforeend', `
+            <div class="text-center" id="loadMoreResults">
+                <button class="btn btn-outline-primary btn-sm" onclick="loadMoreResults(${data.proximo})">
+                    <i class="fas fa-plus"></i> Carregar mais
+                </button>
+            </div>
+        `);
+    } else if (!data.completo) {
+        resultsContainer.insertAdjacentHTML('beforeend', `
+            <p class="text-center small text-muted">Refine a busca para ver mais resultados</p>
+        `);
+    }
+
+    carregarDetalhes(data.componentes.map(componente => componente.id));
+}
+
+function carregarDetalhes(ids) {
+    if (ids.length === 0) {
+        return;
+    }
+    fetch('/api/componentes/detalhes?ids=' + ids.join(','))
+        .then(response => response.json())
+        .then(data => data.componentes.forEach(componente => {
+            const item = document.getElementById('resultado-' + componente.id);
+            if (item) {
+                item.outerHTML = renderComponentResult(componente);
+            }
+        }))
+        .catch(error => console.error('Erro ao carregar detalhes:', error));
+}
+
+function loadMoreResults(inicio) {
+    fetchSugestoes(currentQuery, inicio)
+        .then(data => {
+            if (data) {
+                displaySearchResults(data, true);
+            }
+        })
+        .catch(error => {
+            if (error.name !== 'AbortError') {
+                console.error('Erro na busca:', error);
+            }
+        });
+}
+
+function renderSugestao(componente) {
+    return `
+        <div class="card component-result mb-3" id="resultado-${componente.id}">
+            <div class="card-body">
+                <h6 class="card-title mb-1">
+                    <a href="/componente/detalhes/${componente.id}" class="text-decoration-none" onclick="hideSearchModal()">
+                        ${componente.nome}
+                    </a>
+                </h6>
+                <div class="spinner-border spinner-border-sm text-muted" role="status">
+                    <span class="visually-hidden">Carregando...</span>
+                </div>
+            </div>
+        </div>
+    `;
+}
+
+function renderComponentResult(componente) {
+    return `
+        <div class="card component-result mb-3">
+            <div class="card-body">
+                <div class="d-flex justify-content-between align-items-start">
+                    <div class="flex-grow-1">
+                        <h6 class="card-title mb-1">
+                            <a href="/componente/detalhes/${componente.id}" class="text-decoration-none" onclick="hideSearchModal()">
+                                ${componente.nome}
+                            </a>
+                        </h6>
+                        <p class="card-text small text-muted mb-2">
+                            ${componente.descricao.substring(0, 100)}${componente.descricao.length > 100 ? '...' : ''}
+                        </p>
+                        <div class="d-flex align-items-center gap-3">
+                            <span class="badge bg-success">
+                                <i class="fas fa-warehouse"></i> ${componente.quantidade} unidades
+                            </span>
+                            <a href="${componente.url}" target="_blank" class="text-decoration-none small">
+                                <i class="fas fa-external-link-alt"></i> Ver mais
+                            </a>
+                        </div>
+                    </div>
+                </div>
+
+                ${componente.projetos.length > 0 ? `
+                    <div class="mt-3">
+                        <h6 class="text-primary mb-2">
+                            <i class="fas fa-project-diagram"></i>
+                            Usado em ${componente.projetos.length} projeto(s):
+                        </h6>
+                        ${componente.projetos.map(projeto => `
+                            <div class="card project-result mb-2">
+                                <div class="card-body py-2">
+                                    <div class="d-flex justify-content-between align-items-center">
+                                        <div>
+                                            <h6 class="mb-1">
+                                                <a href="/projeto/detalhes/${projeto.id}" class="text-decoration-none" onclick="hideSearchModal()">
+                                                    ${projeto.nome}
+                                                </a>
+                                            </h6>
+                                            <small class="text-muted">
+                                                ${projeto.descricao.substring(0, 80)}${projeto.descricao.length > 80 ? '...' : ''}
+                                            </small>
+                                        </div>
+                                        <small class="text-muted">
+                                            ${projeto.total_componentes} componentes
+                                        </small>
+                                    </div>
+                                </div>
+                            </div>
+                        `).join('')}
+                    </div>
+                ` : `
+                    <div class="mt-3">
+                        <small class="text-muted">
+                            <i class="fas fa-info-circle"></i>
+                            Este componente não está sendo usado em nenhum projeto
+                        </small>
+                    </div>
+                `}
+            </div>
+        </div>
+    `;
+}
+
+// Fechar modal com ESC
+document.addEventListener('keydown', function(event) {
+    if (event.key === 'Escape') {
+        hideSearchModal();
+    }
+});
+
+// Sincronizar inputs de pesquisa
+document.getElementById('searchInput').addEventListener('input', function() {
+    document.getElementById('modalSearchInput').value = this.value;
+});
+
+document.getElementById('modalSearchInput').addEventListener('input', function() {
+    document.getElementById('searchInput').value = this.value;
+});
@@ -0,0 +1,252 @@
+import threading
+from collections import OrderedDict
+
+import sqlalchemy as sa
+from sqlalchemy.exc import OperationalError
+
+from app.models import db, Componente
+from app import busca
+from app.versoes import versao_catalogo
+
+# Busca leve da caixa de pesquisa (type-ahead): só ids e nomes, com
+#  - voo único: buscas idênticas simultâneas esperam uma única consulta;
+#  - reaproveitamento de prefixo: "servo sg9" filtra em memória o
+#    resultado completo já obtido para "servo sg";
+#  - cancelamento: cada cliente numera suas buscas (seq); uma busca
+#    superada por outra mais nova do mesmo cliente é abandonada, inclusive
+#    no meio da consulta (progress handler do SQLite).
+# Os detalhes dos componentes exibidos são pedidos à parte.
+
+
+class Cancelada(Exception):
+    pass
+
+
+class _Voo:
+    __slots__ = ('evento', 'resultado', 'erro', 'seguidores')
+
+    def __init__(self):
+        self.evento = threading.Event()
+        self.resultado = None
+        self.erro = None
+        self.seguidores = 0
+
+
+class VooUnico:
+    """Executa uma única vez as chamadas simultâneas com a mesma chave."""
+
+    def __init__(self):
+        self._voos = {}
+        self._lock = threading.Lock()
+        self.coalescidas = 0
+
+    def executar(self, chave, funcao, cancelar=None):
+        while True:
+            with self._lock:
+                voo = self._voos.get(chave)
+                lider = voo is None
+                if lider:
+                    voo = self._voos[chave] = _Voo()
+                else:
+                    voo.seguidores += 1
+                    self.coalescidas += 1
+
+            if lider:
+                try:
+                    voo.resultado = funcao(voo)
+                    return voo.resultado
+                except BaseException as erro:
+                    voo.erro = erro
+                    raise
+                finally:
+                    with self._lock:
+                        del self._voos[chave]
+                    voo.evento.set()
+
+            while not voo.evento.wait(0.05):
+                if cancelar is not None and cancelar():
+                    with self._lock:
+                        voo.seguidores -= 1
+                    raise Cancelada()
+            if voo.erro is None:
+                return voo.resultado
+            # O líder foi cancelado pelo próprio cliente: esta busca tenta de novo
+            if not isinstance(voo.erro, Cancelada):
+                raise voo.erro
+
+
+class Conjunto:
+    """Resultado de uma busca: [(id, nome, termos do nome, termos da descrição)] em ordem de relevância.
+
+    `completo` indica que todos os componentes encontrados estão na lista,
+    condição para filtrar em memória buscas que estendem esta.
+    """
+    __slots__ = ('termos', 'itens', 'completo')
+
+    def __init__(self, termos, itens, completo):
+        self.termos = termos
+        self.itens = itens
+        self.completo = completo
+
+
+def _casa(termo, tokens):
+    return any(token.startswith(termo) for token in tokens)
+
+
+def estende(termos, base):
+    # Cada termo da busca anterior é prefixo do termo na mesma posição da nova
+    return len(termos) >= len(base) and all(novo.startswith(antigo) for novo, antigo in zip(termos, base))
+
+
+def filtrar(conjunto, termos):
+    itens = []
+    for item in conjunto.itens:
+        _, _, do_nome, da_descricao = item
+        pontos = 0
+        for termo in termos:
+            if _casa(termo, do_nome):
+                pontos += busca.PESO_NOME
+            elif _casa(termo, da_descricao):
+                pontos += 1
+            else:
+                break
+        else:
+            itens.append((pontos, item))
+    # sorted é estável: empates mantêm a ordem de relevância da busca anterior
+    itens = [item for _, item in sorted(itens, key=lambda par: par[0], reverse=True)]
+    return Conjunto(termos, itens, True)
+
+
+class Sugestoes:
+    def __init__(self, app=None):
+        self.voo_unico = VooUnico()
+        self._conjuntos = OrderedDict()
+        self._versao = None
+        self._ultimo_seq = OrderedDict()
+        self._lock = threading.Lock()
+        self.max_conjuntos = 256
+        self.max_resultados = 500
+        self.reaproveitadas = 0
+        self.canceladas = 0
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        app.config.setdefault('SUGESTOES_CONJUNTOS', 256)
+        app.config.setdefault('SUGESTOES_MAX_RESULTADOS', 500)
+        self.max_conjuntos = app.config['SUGESTOES_CONJUNTOS']
+        self.max_resultados = app.config['SUGESTOES_MAX_RESULTADOS']
+        app.extensions['sugestoes'] = self
+
+    # Cancelamento
+
+    def registrar(self, cliente, seq):
+        """Registra a busca `seq` do cliente; devolve False se ela já foi superada."""
+        if not cliente:
+            return True
+        with self._lock:
+            ultimo = self._ultimo_seq.get(cliente)
+            if ultimo is not None and seq < ultimo:
+                return False
+            self._ultimo_seq[cliente] = seq
+            self._ultimo_seq.move_to_end(cliente)
+            while len(self._ultimo_seq) > 10_000:
+                self._ultimo_seq.popitem(last=False)
+            return True
+
+    def superada(self, cliente, seq):
+        return bool(cliente) and self._ultimo_seq.get(cliente, seq) > seq
+
+    def cancelada(self):
+        # Contador compartilhado pelas threads do servidor
+        with self._lock:
+            self.canceladas += 1
+
+    # Conjuntos em memória, válidos para uma versão do catálogo
+
+    def _obter(self, versao, termos):
+        with self._lock:
+            if versao != self._versao:
+                self._conjuntos.clear()
+                self._versao = versao
+            conjunto = self._conjuntos.get(termos)
+            if conjunto is not None:
+                self._conjuntos.move_to_end(termos)
+                return conjunto
+            # Busca anterior mais curta cujo resultado completo contém este
+            for base in reversed(self._conjuntos.values()):
+                if base.completo and estende(termos, base.termos):
+                    self.reaproveitadas += 1
+                    return base
+        return None
+
+    def _guardar(self, versao, conjunto):
+        with self._lock:
+            if versao != self._versao:
+                return
+            self._conjuntos[conjunto.termos] = conjunto
+            while len(self._conjuntos) > self.max_conjuntos:
+                self._conjuntos.popitem(last=False)
+
+    def _consultar(self, termos, cancelar, voo):
+        conexao = db.session.connection()
+        ranking = busca.consulta_ranqueada(conexao, ' '.join(termos))
+        consulta = sa.select(Componente.id, Componente.nome, Componente.descricao).join(
+            ranking, ranking.c.componente_id == Componente.id
+        ).order_by(ranking.c.relevancia, Componente.id).limit(self.max_resultados + 1)
+
+        interromper = None
+        if conexao.dialect.name == 'sqlite' and cancelar is not None:
+            # Só interrompe se ninguém mais espera por este resultado
+            interromper = conexao.connection.driver_connection
+            interromper.set_progress_handler(lambda: int(voo.seguidores == 0 and cancelar()), 200)
+        try:
+            linhas = conexao.execute(consulta).all()
+        except OperationalError as erro:
+            if interromper is not None and 'interrupt' in str(erro.orig):
+                db.session.rollback()
+                raise Cancelada() from erro
+            raise
+        finally:
+            if interromper is not None:
+                interromper.set_progress_handler(None, 0)
+
+        itens = [
+            (linha.id, linha.nome, frozenset(busca.tokenizar(linha.nome)), frozenset(busca.tokenizar(linha.descricao)))
+            for linha in linhas[:self.max_resultados]
+        ]
+        return Conjunto(termos, itens, len(linhas) <= self.max_resultados)
+
+    def buscar(self, texto, cliente=None, seq=0):
+        """Devolve o Conjunto da busca ou None se não há termos; levanta Cancelada se superada."""
+        termos = tuple(busca.tokenizar(texto))
+        if not termos:
+            return None
+
+        cancelar = (lambda: self.superada(cliente, seq)) if cliente else None
+        if cancelar is not None and cancelar():
+            raise Cancelada()
+
+        versao = versao_catalogo()
+        conjunto = self._obter(versao, termos)
+        if conjunto is not None:
+            if conjunto.termos == termos:
+                return conjunto
+            conjunto = filtrar(conjunto, termos)
+        else:
+            conjunto = self.voo_unico.executar(
+                (versao, termos), lambda voo: self._consultar(termos, cancelar, voo), cancelar
+            )
+        self._guardar(versao, conjunto)
+        return conjunto
+
+    def estatisticas(self):
+        return {
+            'conjuntos': len(self._conjuntos),
+            'coalescidas': self.voo_unico.coalescidas,
+            'reaproveitadas': self.reaproveitadas,
+            'canceladas': self.canceladas,
+        }
+
+
+sugestoes = Sugestoes()
@@ -0,0 +1,400 @@
+import json
+import logging
+import os
+import random
+import socket
+import threading
+import time
+from collections import Counter
+from typing import Optional
+
+import click
+import sqlalchemy as sa
+import sqlalchemy.orm as so
+from flask.cli import AppGroup
+from sqlalchemy.exc import IntegrityError
+
+from app.models import db
+from app.banco import BIND_LEITURA, de_escrita
+from app.cache import cache
+from app.instrumentacao import Histograma, BUCKETS_SEGUNDOS, instrumentacao
+
+# Fila de tarefas em segundo plano, guardada no próprio banco (tabela
+# tarefa), sem broker externo. A rota de escrita grava a linha principal e
+# enfileira o trabalho que pode vir depois (índice de busca, ...) na mesma
+# transação: a tarefa existe se e somente se a escrita foi confirmada.
+# As tarefas são executadas por `flask tarefas trabalhar` ou por threads do
+# próprio processo web (TAREFAS_TRABALHADORES; o gunicorn.conf.py as
+# desliga), com novas tentativas e espera exponencial. Com a fila vazia o
+# trabalhador só lê (sem o lock de escrita do SQLite) e consulta cada vez
+# mais espaçado, até TAREFAS_INTERVALO_MAXIMO. Uma tarefa enfileirada com
+# a `chave` de outra ainda pendente não é criada de novo.
+# Tarefas que mudam o que as páginas mostram incrementam a versão do
+# catálogo (app/versoes.py) na própria transação: o ETag muda e todo
+# processo web deixa de usar as respostas guardadas no cache, inclusive
+# quando a tarefa roda em outro processo.
+# Com TAREFAS_IMEDIATAS (testes) a tarefa roda na hora, na mesma transação.
+
+logger = logging.getLogger('app.tarefas')
+
+PENDENTE = 'pendente'
+EXECUTANDO = 'executando'
+CONCLUIDA = 'concluida'
+FALHOU = 'falhou'
+
+
+class Tarefa(db.Model):
+    __tablename__ = 'tarefa'
+    __table_args__ = (
+        # Próxima tarefa a executar: WHERE estado = 'pendente' ORDER BY executar_em
+        sa.Index('ix_tarefa_estado_executar_em', 'estado', 'executar_em'),
+    )
+    id: so.Mapped[int] = so.mapped_column(primary_key=True)
+    tipo: so.Mapped[str] = so.mapped_column(sa.String(50))
+    argumentos: so.Mapped[str] = so.mapped_column(sa.Text, default='{}')
+    # Única só enquanto a tarefa espera na fila (é apagada quando ela começa)
+    chave: so.Mapped[Optional[str]] = so.mapped_column(sa.String(200), unique=True)
+    estado: so.Mapped[str] = so.mapped_column(sa.String(20), default=PENDENTE)
+    tentativas: so.Mapped[int] = so.mapped_column(sa.Integer, default=0)
+    max_tentativas: so.Mapped[int] = so.mapped_column(sa.Integer, default=5)
+    # Instantes em segundos desde a época (time.time()), fáceis de somar e comparar
+    criada_em: so.Mapped[float] = so.mapped_column(sa.Float)
+    executar_em: so.Mapped[float] = so.mapped_column(sa.Float)
+    iniciada_em: so.Mapped[Optional[float]] = so.mapped_column(sa.Float)
+    concluida_em: so.Mapped[Optional[float]] = so.mapped_column(sa.Float)
+    trabalhador: so.Mapped[Optional[str]] = so.mapped_column(sa.String(100))
+    erro: so.Mapped[Optional[str]] = so.mapped_column(sa.Text)
+
+
+tarefa_t = Tarefa.__table__
+
+
+class Fila:
+    def __init__(self, app=None):
+        self.tipos = {}
+        self.app = None
+        self.imediatas = False
+        self.trabalhadores = 0
+        self.intervalo = 1.0
+        self.intervalo_maximo = 10.0
+        self.espera_base = 2.0
+        self.espera_maxima = 300.0
+        self.expiracao = 600.0
+        self.max_tentativas = 5
+        self._acordar = threading.Event()
+        self._pid = None
+        self._threads = []
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        self.contagens = Counter()
+        self.espera = Histograma('wallecreator_tarefa_espera_segundos',
+                                 'Tempo entre a tarefa ficar pronta e começar a executar.', BUCKETS_SEGUNDOS, 'tipo')
+        self.duracao = Histograma('wallecreator_tarefa_segundos', 'Duração das tarefas.', BUCKETS_SEGUNDOS, 'tipo')
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        app.config.setdefault('TAREFAS_IMEDIATAS', False)
+        app.config.setdefault('TAREFAS_TRABALHADORES', 2)
+        app.config.setdefault('TAREFAS_INTERVALO', 1.0)
+        app.config.setdefault('TAREFAS_INTERVALO_MAXIMO', 10.0)
+        app.config.setdefault('TAREFAS_ESPERA_BASE', 2.0)
+        app.config.setdefault('TAREFAS_ESPERA_MAXIMA', 300.0)
+        app.config.setdefault('TAREFAS_EXPIRACAO', 600.0)
+        app.config.setdefault('TAREFAS_MAX_TENTATIVAS', 5)
+        self.app = app
+        self.imediatas = app.config['TAREFAS_IMEDIATAS']
+        self.trabalhadores = app.config['TAREFAS_TRABALHADORES']
+        self.intervalo = app.config['TAREFAS_INTERVALO']
+        self.intervalo_maximo = max(app.config['TAREFAS_INTERVALO_MAXIMO'], self.intervalo)
+        self.espera_base = app.config['TAREFAS_ESPERA_BASE']
+        self.espera_maxima = app.config['TAREFAS_ESPERA_MAXIMA']
+        self.expiracao = app.config['TAREFAS_EXPIRACAO']
+        self.max_tentativas = app.config['TAREFAS_MAX_TENTATIVAS']
+        # As threads nascem na primeira requisição de cada processo (depois do fork)
+        app.before_request(self.iniciar)
+        instrumentacao.registrar(self.exportar)
+        app.extensions['tarefas'] = self
+
+    def _contar(self, evento, tipo):
+        with self._lock:
+            self.contagens[evento, tipo] += 1
+
+    def tarefa(self, tipo):
+        """Registra a função que executa as tarefas `tipo`.
+
+        A função recebe a conexão (dentro da transação da tarefa) e os
+        argumentos enfileirados. Pode devolver tags do cache: as entradas
+        deste processo são liberadas na hora, mas quem invalida as respostas
+        em todos os processos é o incremento da versão do catálogo.
+        """
+        def decorador(funcao):
+            self.tipos[tipo] = funcao
+            return funcao
+        return decorador
+
+    # Enfileiramento
+
+    def enfileirar(self, conexao, tipo, chave=None, atraso=0, **argumentos):
+        """Enfileira a tarefa na transação de `conexao`; devolve o id (None se já pendente ou imediata)."""
+        if tipo not in self.tipos:
+            raise LookupError(f'Tipo de tarefa desconhecido: {tipo}')
+        if self.imediatas:
+            tags = self.tipos[tipo](conexao, **argumentos) or ()
+            cache.invalidar(*tags)
+            return None
+
+        agora = time.time()
+        valores = {
+            'tipo': tipo, 'argumentos': json.dumps(argumentos), 'chave': chave, 'estado': PENDENTE,
+            'tentativas': 0, 'max_tentativas': self.max_tentativas,
+            'criada_em': agora, 'executar_em': agora + atraso,
+        }
+        if chave is not None and conexao.scalar(
+            sa.select(tarefa_t.c.id).where(tarefa_t.c.chave == chave)
+        ) is not None:
+            self._contar('repetidas', tipo)
+            return None
+        try:
+            with conexao.begin_nested():
+                id_ = conexao.scalar(sa.insert(tarefa_t).values(**valores).returning(tarefa_t.c.id))
+        except IntegrityError:
+            # Outro processo enfileirou a mesma chave entre a consulta e o INSERT
+            self._contar('repetidas', tipo)
+            return None
+        self._contar('enfileiradas', tipo)
+        self._local.enfileiradas = True
+        return id_
+
+    def _depois_do_commit(self, session):
+        if getattr(self._local, 'enfileiradas', False):
+            self._local.enfileiradas = False
+            self.acordar()
+
+    def _depois_do_rollback(self, session):
+        self._local.enfileiradas = False
+
+    # Execução
+
+    def _engine_de_leitura(self):
+        return db.engines.get(BIND_LEITURA) or db.engine
+
+    def _existe(self, condicao):
+        # Consulta só de leitura (índice estado, executar_em) antes de pegar o
+        # lock de escrita: fila vazia não disputa a escrita com as requisições
+        with self._engine_de_leitura().connect() as conexao:
+            return conexao.scalar(sa.select(tarefa_t.c.id).where(condicao).limit(1)) is not None
+
+    def _pegar(self, trabalhador):
+        agora = time.time()
+        pronta = sa.and_(tarefa_t.c.estado == PENDENTE, tarefa_t.c.executar_em <= agora)
+        if not self._existe(pronta):
+            return None
+        proxima = sa.select(tarefa_t.c.id).where(pronta) \
+            .order_by(tarefa_t.c.executar_em, tarefa_t.c.id).limit(1).scalar_subquery()
+        with de_escrita(db.engine).begin() as conexao:
+            # A condição se repete no UPDATE: dois trabalhadores nunca pegam a mesma tarefa
+            return conexao.execute(
+                sa.update(tarefa_t).where(tarefa_t.c.id == proxima, pronta)
+                .values(estado=EXECUTANDO, iniciada_em=agora, trabalhador=trabalhador,
+                        tentativas=tarefa_t.c.tentativas + 1, chave=None)
+                .returning(tarefa_t.c.id, tarefa_t.c.tipo, tarefa_t.c.argumentos, tarefa_t.c.tentativas,
+                           tarefa_t.c.max_tentativas, tarefa_t.c.executar_em)
+            ).first()
+
+    def espera_para(self, tentativas):
+        # Espera exponencial com variação aleatória, para as novas tentativas não chegarem juntas
+        espera = min(self.espera_base * 2 ** (tentativas - 1), self.espera_maxima)
+        return espera * random.uniform(0.5, 1.0)
+
+    def executar_proxima(self, trabalhador=None):
+        """Executa a próxima tarefa pronta; devolve False se a fila está vazia."""
+        trabalhador = trabalhador or f'{socket.gethostname()}:{os.getpid()}:{threading.get_ident()}'
+        linha = self._pegar(trabalhador)
+        if linha is None:
+            return False
+
+        inicio = time.time()
+        with self._lock:
+            self.espera.observar(linha.tipo, max(0.0, inicio - linha.executar_em))
+        try:
+            funcao = self.tipos.get(linha.tipo)
+            if funcao is None:
+                raise LookupError(f'Tipo de tarefa desconhecido: {linha.tipo}')
+            # Efeitos e conclusão confirmados juntos
+            with de_escrita(db.engine).begin() as conexao:
+                tags = funcao(conexao, **json.loads(linha.argumentos)) or ()
+                conexao.execute(
+                    sa.update(tarefa_t).where(tarefa_t.c.id == linha.id)
+                    .values(estado=CONCLUIDA, concluida_em=time.time(), erro=None)
+                )
+        except Exception as erro:
+            self._falhou(linha, erro)
+        else:
+            cache.invalidar(*tags)
+            self._contar('concluidas', linha.tipo)
+        with self._lock:
+            self.duracao.observar(linha.tipo, time.time() - inicio)
+        return True
+
+    def _falhou(self, linha, erro):
+        definitiva = linha.tentativas >= linha.max_tentativas
+        valores = {'erro': f'{type(erro).__name__}: {erro}'}
+        if definitiva:
+            valores.update(estado=FALHOU, concluida_em=time.time())
+            self._contar('falhas', linha.tipo)
+            logger.exception('Tarefa %s (%s) falhou após %s tentativas.', linha.id, linha.tipo, linha.tentativas)
+        else:
+            valores.update(estado=PENDENTE, executar_em=time.time() + self.espera_para(linha.tentativas))
+            self._contar('novas_tentativas', linha.tipo)
+            logger.warning('Tarefa %s (%s) falhou (tentativa %s): %s', linha.id, linha.tipo, linha.tentativas, erro)
+        with de_escrita(db.engine).begin() as conexao:
+            conexao.execute(sa.update(tarefa_t).where(tarefa_t.c.id == linha.id).values(**valores))
+
+    def recuperar_expiradas(self):
+        """Devolve à fila as tarefas de trabalhadores que morreram no meio da execução."""
+        agora = time.time()
+        expirada = sa.and_(tarefa_t.c.estado == EXECUTANDO, tarefa_t.c.iniciada_em < agora - self.expiracao)
+        if not self._existe(expirada):
+            return 0
+        with de_escrita(db.engine).begin() as conexao:
+            conexao.execute(
+                sa.update(tarefa_t).where(expirada, tarefa_t.c.tentativas >= tarefa_t.c.max_tentativas)
+                .values(estado=FALHOU, concluida_em=agora, erro='Expirou durante a execução.')
+            )
+            return conexao.execute(
+                sa.update(tarefa_t).where(expirada).values(estado=PENDENTE, executar_em=agora)
+            ).rowcount
+
+    def trabalhar(self, parar, trabalhador=None):
+        proxima_recuperacao = 0
+        espera = self.intervalo
+        while not parar.is_set():
+            try:
+                if self.executar_proxima(trabalhador):
+                    espera = self.intervalo
+                    continue
+                if time.time() >= proxima_recuperacao:
+                    proxima_recuperacao = time.time() + self.expiracao / 10
+                    if self.recuperar_expiradas():
+                        continue
+            except Exception:
+                # Banco indisponível, lock demorado etc.: tenta de novo no próximo intervalo
+                logger.exception('Erro no trabalhador de tarefas.')
+            # Cada consulta vazia dobra a espera; um enfileiramento neste processo acorda na hora
+            acordado = self._acordar.wait(espera)
+            self._acordar.clear()
+            espera = self.intervalo if acordado else min(espera * 2, self.intervalo_maximo)
+
+    # Threads do processo web
+
+    def iniciar(self):
+        if self._pid == os.getpid() or self.imediatas or not self.trabalhadores:
+            return
+        with self._lock:
+            if self._pid == os.getpid():
+                return
+            self._pid = os.getpid()
+            parar = threading.Event()
+            self._threads = [
+                threading.Thread(target=self._thread, args=(parar,), name=f'tarefas-{i}', daemon=True)
+                for i in range(self.trabalhadores)
+            ]
+            for thread in self._threads:
+                thread.start()
+
+    def _thread(self, parar):
+        with self.app.app_context():
+            self.trabalhar(parar)
+
+    def acordar(self):
+        self._acordar.set()
+
+    # Métricas
+
+    def profundidade(self):
+        with self._engine_de_leitura().connect() as conexao:
+            por_estado = dict(conexao.execute(
+                sa.select(tarefa_t.c.estado, sa.func.count()).group_by(tarefa_t.c.estado)
+            ).all())
+            mais_antiga = conexao.scalar(
+                sa.select(sa.func.min(tarefa_t.c.executar_em))
+                .where(tarefa_t.c.estado == PENDENTE, tarefa_t.c.executar_em <= time.time())
+            )
+        return {
+            'por_estado': {estado: por_estado.get(estado, 0) for estado in (PENDENTE, EXECUTANDO, CONCLUIDA, FALHOU)},
+            'atraso_s': round(time.time() - mais_antiga, 3) if mais_antiga is not None else 0.0,
+        }
+
+    def estatisticas(self):
+        contagens = {}
+        for (evento, tipo), total in sorted(self.contagens.items()):
+            contagens.setdefault(tipo, {})[evento] = total
+        return {**self.profundidade(), 'tipos': contagens, 'trabalhadores': len(self._threads)}
+
+    def exportar(self):
+        profundidade = self.profundidade()
+        linhas = [
+            '# HELP wallecreator_tarefas Tarefas na tabela por estado.',
+            '# TYPE wallecreator_tarefas gauge',
+        ]
+        linhas += [f'wallecreator_tarefas{{estado="{estado}"}} {total}'
+                   for estado, total in profundidade['por_estado'].items()]
+        linhas += [
+            '# HELP wallecreator_tarefas_atraso_segundos Há quanto tempo a tarefa pronta mais antiga espera.',
+            '# TYPE wallecreator_tarefas_atraso_segundos gauge',
+            f'wallecreator_tarefas_atraso_segundos {profundidade["atraso_s"]}',
+            '# HELP wallecreator_tarefas_total Tarefas por tipo e evento.',
+            '# TYPE wallecreator_tarefas_total counter',
+        ]
+        linhas += [f'wallecreator_tarefas_total{{tipo="{tipo}",evento="{evento}"}} {total}'
+                   for (evento, tipo), total in sorted(self.contagens.items())]
+        with self._lock:
+            linhas += self.espera.exportar() + self.duracao.exportar()
+        return linhas
+
+
+fila = Fila()
+
+sa.event.listen(so.Session, 'after_commit', fila._depois_do_commit)
+sa.event.listen(so.Session, 'after_rollback', fila._depois_do_rollback)
+
+
+cli = AppGroup('tarefas', help='Fila de tarefas em segundo plano.')
+
+
+@cli.command('trabalhar')
+@click.option('--ate-esvaziar', is_flag=True, help='Sai quando não houver tarefa pronta.')
+def trabalhar_comando(ate_esvaziar):
+    """Executa as tarefas da fila neste processo (Ctrl+C para parar)."""
+    if ate_esvaziar:
+        fila.recuperar_expiradas()
+        total = 0
+        while fila.executar_proxima():
+            total += 1
+        click.echo(f'{total} tarefas executadas.')
+        return
+    try:
+        fila.trabalhar(threading.Event())
+    except KeyboardInterrupt:
+        pass
+
+
+@cli.command('estado')
+def estado_comando():
+    """Mostra a profundidade da fila e o atraso da tarefa pronta mais antiga."""
+    profundidade = fila.profundidade()
+    for estado, total in profundidade['por_estado'].items():
+        click.echo(f'{estado:<11} {total}')
+    click.echo(f'atraso      {profundidade["atraso_s"]} s')
+
+
+@cli.command('limpar')
+@click.option('--dias', type=float, default=7, show_default=True, help='Idade mínima das tarefas removidas.')
+def limpar_comando(dias):
+    """Remove tarefas concluídas há mais de N dias (as que falharam ficam para análise)."""
+    resultado = db.session.execute(
+        sa.delete(tarefa_t).where(tarefa_t.c.estado == CONCLUIDA, tarefa_t.c.concluida_em < time.time() - dias * 86400)
+    )
+    db.session.commit()
+    click.echo(f'{resultado.rowcount} tarefas removidas.')
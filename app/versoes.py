@@ -0,0 +1,110 @@
+import functools
+import hashlib
+
+import sqlalchemy as sa
+import sqlalchemy.orm as so
+from flask import g, make_response, request, session
+
+from app.models import db, Projeto, Componente, ProjetoComponente, CatalogoVersao
+
+# Versões por entidade (Projeto.versao / Componente.versao) e versão global
+# do catálogo, e o GET condicional (ETag / If-None-Match) construído sobre elas.
+
+CLASSES_CATALOGO = (Projeto, Componente, ProjetoComponente)
+
+
+def incrementar_catalogo(conexao):
+    conexao.execute(sa.update(CatalogoVersao).where(CatalogoVersao.id == 1)
+                    .values(versao=CatalogoVersao.versao + 1))
+
+
+def versao_catalogo():
+    return db.session.scalar(sa.select(CatalogoVersao.versao).where(CatalogoVersao.id == 1)) or 0
+
+
+@sa.event.listens_for(so.Session, 'before_flush')
+def _incrementar_versoes(session, flush_context, instances):
+    # Incremento feito no próprio UPDATE (versao = versao + 1), sem corrida entre workers
+    for obj in session.dirty:
+        if isinstance(obj, Projeto) and session.is_modified(obj, include_collections=False):
+            obj.versao = Projeto.versao + 1
+        elif isinstance(obj, Componente) and session.is_modified(obj, include_collections=False):
+            obj.versao = Componente.versao + 1
+
+
+@sa.event.listens_for(so.Session, 'after_flush')
+def _incrementar_catalogo(session, flush_context):
+    alterado = any(isinstance(obj, CLASSES_CATALOGO) for obj in session.new) \
+        or any(isinstance(obj, CLASSES_CATALOGO) for obj in session.deleted) \
+        or any(isinstance(obj, CLASSES_CATALOGO) and session.is_modified(obj) for obj in session.dirty)
+    if alterado:
+        incrementar_catalogo(session.connection())
+
+
+def _etag(*partes):
+    return hashlib.sha1(repr(partes).encode()).hexdigest()
+
+
+def etag_catalogo():
+    # Listagens e busca: mudam com qualquer escrita no catálogo
+    return _etag(request.full_path, versao_catalogo())
+
+
+def etag_projeto(id):
+    versao = db.session.scalar(sa.select(Projeto.versao).where(Projeto.id == id))
+    if versao is None:
+        return None
+    componentes = db.session.execute(
+        sa.select(Componente.id, Componente.versao)
+        .join(ProjetoComponente, ProjetoComponente.componente_id == Componente.id)
+        .where(ProjetoComponente.projeto_id == id)
+        .order_by(Componente.id)
+    ).all()
+    return _etag('projeto', id, versao, [tuple(linha) for linha in componentes])
+
+
+def etag_componente(id):
+    versao = db.session.scalar(sa.select(Componente.versao).where(Componente.id == id))
+    if versao is None:
+        return None
+    projetos = db.session.execute(
+        sa.select(Projeto.id, Projeto.versao)
+        .join(ProjetoComponente, ProjetoComponente.projeto_id == Projeto.id)
+        .where(ProjetoComponente.componente_id == id)
+        .order_by(Projeto.id)
+    ).all()
+    return _etag('componente', id, versao, [tuple(linha) for linha in projetos])
+
+
+def condicional(calcular_etag):
+    """Responde 304 quando o If-None-Match bate com o ETag atual.
+
+    O ETag é calculado antes da rota, então um 304 não renderiza template
+    nem carrega relacionamentos. `calcular_etag` recebe os mesmos argumentos
+    da rota e pode devolver None para desligar a verificação.
+    """
+    def decorador(view):
+        @functools.wraps(view)
+        def wrapper(*args, **kwargs):
+            # Mensagens flash pendentes precisam ser renderizadas
+            if session.get('_flashes'):
+                return view(*args, **kwargs)
+
+            etag = calcular_etag(*args, **kwargs)
+            if etag is None:
+                return view(*args, **kwargs)
+            # Chave do cache de páginas (cache.pagina): corpo e ETag da mesma versão
+            g.etag = etag
+
+            # Comparação fraca (RFC 9110): a compressão entrega o ETag como W/"..."
+            if request.if_none_match.contains_weak(etag):
+                resposta = make_response('', 304)
+            else:
+                resposta = make_response(view(*args, **kwargs))
+                if resposta.status_code != 200:
+                    return resposta
+            resposta.set_etag(etag)
+            resposta.headers['Cache-Control'] = 'no-cache'
+            return resposta
+        return wrapper
+    return decorador
@@ -0,0 +1,43 @@
+"""Compara dois resultados de benchmarks.executar, rota a rota.
+
+Uso: python -m benchmarks.comparar antigo.json novo.json
+"""
+import json
+import sys
+
+METRICAS = ['p50_ms', 'p95_ms', 'p99_ms', 'sql_media']
+
+
+def carregar(caminho):
+    with open(caminho, encoding='utf-8') as arquivo:
+        return json.load(arquivo)
+
+
+def variacao(antes, depois):
+    if not antes:
+        return '   n/a'
+    return f'{(depois - antes) / antes * 100:+6.1f}%'
+
+
+def main(argv=None):
+    argv = sys.argv[1:] if argv is None else argv
+    if len(argv) != 2:
+        print(__doc__.strip(), file=sys.stderr)
+        return 2
+
+    antigo, novo = carregar(argv[0]), carregar(argv[1])
+    if (antigo['escala'], antigo['semente']) != (novo['escala'], novo['semente']):
+        print('Aviso: escala ou semente diferentes entre os resultados.', file=sys.stderr)
+
+    print(f"{antigo.get('commit')} -> {novo.get('commit')} ({novo['escala']}, semente {novo['semente']})")
+    print(f"{'rota':<28}" + ''.join(f'{m:>22}' for m in METRICAS))
+    for rota in sorted(set(antigo['rotas']) & set(novo['rotas'])):
+        a, n = antigo['rotas'][rota], novo['rotas'][rota]
+        colunas = ''.join(f'{n[m]:>13.2f} {variacao(a[m], n[m])}' for m in METRICAS)
+        print(f'{rota:<28}{colunas}')
+    print(f"{'rss_pico_kb':<28}{novo['rss_pico_kb']:>13} {variacao(antigo['rss_pico_kb'], novo['rss_pico_kb'])}")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,213 @@
+"""Benchmark das rotas da aplicação com o test client do Flask.
+
+Uso (a partir da raiz do repositório):
+
+    python -m benchmarks.executar --escala pequena --requisicoes 200
+    python -m benchmarks.executar --escala pequena --escala media
+
+Cada escala roda em um processo separado (o pico de RSS é por processo) e
+grava um JSON em benchmarks/resultados/, que pode ser comparado com
+`python -m benchmarks.comparar antigo.json novo.json`.
+"""
+import argparse
+import datetime
+import json
+import os
+import platform
+import random
+import re
+import resource
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+import sqlalchemy as sa
+
+RAIZ = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+PASTA_RESULTADOS = os.path.join(RAIZ, 'benchmarks', 'resultados')
+
+CONSULTAS = [
+    'se', 'serv', 'servo', 'servo sg90', 'sensor', 'sensor ultra', 'motor', 'motor de passo',
+    'arduino', 'arduino nano', 'esp', 'esp32', 'temperatura', 'ponte h', 'camera', 'câmera',
+    'robótica', 'i2c', 'protoboard', 'xyzw',
+]
+
+
+def percentil(valores, p):
+    ordenados = sorted(valores)
+    indice = max(0, min(len(ordenados) - 1, round(p / 100 * len(ordenados) + 0.5) - 1))
+    return ordenados[indice]
+
+
+def cenarios(totais):
+    from app.paginacao import decodificar_cursor
+
+    total_componentes, total_projetos, _ = totais
+    cursor = {}
+    contador = iter(range(10 ** 9))
+
+    def pagina_profunda(cliente, rng, rota):
+        # Cada chamada segue o link "próximo" da anterior; ao chegar ao fim, recomeça
+        resposta = cliente.get(cursor.get(rota, rota))
+        seguintes = [c for c in re.findall(r'cursor=([\w-]+)', resposta.get_data(as_text=True))
+                     if decodificar_cursor(c)[0] == '>']
+        cursor[rota] = f'{rota}?cursor={seguintes[0]}' if seguintes else rota
+        return resposta
+
+    def editar_projeto(cliente, rng):
+        id_ = rng.randint(1, total_projetos)
+        return cliente.post(f'/projeto/editar/{id_}', data={
+            'nome': f'Projeto editado {id_}',
+            'descricao': 'Descrição atualizada pelo benchmark.',
+            'url': 'https://github.com/exemplo/editado',
+            'componentes': [str(rng.randint(1, total_componentes)) for _ in range(10)],
+        })
+
+    def novo_componente(cliente, rng):
+        return cliente.post('/componente/novo', data={
+            'nome': f'Componente benchmark {next(contador)}',
+            'descricao': 'Criado pelo benchmark.',
+            'url': 'https://loja.exemplo.com.br/produto/novo',
+            'quantidade': rng.randint(0, 100),
+        })
+
+    return {
+        'index': lambda c, rng: c.get('/'),
+        'lista_projetos': lambda c, rng: c.get('/projetos'),
+        'lista_projetos_profunda': lambda c, rng: pagina_profunda(c, rng, '/projetos'),
+        'lista_componentes': lambda c, rng: c.get('/componentes'),
+        'lista_componentes_profunda': lambda c, rng: pagina_profunda(c, rng, '/componentes'),
+        'detalhes_projeto': lambda c, rng: c.get(f'/projeto/detalhes/{rng.randint(1, total_projetos)}'),
+        'detalhes_componente': lambda c, rng: c.get(f'/componente/detalhes/{rng.randint(1, total_componentes)}'),
+        'projeto_form_novo': lambda c, rng: c.get('/projeto/novo'),
+        'projeto_form_editar': lambda c, rng: c.get(f'/projeto/editar/{rng.randint(1, total_projetos)}'),
+        'componente_form_novo': lambda c, rng: c.get('/componente/novo'),
+        'editar_projeto_post': editar_projeto,
+        'novo_componente_post': novo_componente,
+        'api_search': lambda c, rng: c.get('/api/search?q=' + rng.choice(CONSULTAS)),
+    }
+
+
+def medir(app, cenario, requisicoes, aquecimento, rng, contagem_sql):
+    cliente = app.test_client()
+    for _ in range(aquecimento):
+        cenario(cliente, rng)
+
+    latencias, consultas, status = [], [], {}
+    for _ in range(requisicoes):
+        contagem_sql[0] = 0
+        inicio = time.perf_counter()
+        resposta = cenario(cliente, rng)
+        latencias.append(time.perf_counter() - inicio)
+        consultas.append(contagem_sql[0])
+        status[resposta.status_code] = status.get(resposta.status_code, 0) + 1
+
+    return {
+        'requisicoes': requisicoes,
+        'p50_ms': percentil(latencias, 50) * 1000,
+        'p95_ms': percentil(latencias, 95) * 1000,
+        'p99_ms': percentil(latencias, 99) * 1000,
+        'media_ms': statistics.mean(latencias) * 1000,
+        'req_por_s': requisicoes / sum(latencias),
+        'sql_media': statistics.mean(consultas),
+        'sql_max': max(consultas),
+        'status': {str(codigo): total for codigo, total in sorted(status.items())},
+    }
+
+
+def commit_atual():
+    try:
+        return subprocess.run(
+            ['git', 'rev-parse', '--short', 'HEAD'], cwd=RAIZ, capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def executar_escala(args):
+    sys.path.insert(0, RAIZ)
+    from __init__ import create_app, db
+    from app.config import Config
+    from benchmarks.gerador import gerar
+
+    pasta = tempfile.mkdtemp(prefix='bench-')
+
+    class BenchmarkConfig(Config):
+        SQLALCHEMY_DATABASE_URI = 'sqlite:///' + os.path.join(pasta, 'bench.db')
+        WTF_CSRF_ENABLED = False
+        CACHE_TIPO = 'lru' if args.cache else 'nulo'
+
+    app = create_app(BenchmarkConfig)
+    with app.app_context():
+        inicio = time.perf_counter()
+        totais = gerar(args.escala[0], args.semente)
+        tempo_geracao = time.perf_counter() - inicio
+
+        contagem_sql = [0]
+        sa.event.listen(db.engine, 'before_cursor_execute',
+                        lambda *a, **k: contagem_sql.__setitem__(0, contagem_sql[0] + 1))
+
+    rng = random.Random(args.semente)
+    rotas = {}
+    for nome, cenario in cenarios(totais).items():
+        if args.rota and nome not in args.rota:
+            continue
+        rotas[nome] = medir(app, cenario, args.requisicoes, args.aquecimento, rng, contagem_sql)
+        print(f"{args.escala[0]:>8} {nome:<28} p50={rotas[nome]['p50_ms']:8.2f}ms "
+              f"p95={rotas[nome]['p95_ms']:8.2f}ms sql={rotas[nome]['sql_media']:.1f}", file=sys.stderr)
+
+    resultado = {
+        'escala': args.escala[0],
+        'semente': args.semente,
+        'cache': args.cache,
+        'dados': dict(zip(('componentes', 'projetos', 'associacoes'), totais)),
+        'tempo_geracao_s': tempo_geracao,
+        'rss_pico_kb': resource.getrusage(resource.RUSAGE_SELF).ru_maxrss,
+        'commit': commit_atual(),
+        'python': platform.python_version(),
+        'data': datetime.datetime.now(datetime.timezone.utc).isoformat(),
+        'rotas': rotas,
+    }
+
+    os.makedirs(args.saida, exist_ok=True)
+    nome_arquivo = f"{datetime.datetime.now():%Y%m%d-%H%M%S}-{args.escala[0]}.json"
+    caminho = os.path.join(args.saida, nome_arquivo)
+    with open(caminho, 'w', encoding='utf-8') as saida:
+        json.dump(resultado, saida, indent=2, ensure_ascii=False)
+    print(caminho)
+
+
+def main():
+    from benchmarks.gerador import ESCALAS
+
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--escala', action='append', choices=sorted(ESCALAS), help='Pode ser repetida (padrão: pequena).')
+    parser.add_argument('--requisicoes', type=int, default=100, help='Requisições medidas por rota.')
+    parser.add_argument('--aquecimento', type=int, default=5, help='Requisições descartadas por rota.')
+    parser.add_argument('--semente', type=int, default=42)
+    parser.add_argument('--rota', action='append', help='Mede só as rotas informadas.')
+    parser.add_argument('--cache', action='store_true', help='Mantém o cache de páginas ligado.')
+    parser.add_argument('--saida', default=PASTA_RESULTADOS)
+    args = parser.parse_args()
+    args.escala = args.escala or ['pequena']
+
+    if len(args.escala) == 1:
+        executar_escala(args)
+        return
+
+    # Uma escala por processo, para que o pico de RSS seja de cada uma
+    for escala in args.escala:
+        comando = [sys.executable, '-m', 'benchmarks.executar', '--escala', escala,
+                   '--requisicoes', str(args.requisicoes), '--aquecimento', str(args.aquecimento),
+                   '--semente', str(args.semente), '--saida', args.saida]
+        for rota in args.rota or []:
+            comando += ['--rota', rota]
+        if args.cache:
+            comando.append('--cache')
+        subprocess.run(comando, cwd=RAIZ, check=True)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,99 @@
+import random
+
+import sqlalchemy as sa
+
+from app.models import db, Projeto, Componente, ProjetoComponente
+from app import busca, contadores
+
+# Gerador de catálogo sintético, reprodutível pela semente.
+
+# escala: (componentes, projetos, componentes por projeto)
+ESCALAS = {
+    'pequena': (500, 100, 10),        # 1 mil associações
+    'media': (10_000, 5_000, 20),     # 100 mil associações
+    'grande': (100_000, 50_000, 20),  # 1 milhão de associações
+}
+
+TIPOS = [
+    'Servo', 'Micro Servo', 'Motor DC', 'Motor de passo', 'Sensor ultrassônico',
+    'Sensor de temperatura', 'Sensor infravermelho', 'Módulo relé', 'Ponte H',
+    'Arduino', 'Placa', 'Display LCD', 'Display OLED', 'Bateria', 'Regulador de tensão',
+    'Resistor', 'Capacitor', 'LED', 'Buzzer', 'Encoder', 'Roda', 'Chassi', 'Câmera',
+    'Módulo Bluetooth', 'Módulo Wi-Fi', 'Giroscópio', 'Acelerômetro', 'Potenciômetro',
+]
+MODELOS = ['SG90', 'MG995', 'HC-SR04', 'DHT11', 'DS18B20', 'L298N', 'Uno', 'Nano',
+           'Mega', 'ESP32', 'ESP8266', 'MPU6050', 'NEMA17', 'A4988', '16x2', '0.96"',
+           'LM7805', 'HC-05', 'OV7670', '18650', 'TCRT5000', 'KY-040']
+CARACTERISTICAS = [
+    'alimentação de 5V', 'tensão de operação de 3,3V a 5V', 'baixo consumo de energia',
+    'torque de 1,8 kg.cm', 'alcance de 2 cm a 4 m', 'comunicação I2C', 'interface SPI',
+    'precisão de ±0,5 °C', 'corrente máxima de 2 A', 'encaixe padrão para protoboard',
+    'ideal para projetos de robótica educacional', 'compatível com Arduino e Raspberry Pi',
+    'engrenagens de metal', 'rotação de 180 graus', 'saída digital e analógica',
+]
+FRASES = [
+    'Componente muito utilizado em robôs seguidores de linha.',
+    'Recomendado para protótipos e projetos de automação residencial.',
+    'Acompanha cabos e parafusos de fixação.',
+    'Verifique a pinagem antes de ligar ao microcontrolador.',
+    'Pode ser controlado por PWM.',
+    'Usado em braços robóticos e carrinhos autônomos.',
+]
+ADJETIVOS = ['Autônomo', 'Seguidor', 'Explorador', 'Educacional', 'Compacto', 'Solar', 'Aquático', 'Articulado']
+SUBSTANTIVOS = ['Robô', 'Carrinho', 'Braço', 'Drone', 'Estação', 'Rover', 'Aspirador', 'Hexápode']
+
+
+def descricao(rng):
+    partes = rng.sample(CARACTERISTICAS, 3)
+    texto = f'Possui {partes[0]}, {partes[1]} e {partes[2]}. '
+    return texto + ' '.join(rng.sample(FRASES, rng.randint(1, 3)))
+
+
+def nome_componente(rng):
+    return f'{rng.choice(TIPOS)} {rng.choice(MODELOS)}'
+
+
+def gerar(escala='pequena', semente=42, lote=5000):
+    """Apaga e repovoa o banco da aplicação atual. Devolve (componentes, projetos, associações)."""
+    total_componentes, total_projetos, por_projeto = ESCALAS[escala]
+    rng = random.Random(semente)
+
+    db.drop_all()
+    db.create_all()
+    conexao = db.session.connection()
+
+    for inicio in range(0, total_componentes, lote):
+        conexao.execute(sa.insert(Componente.__table__), [
+            {
+                'nome': nome_componente(rng),
+                'descricao': descricao(rng),
+                'url': f'https://loja.exemplo.com.br/produto/{i}',
+                'quantidade': rng.choice([0, 0, 1, 2, 5, 10, 20, 50, 100]),
+            }
+            for i in range(inicio, min(inicio + lote, total_componentes))
+        ])
+
+    for inicio in range(0, total_projetos, lote):
+        conexao.execute(sa.insert(Projeto.__table__), [
+            {
+                'nome': f'{rng.choice(SUBSTANTIVOS)} {rng.choice(ADJETIVOS)} {i}',
+                'descricao': descricao(rng),
+                'url': f'https://github.com/exemplo/projeto-{i}',
+            }
+            for i in range(inicio, min(inicio + lote, total_projetos))
+        ])
+
+    associacoes = []
+    for projeto_id in range(1, total_projetos + 1):
+        for componente_id in rng.sample(range(1, total_componentes + 1), por_projeto):
+            associacoes.append({'projeto_id': projeto_id, 'componente_id': componente_id})
+        if len(associacoes) >= lote:
+            conexao.execute(sa.insert(ProjetoComponente.__table__), associacoes)
+            associacoes = []
+    if associacoes:
+        conexao.execute(sa.insert(ProjetoComponente.__table__), associacoes)
+
+    busca.reindexar_tudo(conexao)
+    contadores.recalcular_tudo(conexao)
+    db.session.commit()
+    return total_componentes, total_projetos, total_projetos * por_projeto
@@ -0,0 +1,150 @@
+"""Benchmark da partida da aplicação: importação, create_app e primeiras requisições.
+
+Uso (a partir da raiz do repositório):
+
+    python -m benchmarks.inicializacao --repeticoes 10
+
+Cada medição roda em um interpretador novo, em três modos:
+
+    frio      sem bytecode dos templates e com o Flask-Migrate carregado
+    bytecode  templates lidos do bytecode gerado no build, sem Flask-Migrate
+              (como um worker do gunicorn.conf.py sem preload)
+    aquecido  como bytecode, mas as requisições só começam depois de
+              inicializacao.aquecer (o que o worker herda do mestre no fork)
+
+Grava um JSON em benchmarks/resultados/ com a mediana de cada etapa.
+"""
+import argparse
+import datetime
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+RAIZ = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+PASTA_RESULTADOS = os.path.join(RAIZ, 'benchmarks', 'resultados')
+
+MODOS = ('frio', 'bytecode', 'aquecido')
+ROTAS = ['/', '/componentes', '/projetos', '/componente/detalhes/1', '/projeto/detalhes/1', '/projeto/novo']
+
+
+def medir_processo(aquecer):
+    # Roda no interpretador filho; a configuração vem das variáveis de ambiente
+    inicio = time.perf_counter()
+    sys.path.insert(0, RAIZ)
+    from __init__ import create_app
+    importado = time.perf_counter()
+    app = create_app()
+    criado = time.perf_counter()
+    if aquecer:
+        from app.inicializacao import aquecer
+        aquecer(app)
+    aquecido = time.perf_counter()
+
+    cliente = app.test_client()
+    primeiras = {}
+    for rota in ROTAS:
+        antes = time.perf_counter()
+        resposta = cliente.get(rota)
+        primeiras[rota] = (time.perf_counter() - antes) * 1000
+        if resposta.status_code != 200:
+            raise SystemExit(f'{rota}: status {resposta.status_code}')
+
+    print(json.dumps({
+        'importacao_ms': (importado - inicio) * 1000,
+        'create_app_ms': (criado - importado) * 1000,
+        'aquecimento_ms': (aquecido - criado) * 1000,
+        'primeiras_requisicoes_ms': sum(primeiras.values()),
+        'rotas': primeiras,
+        'flask_migrate': 'flask_migrate' in sys.modules,
+    }))
+
+
+def preparar(pasta):
+    # Banco com o catálogo pequeno e bytecode dos templates, feitos uma vez
+    sys.path.insert(0, RAIZ)
+    from __init__ import create_app
+    from app.config import Config
+    from benchmarks.gerador import gerar
+
+    class PreparoConfig(Config):
+        SQLALCHEMY_DATABASE_URI = 'sqlite:///' + os.path.join(pasta, 'inicializacao.db')
+        TEMPLATES_BYTECODE = os.path.join(pasta, 'templates')
+
+    app = create_app(PreparoConfig)
+    with app.app_context():
+        gerar('pequena')
+    resultado = app.test_cli_runner().invoke(args=['inicializacao', 'compilar-templates'])
+    if resultado.exit_code != 0:
+        raise SystemExit(resultado.output)
+    return PreparoConfig.SQLALCHEMY_DATABASE_URI, PreparoConfig.TEMPLATES_BYTECODE
+
+
+def ambiente(modo, banco, bytecode, pasta):
+    env = dict(os.environ, DATABASE_URL=banco, CACHE_TIPO='nulo', INSTRUMENTACAO='0')
+    env.pop('APP_ENV', None)
+    if modo == 'frio':
+        env.update(TEMPLATES_BYTECODE=os.path.join(pasta, 'sem-bytecode'), MIGRACOES='1')
+    else:
+        env.update(TEMPLATES_BYTECODE=bytecode, MIGRACOES='0')
+    return env
+
+
+def main():
+    from benchmarks.executar import commit_atual
+
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--repeticoes', type=int, default=10, help='Processos medidos por modo.')
+    parser.add_argument('--modo', action='append', choices=MODOS, help='Pode ser repetido (padrão: todos).')
+    parser.add_argument('--saida', default=PASTA_RESULTADOS)
+    parser.add_argument('--medir', choices=MODOS, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.medir:
+        medir_processo(args.medir == 'aquecido')
+        return
+
+    pasta = tempfile.mkdtemp(prefix='bench-inicializacao-')
+    banco, bytecode = preparar(pasta)
+
+    modos = {}
+    for modo in args.modo or MODOS:
+        medicoes = []
+        for _ in range(args.repeticoes):
+            comando = [sys.executable, '-m', 'benchmarks.inicializacao', '--medir', modo]
+            saida = subprocess.run(comando, cwd=RAIZ, env=ambiente(modo, banco, bytecode, pasta),
+                                   capture_output=True, text=True, check=True).stdout
+            medicoes.append(json.loads(saida.strip().splitlines()[-1]))
+
+        etapas = ('importacao_ms', 'create_app_ms', 'aquecimento_ms', 'primeiras_requisicoes_ms')
+        modos[modo] = {etapa: statistics.median(m[etapa] for m in medicoes) for etapa in etapas}
+        modos[modo]['rotas'] = {
+            rota: statistics.median(m['rotas'][rota] for m in medicoes) for rota in ROTAS
+        }
+        modos[modo]['flask_migrate'] = medicoes[0]['flask_migrate']
+        print(f"{modo:<9} importação={modos[modo]['importacao_ms']:7.1f}ms "
+              f"create_app={modos[modo]['create_app_ms']:6.1f}ms "
+              f"aquecimento={modos[modo]['aquecimento_ms']:6.1f}ms "
+              f"primeiras requisições={modos[modo]['primeiras_requisicoes_ms']:6.1f}ms", file=sys.stderr)
+
+    resultado = {
+        'repeticoes': args.repeticoes,
+        'rotas': ROTAS,
+        'commit': commit_atual(),
+        'python': platform.python_version(),
+        'data': datetime.datetime.now(datetime.timezone.utc).isoformat(),
+        'modos': modos,
+    }
+    os.makedirs(args.saida, exist_ok=True)
+    caminho = os.path.join(args.saida, f"{datetime.datetime.now():%Y%m%d-%H%M%S}-inicializacao.json")
+    with open(caminho, 'w', encoding='utf-8') as saida:
+        json.dump(resultado, saida, indent=2, ensure_ascii=False)
+    print(caminho)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,31 @@
+import multiprocessing
+import os
+
+# gunicorn -c gunicorn.conf.py
+# A aplicação é criada e aquecida uma vez no processo mestre (preload_app);
+# os workers nascem do fork com mappers, templates e dialeto prontos.
+
+wsgi_app = 'run:app'
+bind = os.environ.get('BIND', '0.0.0.0:8000')
+workers = int(os.environ.get('WEB_CONCURRENCY', multiprocessing.cpu_count() * 2 + 1))
+preload_app = True
+# Os workers web não usam o Flask-Migrate (nem importam o Alembic) nem
+# executam a fila de tarefas: um processo `flask tarefas trabalhar` à parte
+# faz isso, em vez de threads consultando a fila em cada worker
+raw_env = ['MIGRACOES=0', 'TAREFAS_TRABALHADORES=0']
+
+
+def when_ready(server):
+    from run import app
+    from app.inicializacao import aquecer
+    aquecer(app)
+
+
+def post_fork(server, worker):
+    # O pool herdado do mestre é descartado sem fechar as conexões dele;
+    # cada worker abre as suas
+    from run import app
+    from app.extensoes import db
+    with app.app_context():
+        for engine in db.engines.values():
+            engine.dispose(close=False)
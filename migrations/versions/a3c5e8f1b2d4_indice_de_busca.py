@@ -0,0 +1,49 @@
+"""indice de busca de componentes
+
+Revision ID: a3c5e8f1b2d4
+Revises: e3f0c71921c8
+Create Date: 2026-10-18 09:12:41.318204
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'a3c5e8f1b2d4'
+down_revision = 'e3f0c71921c8'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table('componente_termo',
+    sa.Column('termo', sa.String(length=100), nullable=False),
+    sa.Column('componente_id', sa.Integer(), nullable=False),
+    sa.Column('peso', sa.Integer(), nullable=False),
+    sa.ForeignKeyConstraint(['componente_id'], ['componente.id'], ondelete='CASCADE'),
+    sa.PrimaryKeyConstraint('termo', 'componente_id')
+    )
+    with op.batch_alter_table('componente_termo', schema=None) as batch_op:
+        batch_op.create_index(batch_op.f('ix_componente_termo_componente_id'), ['componente_id'], unique=False)
+
+    # SQLite: tabela FTS5 (a mesma de app.busca.CRIAR_FTS) com os componentes
+    # já cadastrados. Nos outros bancos os termos de componente_termo vêm da
+    # tokenização da aplicação: depois do upgrade, rode `flask busca reindexar`
+    if op.get_bind().dialect.name == 'sqlite':
+        op.execute(
+            "CREATE VIRTUAL TABLE IF NOT EXISTS componente_fts USING fts5("
+            "nome, descricao, tokenize = 'unicode61 remove_diacritics 2', prefix = '2 3')"
+        )
+        op.execute('DELETE FROM componente_fts')
+        op.execute('INSERT INTO componente_fts (rowid, nome, descricao) SELECT id, nome, descricao FROM componente')
+
+
+def downgrade():
+    if op.get_bind().dialect.name == 'sqlite':
+        op.execute('DROP TABLE IF EXISTS componente_fts')
+
+    with op.batch_alter_table('componente_termo', schema=None) as batch_op:
+        batch_op.drop_index(batch_op.f('ix_componente_termo_componente_id'))
+
+    op.drop_table('componente_termo')
@@ -0,0 +1,44 @@
+"""fila de tarefas
+
+Revision ID: a9e3d5c1f7b2
+Revises: f4c1d8e6a3b7
+Create Date: 2026-10-18 15:46:13.429049
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'a9e3d5c1f7b2'
+down_revision = 'f4c1d8e6a3b7'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table('tarefa',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('tipo', sa.String(length=50), nullable=False),
+    sa.Column('argumentos', sa.Text(), nullable=False),
+    sa.Column('chave', sa.String(length=200), nullable=True),
+    sa.Column('estado', sa.String(length=20), nullable=False),
+    sa.Column('tentativas', sa.Integer(), nullable=False),
+    sa.Column('max_tentativas', sa.Integer(), nullable=False),
+    sa.Column('criada_em', sa.Float(), nullable=False),
+    sa.Column('executar_em', sa.Float(), nullable=False),
+    sa.Column('iniciada_em', sa.Float(), nullable=True),
+    sa.Column('concluida_em', sa.Float(), nullable=True),
+    sa.Column('trabalhador', sa.String(length=100), nullable=True),
+    sa.Column('erro', sa.Text(), nullable=True),
+    sa.PrimaryKeyConstraint('id'),
+    sa.UniqueConstraint('chave')
+    )
+    with op.batch_alter_table('tarefa', schema=None) as batch_op:
+        batch_op.create_index('ix_tarefa_estado_executar_em', ['estado', 'executar_em'], unique=False)
+
+
+def downgrade():
+    with op.batch_alter_table('tarefa', schema=None) as batch_op:
+        batch_op.drop_index('ix_tarefa_estado_executar_em')
+    op.drop_table('tarefa')
@@ -0,0 +1,37 @@
+"""indice de trigramas
+
+Revision ID: b5f2e8d4c7a1
+Revises: a9e3d5c1f7b2
+Create Date: 2026-10-18 18:02:37.581204
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'b5f2e8d4c7a1'
+down_revision = 'a9e3d5c1f7b2'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table('componente_trigrama',
+    sa.Column('trigrama', sa.String(length=3), nullable=False),
+    sa.Column('componente_id', sa.Integer(), nullable=False),
+    sa.ForeignKeyConstraint(['componente_id'], ['componente.id'], ondelete='CASCADE'),
+    sa.PrimaryKeyConstraint('trigrama', 'componente_id')
+    )
+    with op.batch_alter_table('componente_trigrama', schema=None) as batch_op:
+        batch_op.create_index(batch_op.f('ix_componente_trigrama_componente_id'), ['componente_id'], unique=False)
+
+    # Os trigramas vêm da normalização dos nomes feita pela aplicação: depois
+    # do upgrade, rode `flask similaridade reindexar` para os componentes já cadastrados
+
+
+def downgrade():
+    with op.batch_alter_table('componente_trigrama', schema=None) as batch_op:
+        batch_op.drop_index(batch_op.f('ix_componente_trigrama_componente_id'))
+
+    op.drop_table('componente_trigrama')
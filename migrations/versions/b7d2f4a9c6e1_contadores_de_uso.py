@@ -0,0 +1,42 @@
+"""contadores de uso em projeto e componente
+
+Revision ID: b7d2f4a9c6e1
+Revises: a3c5e8f1b2d4
+Create Date: 2026-10-18 11:03:27.504112
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'b7d2f4a9c6e1'
+down_revision = 'a3c5e8f1b2d4'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.batch_alter_table('projeto', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('total_componentes', sa.Integer(), server_default='0', nullable=False))
+
+    with op.batch_alter_table('componente', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('total_projetos', sa.Integer(), server_default='0', nullable=False))
+
+    # Preenche os contadores a partir das associações existentes
+    op.execute(
+        'UPDATE projeto SET total_componentes = '
+        '(SELECT count(*) FROM projeto_componente WHERE projeto_componente.projeto_id = projeto.id)'
+    )
+    op.execute(
+        'UPDATE componente SET total_projetos = '
+        '(SELECT count(*) FROM projeto_componente WHERE projeto_componente.componente_id = componente.id)'
+    )
+
+
+def downgrade():
+    with op.batch_alter_table('componente', schema=None) as batch_op:
+        batch_op.drop_column('total_projetos')
+
+    with op.batch_alter_table('projeto', schema=None) as batch_op:
+        batch_op.drop_column('total_componentes')
@@ -0,0 +1,41 @@
+"""versoes de projeto, componente e catalogo
+
+Revision ID: c4e9a1d7f3b8
+Revises: b7d2f4a9c6e1
+Create Date: 2026-10-18 13:40:09.772615
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'c4e9a1d7f3b8'
+down_revision = 'b7d2f4a9c6e1'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.batch_alter_table('projeto', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('versao', sa.Integer(), server_default='1', nullable=False))
+
+    with op.batch_alter_table('componente', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('versao', sa.Integer(), server_default='1', nullable=False))
+
+    op.create_table('catalogo_versao',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('versao', sa.Integer(), nullable=False),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.execute('INSERT INTO catalogo_versao (id, versao) VALUES (1, 1)')
+
+
+def downgrade():
+    op.drop_table('catalogo_versao')
+
+    with op.batch_alter_table('componente', schema=None) as batch_op:
+        batch_op.drop_column('versao')
+
+    with op.batch_alter_table('projeto', schema=None) as batch_op:
+        batch_op.drop_column('versao')
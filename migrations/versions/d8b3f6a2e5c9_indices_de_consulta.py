@@ -0,0 +1,34 @@
+"""indices de consulta: projeto_componente por componente e componente por (nome, id)
+
+Revision ID: d8b3f6a2e5c9
+Revises: c4e9a1d7f3b8
+Create Date: 2026-10-18 15:52:37.104926
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'd8b3f6a2e5c9'
+down_revision = 'c4e9a1d7f3b8'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.batch_alter_table('projeto_componente', schema=None) as batch_op:
+        batch_op.create_index('ix_projeto_componente_componente_id', ['componente_id', 'projeto_id'], unique=False)
+
+    with op.batch_alter_table('componente', schema=None) as batch_op:
+        batch_op.drop_index('ix_componente_nome')
+        batch_op.create_index('ix_componente_nome_id', ['nome', 'id'], unique=False)
+
+
+def downgrade():
+    with op.batch_alter_table('componente', schema=None) as batch_op:
+        batch_op.drop_index('ix_componente_nome_id')
+        batch_op.create_index('ix_componente_nome', ['nome'], unique=False)
+
+    with op.batch_alter_table('projeto_componente', schema=None) as batch_op:
+        batch_op.drop_index('ix_projeto_componente_componente_id')
@@ -0,0 +1,32 @@
+"""indices do painel: contadores de uso
+
+Revision ID: e2a7c4f9b1d6
+Revises: d8b3f6a2e5c9
+Create Date: 2026-10-18 16:24:51.630218
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'e2a7c4f9b1d6'
+down_revision = 'd8b3f6a2e5c9'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.batch_alter_table('projeto', schema=None) as batch_op:
+        batch_op.create_index(batch_op.f('ix_projeto_total_componentes'), ['total_componentes'], unique=False)
+
+    with op.batch_alter_table('componente', schema=None) as batch_op:
+        batch_op.create_index(batch_op.f('ix_componente_total_projetos'), ['total_projetos'], unique=False)
+
+
+def downgrade():
+    with op.batch_alter_table('componente', schema=None) as batch_op:
+        batch_op.drop_index(batch_op.f('ix_componente_total_projetos'))
+
+    with op.batch_alter_table('projeto', schema=None) as batch_op:
+        batch_op.drop_index(batch_op.f('ix_projeto_total_componentes'))
@@ -0,0 +1,111 @@
+"""esquema de projetos e componentes; remove empresa, jogo, genero e jogo_genero
+
+Revision ID: e3f0c71921c8
+Revises: 1531c9b357f6
+Create Date: 2026-10-18 15:21:09.647305
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'e3f0c71921c8'
+down_revision = '1531c9b357f6'
+branch_labels = None
+depends_on = None
+
+# As duas revisões anteriores criam o modelo antigo (jogos), que a aplicação
+# não usa; bancos criados com db.create_all já têm as tabelas de projetos
+
+
+def upgrade():
+    existentes = set(sa.inspect(op.get_bind()).get_table_names())
+
+    for tabela in ('jogo_genero', 'jogo', 'genero', 'empresa'):
+        if tabela in existentes:
+            op.drop_table(tabela)
+
+    if 'projeto' not in existentes:
+        op.create_table('projeto',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('nome', sa.String(length=100), nullable=False),
+        sa.Column('descricao', sa.Text(), nullable=False),
+        sa.Column('url', sa.String(length=200), nullable=False),
+        sa.PrimaryKeyConstraint('id')
+        )
+        with op.batch_alter_table('projeto', schema=None) as batch_op:
+            batch_op.create_index(batch_op.f('ix_projeto_nome'), ['nome'], unique=True)
+
+    if 'componente' not in existentes:
+        op.create_table('componente',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('nome', sa.String(length=100), nullable=False),
+        sa.Column('descricao', sa.Text(), nullable=False),
+        sa.Column('url', sa.String(length=200), nullable=False),
+        sa.Column('quantidade', sa.Integer(), nullable=False),
+        sa.PrimaryKeyConstraint('id')
+        )
+        with op.batch_alter_table('componente', schema=None) as batch_op:
+            batch_op.create_index(batch_op.f('ix_componente_nome'), ['nome'], unique=False)
+
+    if 'projeto_componente' not in existentes:
+        op.create_table('projeto_componente',
+        sa.Column('projeto_id', sa.Integer(), nullable=False),
+        sa.Column('componente_id', sa.Integer(), nullable=False),
+        sa.ForeignKeyConstraint(['componente_id'], ['componente.id'], ondelete='CASCADE'),
+        sa.ForeignKeyConstraint(['projeto_id'], ['projeto.id'], ondelete='CASCADE'),
+        sa.PrimaryKeyConstraint('projeto_id', 'componente_id')
+        )
+
+
+def downgrade():
+    op.drop_table('projeto_componente')
+    with op.batch_alter_table('componente', schema=None) as batch_op:
+        batch_op.drop_index(batch_op.f('ix_componente_nome'))
+
+    op.drop_table('componente')
+    with op.batch_alter_table('projeto', schema=None) as batch_op:
+        batch_op.drop_index(batch_op.f('ix_projeto_nome'))
+
+    op.drop_table('projeto')
+
+    # Volta ao esquema de 1531c9b357f6 (tabelas vazias)
+    op.create_table('empresa',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('nome', sa.String(length=100), nullable=False),
+    sa.Column('sede', sa.String(length=100), nullable=False),
+    sa.Column('ceo', sa.String(length=100), nullable=False),
+    sa.Column('fundacao', sa.DateTime(), nullable=False),
+    sa.PrimaryKeyConstraint('id')
+    )
+    with op.batch_alter_table('empresa', schema=None) as batch_op:
+        batch_op.create_index(batch_op.f('ix_empresa_nome'), ['nome'], unique=True)
+
+    op.create_table('genero',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('nome', sa.String(length=50), nullable=False),
+    sa.PrimaryKeyConstraint('id'),
+    sa.UniqueConstraint('nome')
+    )
+    op.create_table('jogo',
+    sa.Column('id_jogo', sa.Integer(), nullable=False),
+    sa.Column('nome', sa.String(length=100), nullable=False),
+    sa.Column('id_empresa', sa.Integer(), nullable=False),
+    sa.Column('lancamento', sa.DateTime(), nullable=False),
+    sa.Column('faixa_etaria', sa.String(length=10), nullable=True),
+    sa.Column('preco', sa.Float(), nullable=True),
+    sa.ForeignKeyConstraint(['id_empresa'], ['empresa.id'], ondelete='CASCADE'),
+    sa.PrimaryKeyConstraint('id_jogo')
+    )
+    with op.batch_alter_table('jogo', schema=None) as batch_op:
+        batch_op.create_index(batch_op.f('ix_jogo_id_empresa'), ['id_empresa'], unique=False)
+        batch_op.create_index(batch_op.f('ix_jogo_nome'), ['nome'], unique=False)
+
+    op.create_table('jogo_genero',
+    sa.Column('jogo_id', sa.Integer(), nullable=False),
+    sa.Column('genero_id', sa.Integer(), nullable=False),
+    sa.ForeignKeyConstraint(['genero_id'], ['genero.id'], ondelete='CASCADE'),
+    sa.ForeignKeyConstraint(['jogo_id'], ['jogo.id_jogo'], ondelete='CASCADE'),
+    sa.PrimaryKeyConstraint('jogo_id', 'genero_id')
+    )
@@ -0,0 +1,26 @@
+"""quantidade de cada componente usada pelo projeto
+
+Revision ID: f4c1d8e6a3b7
+Revises: e2a7c4f9b1d6
+Create Date: 2026-10-18 17:05:13.482960
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'f4c1d8e6a3b7'
+down_revision = 'e2a7c4f9b1d6'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.batch_alter_table('projeto_componente', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('quantidade', sa.Integer(), server_default='1', nullable=False))
+
+
+def downgrade():
+    with op.batch_alter_table('projeto_componente', schema=None) as batch_op:
+        batch_op.drop_column('quantidade')
@@ -0,0 +1,66 @@
+import os
+import sys
+
+import pytest
+import sqlalchemy as sa
+
+RAIZ = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, RAIZ)
+
+from __init__ import create_app  # noqa: E402
+from app.config import TestingConfig  # noqa: E402
+from app.extensoes import db  # noqa: E402
+
+
+@pytest.fixture
+def config():
+    # Os testes podem sobrescrever esta fixture com uma subclasse do TestingConfig
+    return TestingConfig
+
+
+@pytest.fixture
+def app(config):
+    # Sem contexto aberto durante o teste: cada requisição do client tem o
+    # seu, como em produção; preparação e conferência usam app.app_context()
+    app = create_app(config)
+    # Só o bind principal: o de leitura (quando existe) abre o mesmo arquivo
+    with app.app_context():
+        db.create_all(bind_key=None)
+    yield app
+    with app.app_context():
+        db.drop_all(bind_key=None)
+        for engine in db.engines.values():
+            engine.dispose()
+
+
+@pytest.fixture
+def client(app):
+    return app.test_client()
+
+
+class ContadorDeComandos:
+    """Registra os comandos SQL (com parâmetros) executados no engine principal enquanto ativo."""
+
+    def __init__(self, engine):
+        self.engine = engine
+        self.comandos = []
+
+    def _contar(self, conexao, cursor, comando, parametros, contexto, executemany):
+        self.comandos.append((comando, parametros))
+
+    def __enter__(self):
+        sa.event.listen(self.engine, 'before_cursor_execute', self._contar)
+        return self
+
+    def __exit__(self, *erro):
+        sa.event.remove(self.engine, 'before_cursor_execute', self._contar)
+
+    def __len__(self):
+        return len(self.comandos)
+
+
+@pytest.fixture
+def contar_comandos(app):
+    with app.app_context():
+        engine = db.engine
+    return lambda: ContadorDeComandos(engine)
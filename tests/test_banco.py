@@ -0,0 +1,83 @@
+import threading
+
+import pytest
+import sqlalchemy as sa
+
+from app.config import Config, TestingConfig
+from app.extensoes import db
+from app.models import Projeto
+from app.tarefas import fila
+
+
+@pytest.fixture
+def config(tmp_path):
+    # Arquivo com o bind de leitura (mode=ro), como em produção; sem busy_timeout,
+    # qualquer lock de escrita alheio faz a escrita da requisição falhar na hora
+    class ConfigComArquivo(TestingConfig):
+        SQLALCHEMY_DATABASE_URI = f"sqlite:///{tmp_path / 'banco.db'}"
+        SQLITE_PRAGMAS = {**Config.SQLITE_PRAGMAS, 'busy_timeout': 0}
+        INSTRUMENTACAO = True
+        TAREFAS_IMEDIATAS = False
+        TAREFAS_TRABALHADORES = 0
+        TAREFAS_INTERVALO = 0.001
+        TAREFAS_INTERVALO_MAXIMO = 0.001
+
+    return ConfigComArquivo
+
+
+def _inicios(app):
+    # Registra os BEGIN de todos os engines (principal e leitura)
+    inicios = []
+    with app.app_context():
+        for engine in db.engines.values():
+            sa.event.listen(engine, 'before_cursor_execute',
+                            lambda conexao, cursor, comando, *resto: comando.startswith('BEGIN') and inicios.append(comando))
+    return inicios
+
+
+def test_leituras_abrem_transacao_sem_lock_de_escrita(app, client):
+    inicios = _inicios(app)
+    with app.app_context():
+        assert fila.executar_proxima() is False
+        fila.recuperar_expiradas()
+    assert client.get('/metrics').status_code == 200
+    assert app.test_cli_runner().invoke(args=['tarefas', 'estado']).exit_code == 0
+    assert app.test_cli_runner().invoke(args=['banco', 'verificar-indices']).exit_code == 0
+
+    assert inicios and 'BEGIN IMMEDIATE' not in inicios
+
+    resposta = client.post('/projeto/novo', data={'nome': 'Robô', 'descricao': 'Robô', 'url': 'http://x.com'})
+    assert resposta.status_code == 302
+    assert 'BEGIN IMMEDIATE' in inicios
+
+
+def test_fila_ociosa_e_metrics_nao_bloqueiam_escrita(app):
+    parar = threading.Event()
+
+    def trabalhador():
+        with app.app_context():
+            fila.trabalhar(parar)
+
+    def metrics():
+        cliente = app.test_client()
+        while not parar.is_set():
+            cliente.get('/metrics')
+
+    threads = [threading.Thread(target=alvo) for alvo in (trabalhador, trabalhador, metrics)]
+    for thread in threads:
+        thread.start()
+    try:
+        cliente = app.test_client()
+        respostas = [
+            cliente.post('/projeto/novo', data={'nome': f'Robô {i}', 'descricao': 'Robô', 'url': 'http://x.com'})
+            for i in range(30)
+        ]
+    finally:
+        parar.set()
+        fila.acordar()
+        for thread in threads:
+            thread.join()
+
+    assert [resposta.status_code for resposta in respostas] == [302] * 30
+    with app.app_context():
+        assert db.session.scalar(sa.select(sa.func.count()).select_from(Projeto)) == 30
@@ -0,0 +1,58 @@
+import sqlite3
+
+from app import busca
+from app.extensoes import db
+from app.models import Componente, Projeto
+
+
+def _catalogo(app, prefixo, total):
+    with app.app_context():
+        componentes = [
+            Componente(nome=f'Servo {prefixo}{i}', descricao='Micro servo motor', url='http://x.com', quantidade=i)
+            for i in range(total)
+        ]
+        db.session.add_all(componentes)
+        # Cada componente em dois projetos: a serialização lê os projetos de todos
+        for j in range(0, total, 5):
+            for tipo in ('Robô', 'Braço'):
+                db.session.add(Projeto(nome=f'{tipo} {prefixo}{j}', descricao=tipo, url='http://x.com',
+                                       componentes=componentes[j:j + 5]))
+        db.session.commit()
+
+
+def _comandos_da_busca(client, contar_comandos, esperados):
+    with contar_comandos() as comandos:
+        resposta = client.get('/api/search?q=servo&limite=100')
+    assert resposta.status_code == 200
+    assert len(resposta.get_json()['componentes']) == esperados
+    return len(comandos)
+
+
+def test_busca_nao_cresce_em_comandos_com_os_resultados(app, client, contar_comandos):
+    _catalogo(app, 'SG', 10)
+    poucos = _comandos_da_busca(client, contar_comandos, 10)
+
+    _catalogo(app, 'MG', 40)
+    muitos = _comandos_da_busca(client, contar_comandos, 50)
+
+    assert muitos == poucos
+
+
+def test_busca_encontra_por_prefixo_sem_acentos(app, client):
+    with app.app_context():
+        db.session.add(Componente(nome='Motor elétrico', descricao='Motor DC', url='http://x.com', quantidade=1))
+        db.session.commit()
+
+    nomes = [c['nome'] for c in client.get('/api/search?q=eletr').get_json()['componentes']]
+
+    assert nomes == ['Motor elétrico']
+
+
+def test_tokenizar_separa_os_termos_como_a_fts5():
+    conexao = sqlite3.connect(':memory:')
+    conexao.execute(busca.CRIAR_FTS)
+    conexao.execute(f"CREATE VIRTUAL TABLE termos USING fts5vocab({busca.TABELA_FTS}, 'row')")
+    texto = 'Sensor HC_SR04 ultrassônico (5V) módulo_i2c'
+    conexao.execute(f'INSERT INTO {busca.TABELA_FTS} (nome, descricao) VALUES (?, ?)', (texto, ''))
+
+    assert sorted(busca.tokenizar(texto)) == [termo for (termo,) in conexao.execute('SELECT term FROM termos')]
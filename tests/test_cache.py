@@ -0,0 +1,54 @@
+import pytest
+import sqlalchemy as sa
+
+from app.config import TestingConfig
+from app.extensoes import db
+from app.models import Componente
+from app import busca, versoes
+
+
+class ConfigComCache(TestingConfig):
+    CACHE_TIPO = 'lru'
+
+
+@pytest.fixture
+def config():
+    return ConfigComCache
+
+
+def _componente(app, nome):
+    with app.app_context():
+        db.session.add(Componente(nome=nome, descricao='Servo', url='http://x.com', quantidade=1))
+        db.session.commit()
+
+
+def _escrita_de_outro_processo(app, nome):
+    # Escrita direto no banco, sem passar pelo cache deste processo
+    with app.app_context(), db.engine.begin() as conexao:
+        conexao.execute(sa.insert(Componente).values(nome=nome, descricao='x', url='http://x.com', quantidade=1))
+        versoes.incrementar_catalogo(conexao)
+        busca.reindexar_tudo(conexao)
+
+
+def test_pagina_guardada_nao_sobrevive_a_escrita_de_outro_processo(app, client):
+    _componente(app, 'Servo SG90')
+    antes = client.get('/componentes')
+    assert client.get('/componentes').get_data() == antes.get_data()
+    assert app.extensions['cache'].estatisticas()['acertos'] == 1
+
+    _escrita_de_outro_processo(app, 'Motor DC')
+    depois = client.get('/componentes')
+
+    assert depois.headers['ETag'] != antes.headers['ETag']
+    assert 'Motor DC' in depois.get_data(as_text=True)
+    revalidada = client.get('/componentes', headers={'If-None-Match': depois.headers['ETag']})
+    assert revalidada.status_code == 304
+
+
+def test_busca_guardada_segue_a_versao_do_catalogo(app, client):
+    _componente(app, 'Servo SG90')
+    assert len(client.get('/api/search?q=servo').get_json()['componentes']) == 1
+
+    _escrita_de_outro_processo(app, 'Servo MG995')
+
+    assert len(client.get('/api/search?q=servo').get_json()['componentes']) == 2
@@ -0,0 +1,71 @@
+import pytest
+import sqlalchemy as sa
+
+from app.extensoes import db
+from app.models import Componente, Projeto, ProjetoComponente, CatalogoVersao
+from app import estoque
+
+
+@pytest.fixture
+def projeto(app):
+    # Projeto que usa 2 unidades de cada um de dois componentes com 5 em estoque
+    with app.app_context():
+        componentes = [
+            Componente(nome=nome, descricao='x', url='http://x.com', quantidade=5)
+            for nome in ('Servo SG90', 'Motor DC')
+        ]
+        projeto = Projeto(nome='Robô', descricao='x', url='http://x.com', componentes=componentes)
+        db.session.add(projeto)
+        db.session.commit()
+        db.session.execute(sa.update(ProjetoComponente).values(quantidade=2))
+        db.session.commit()
+        return projeto.id
+
+
+def _estoque(app):
+    with app.app_context():
+        return db.session.scalars(sa.select(Componente.quantidade).order_by(Componente.id)).all()
+
+
+def _versao(app):
+    with app.app_context():
+        return db.session.scalar(sa.select(CatalogoVersao.versao))
+
+
+def test_reserva_do_projeto_desfeita_com_a_transacao(app, projeto):
+    versao = _versao(app)
+    with app.app_context():
+        restantes = estoque.reservar_projeto(db.session.connection(), projeto)
+        assert sorted(restantes.values()) == [3, 3]
+        db.session.rollback()
+
+    assert _estoque(app) == [5, 5]
+    assert _versao(app) == versao
+
+
+def test_reserva_do_projeto_confirmada_pela_rota(app, client, projeto):
+    resposta = client.post(f'/api/projeto/{projeto}/reservar', json={'vezes': 2})
+
+    assert resposta.status_code == 200
+    assert _estoque(app) == [1, 1]
+
+
+def test_reserva_sem_estoque_nao_baixa_nenhum_componente(app, client, projeto):
+    with app.app_context():
+        db.session.execute(sa.update(Componente).where(Componente.nome == 'Motor DC').values(quantidade=1))
+        db.session.commit()
+
+    resposta = client.post(f'/api/projeto/{projeto}/reservar', json={'vezes': 1})
+
+    assert resposta.status_code == 409
+    assert [falta['nome'] for falta in resposta.get_json()['faltas']] == ['Motor DC']
+    assert _estoque(app) == [5, 1]
+
+
+@pytest.mark.parametrize('url', ['/api/componente/1/reservar', '/api/componente/1/devolver',
+                                 '/api/projeto/1/reservar'])
+def test_corpo_que_nao_e_objeto_devolve_400(app, client, projeto, url):
+    resposta = client.post(url, json=[1])
+
+    assert resposta.status_code == 400
+    assert _estoque(app) == [5, 5]
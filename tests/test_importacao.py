@@ -0,0 +1,62 @@
+import io
+import json
+
+import sqlalchemy as sa
+
+from app.extensoes import db
+from app.models import Componente
+
+
+def _linha_jsonl(nome):
+    registro = {'tipo': 'componente', 'nome': nome, 'descricao': 'Peça', 'url': 'http://x.com', 'quantidade': 1}
+    return json.dumps(registro, ensure_ascii=False).encode() + b'\n'
+
+
+def _enviar(client, conteudo, nome_do_arquivo):
+    return client.post(
+        '/api/importar', data={'arquivo': (io.BytesIO(conteudo), nome_do_arquivo)},
+        content_type='multipart/form-data'
+    )
+
+
+def _nomes(app):
+    with app.app_context():
+        return db.session.scalars(sa.select(Componente.nome).order_by(Componente.nome)).all()
+
+
+def test_arquivo_fora_do_utf8_devolve_400_com_a_linha(app, client):
+    conteudo = _linha_jsonl('Servo') + _linha_jsonl('Sensor') + _linha_jsonl('Motor').replace(b'Motor', b'Mot\xf4r')
+    resposta = _enviar(client, conteudo, 'catalogo.jsonl')
+
+    assert resposta.status_code == 400
+    dados = resposta.get_json()
+    assert 'linha 3' in dados['error']
+    assert dados['erros'] == [{'linha': 3, 'erro': 'o arquivo não está em UTF-8'}]
+    # O que veio antes do erro é gravado
+    assert dados['componentes_inseridos'] == 2
+    assert _nomes(app) == ['Sensor', 'Servo']
+
+
+def test_csv_malformado_devolve_400_com_a_linha(app, client):
+    conteudo = (
+        'tipo,nome,descricao,url,quantidade\n'
+        'componente,Servo,Peça,http://x.com,1\n'
+        f'componente,Sensor,{"x" * 200000},http://x.com,1\n'
+        'componente,Motor,Peça,http://x.com,1\n'
+    ).encode()
+    resposta = _enviar(client, conteudo, 'catalogo.csv')
+
+    assert resposta.status_code == 400
+    dados = resposta.get_json()
+    assert dados['erros'][0]['linha'] == 3
+    assert dados['erros'][0]['erro'].startswith('CSV inválido')
+    assert _nomes(app) == ['Servo']
+
+
+def test_linha_jsonl_invalida_nao_interrompe_o_arquivo(app, client):
+    resposta = _enviar(client, _linha_jsonl('Servo') + b'{quebrado\n' + _linha_jsonl('Motor'), 'catalogo.jsonl')
+
+    assert resposta.status_code == 200
+    dados = resposta.get_json()
+    assert [erro['linha'] for erro in dados['erros']] == [2]
+    assert _nomes(app) == ['Motor', 'Servo']
@@ -0,0 +1,93 @@
+import os
+import shutil
+
+import pytest
+import sqlalchemy as sa
+from flask_migrate import downgrade, upgrade
+
+from conftest import RAIZ, create_app
+from app.config import TestingConfig
+from app.extensoes import db
+
+MIGRACOES = os.path.join(RAIZ, 'migrations')
+
+
+TABELAS_ANTIGAS = {'empresa', 'jogo', 'genero', 'jogo_genero'}
+
+
+def _app_com_arquivo(caminho):
+    # Banco em arquivo: o Alembic abre a própria conexão pelo engine do app
+    class ConfigComArquivo(TestingConfig):
+        SQLALCHEMY_DATABASE_URI = f'sqlite:///{caminho}'
+        LEITURA_SEPARADA = False
+        MIGRACOES = True
+
+    return create_app(ConfigComArquivo)
+
+
+@pytest.fixture
+def app_migrado(tmp_path):
+    app = _app_com_arquivo(tmp_path / 'migracoes.db')
+    with app.app_context():
+        upgrade(directory=MIGRACOES)
+    yield app
+    with app.app_context():
+        db.engine.dispose()
+
+
+def _contar(tabela):
+    with db.engine.connect() as conexao:
+        return conexao.execute(sa.text(f'SELECT count(*) FROM {tabela}')).scalar()
+
+
+def _tabelas():
+    return set(sa.inspect(db.engine).get_table_names())
+
+
+def test_cadeia_cria_o_esquema_da_aplicacao(app_migrado):
+    with app_migrado.app_context():
+        assert {'projeto', 'componente', 'projeto_componente'} <= _tabelas()
+        assert not TABELAS_ANTIGAS & _tabelas()
+
+        # ecf38a4b58a0 e 1531c9b357f6 criam o modelo antigo; e3f0c71921c8 troca pelo atual
+        downgrade(directory=MIGRACOES, revision='1531c9b357f6')
+        assert TABELAS_ANTIGAS <= _tabelas()
+        assert 'projeto' not in _tabelas()
+
+        downgrade(directory=MIGRACOES, revision='base')
+        upgrade(directory=MIGRACOES)
+        assert not TABELAS_ANTIGAS & _tabelas()
+
+
+def test_banco_do_create_all_sobe_pela_cadeia(tmp_path):
+    # app_new.db foi criado com db.create_all, sem alembic_version
+    caminho = tmp_path / 'app_new.db'
+    shutil.copy(os.path.join(RAIZ, 'app', 'app_new.db'), caminho)
+    app = _app_com_arquivo(caminho)
+    with app.app_context():
+        with db.engine.connect() as conexao:
+            projetos = conexao.execute(sa.text('SELECT count(*) FROM projeto')).scalar()
+
+        upgrade(directory=MIGRACOES)
+        assert _contar('projeto') == projetos
+        assert not TABELAS_ANTIGAS & _tabelas()
+        # a3c5e8f1b2d4 popula a FTS5 só com SQL, sem importar a aplicação
+        assert _contar('componente_fts') == _contar('componente') > 0
+        db.engine.dispose()
+
+
+def test_downgrade_em_lote_preserva_linhas_filhas(app_migrado):
+    with app_migrado.app_context():
+        with db.engine.begin() as conexao:
+            conexao.execute(sa.text("INSERT INTO projeto (id, nome, descricao, url) VALUES (1, 'Robô', '', '')"))
+            conexao.execute(sa.text("INSERT INTO componente (id, nome, descricao, url, quantidade) VALUES (1, 'Servo', '', '', 3)"))
+            conexao.execute(sa.text('INSERT INTO projeto_componente (projeto_id, componente_id) VALUES (1, 1)'))
+
+        # b7d2f4a9c6e1 e c4e9a1d7f3b8 recriam projeto e componente com DROP TABLE
+        downgrade(directory=MIGRACOES, revision='a3c5e8f1b2d4')
+        assert _contar('projeto_componente') == 1
+
+        upgrade(directory=MIGRACOES)
+        assert _contar('projeto_componente') == 1
+        with db.engine.connect() as conexao:
+            assert conexao.exec_driver_sql('PRAGMA foreign_keys').scalar() == 1
@@ -0,0 +1,96 @@
+import pytest
+
+from app import banco, busca, consultas, similaridade
+from app.extensoes import db
+from app.models import Componente, Projeto
+
+# Os planos vêm dos comandos que as funções de consulta realmente executam,
+# não de cópias deles: uma mudança em consultas.py, na busca ou na
+# similaridade que perca o índice aparece aqui.
+
+
+@pytest.fixture
+def catalogo(app):
+    # Mais itens que uma página, para que as páginas seguintes usem o cursor
+    with app.app_context():
+        total = app.config['ITENS_POR_PAGINA'] + 6
+        componentes = [
+            Componente(nome=f'Servo SG{i:02}', descricao='Micro servo motor', url='http://x.com', quantidade=i)
+            for i in range(total)
+        ]
+        db.session.add_all(componentes)
+        for i in range(total):
+            db.session.add(Projeto(nome=f'Robô {i:02}', descricao='Robô', url='http://x.com',
+                                   componentes=componentes[i:i + 3]))
+        db.session.commit()
+
+
+def _planos(app, contar_comandos, chamar):
+    """{comando: passos do EXPLAIN QUERY PLAN} dos SELECTs executados por `chamar`."""
+    with app.app_context():
+        with contar_comandos() as comandos:
+            chamar()
+        conexao = db.session.connection()
+        return {
+            comando: [linha[-1] for linha in conexao.exec_driver_sql(f'EXPLAIN QUERY PLAN {comando}', parametros)]
+            for comando, parametros in comandos.comandos
+            if comando.lstrip().upper().startswith(('SELECT', 'WITH'))
+        }
+
+
+def _varreduras(passos):
+    # Varredura completa de uma tabela do banco; as subconsultas (SCAN anon_1,
+    # SCAN (subquery-N)) percorrem só o resultado já filtrado por índice e a
+    # tabela virtual da FTS5 aparece como SCAN ... VIRTUAL TABLE INDEX
+    tabelas = set(db.metadata.tables)
+    return [
+        passo for passo in passos
+        if passo.startswith('SCAN ') and passo.split()[1] in tabelas and 'INDEX' not in passo
+    ]
+
+
+def test_listagens_e_detalhes_usam_indices(app, catalogo, contar_comandos):
+    def chamar():
+        projetos = consultas.pagina_de_projetos()
+        consultas.pagina_de_projetos(projetos.proximo)
+        componentes = consultas.pagina_de_componentes()
+        consultas.pagina_de_componentes(componentes.proximo)
+        consultas.detalhes_do_projeto(1)
+        consultas.detalhes_do_componente(1)
+
+    planos = _planos(app, contar_comandos, chamar)
+    assert len(planos) >= 6
+    for comando, passos in planos.items():
+        if 'OVER (' in comando:
+            # consultas._primeiros: a ordenação final é sobre os poucos associados de cada dono
+            assert _varreduras(passos) == [], (comando, passos)
+            continue
+        # Só a primeira página de projetos percorre a tabela, na ordem da
+        # chave primária e interrompida pelo LIMIT
+        primeira_pagina = 'FROM projeto ORDER BY projeto.id' in ' '.join(comando.split())
+        assert banco.sem_indice(passos, aceita_varredura=primeira_pagina) == [], (comando, passos)
+
+
+def test_busca_ranqueada_usa_indices(app, catalogo, contar_comandos):
+    def chamar():
+        ranking = busca.consulta_ranqueada(db.session.connection(), 'servo sg0')
+        assert len(list(busca.resultados_em_fluxo(ranking, limite=10))) == 10
+
+    planos = _planos(app, contar_comandos, chamar)
+    assert planos
+    for comando, passos in planos.items():
+        # A ordenação pela relevância é feita só sobre os componentes encontrados
+        assert _varreduras(passos) == [], (comando, passos)
+        assert any('componente_fts' in passo for passo in passos), (comando, passos)
+        assert any('SEARCH componente USING INTEGER PRIMARY KEY' in passo for passo in passos)
+
+
+def test_semelhantes_usa_indice_de_trigramas(app, catalogo, contar_comandos):
+    def chamar():
+        assert similaridade.semelhantes(db.session.connection(), 'Servo SG01')
+
+    planos = _planos(app, contar_comandos, chamar)
+    assert planos
+    for comando, passos in planos.items():
+        assert _varreduras(passos) == [], (comando, passos)
+        assert any('componente_trigrama' in passo and 'INDEX' in passo for passo in passos), (comando, passos)
@@ -0,0 +1,82 @@
+import pytest
+import sqlalchemy as sa
+
+from app import lote, similaridade
+from app.config import TestingConfig
+from app.extensoes import db
+from app.models import Componente
+from app.tarefas import tarefa_t
+
+
+class ConfigComFila(TestingConfig):
+    # Sem trabalhador: o que depender da fila não roda durante o teste
+    TAREFAS_IMEDIATAS = False
+    TAREFAS_TRABALHADORES = 0
+
+
+@pytest.fixture
+def config():
+    return ConfigComFila
+
+
+@pytest.fixture
+def contexto(app):
+    with app.app_context():
+        yield
+
+
+def _semelhantes(nome):
+    return [item.nome for item in similaridade.semelhantes(db.session.connection(), nome)]
+
+
+def _tarefas_de_trigramas():
+    return db.session.scalar(
+        sa.select(sa.func.count()).select_from(tarefa_t).where(tarefa_t.c.tipo == 'similaridade.indexar')
+    )
+
+
+def test_componente_do_orm_indexado_na_mesma_transacao(contexto):
+    componente = Componente(nome='Servo SG90', descricao='Micro servo', url='http://x.com', quantidade=1)
+    db.session.add(componente)
+    db.session.commit()
+    assert _semelhantes('servo sg-90') == ['Servo SG90']
+
+    componente.nome = 'Sensor ultrassônico HC-SR04'
+    db.session.commit()
+    assert _semelhantes('servo sg-90') == []
+    assert _semelhantes('sensor ultrassonico hc-sr04') == ['Sensor ultrassônico HC-SR04']
+    assert _tarefas_de_trigramas() == 0
+
+
+def test_sincronizar_do_lote_indexa_na_mesma_transacao(contexto):
+    conexao = db.session.connection()
+    id_ = conexao.execute(
+        sa.insert(Componente).values(nome='Servo SG90', descricao='', url='http://x.com', quantidade=1)
+    ).inserted_primary_key[0]
+    lote.sincronizar(conexao, indexar=[id_])
+    db.session.commit()
+
+    assert _semelhantes('servo sg-90') == ['Servo SG90']
+    assert _tarefas_de_trigramas() == 0
+
+
+def test_lote_grande_indexado_pela_fila(contexto, monkeypatch):
+    monkeypatch.setattr(similaridade, 'IDS_POR_TAREFA', 2)
+    conexao = db.session.connection()
+    ids = [
+        conexao.execute(
+            sa.insert(Componente).values(nome=f'Servo SG9{i}', descricao='', url='http://x.com', quantidade=1)
+        ).inserted_primary_key[0]
+        for i in range(3)
+    ]
+    lote.sincronizar(conexao, indexar=ids)
+    db.session.commit()
+
+    assert _semelhantes('servo sg90') == []
+    assert _tarefas_de_trigramas() == 2
+
+
+@pytest.mark.parametrize('limiar', ['nan', 'inf', '-inf', 'abc'])
+def test_limiar_invalido_devolve_400(client, limiar):
+    resposta = client.get(f'/api/componentes/semelhantes?nome=servo&limiar={limiar}')
+    assert resposta.status_code == 400
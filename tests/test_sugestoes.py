@@ -0,0 +1,29 @@
+import threading
+
+from app.sugestoes import Sugestoes, sugestoes
+
+
+def test_busca_superada_conta_como_cancelada(client):
+    antes = sugestoes.estatisticas()['canceladas']
+    assert client.get('/api/search/sugestoes?q=servo&cliente=a&seq=2').status_code == 200
+
+    resposta = client.get('/api/search/sugestoes?q=serv&cliente=a&seq=1')
+
+    assert resposta.status_code == 204
+    assert sugestoes.estatisticas()['canceladas'] == antes + 1
+
+
+def test_contador_de_canceladas_entre_threads():
+    contador = Sugestoes()
+
+    def cancelar():
+        for _ in range(10_000):
+            contador.cancelada()
+
+    threads = [threading.Thread(target=cancelar) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert contador.canceladas == 80_000
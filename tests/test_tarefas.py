@@ -0,0 +1,205 @@
+import threading
+import time
+
+import pytest
+import sqlalchemy as sa
+
+from app.cache import cache
+from app.config import TestingConfig
+from app.extensoes import db
+from app.models import Componente
+from app.tarefas import fila, tarefa_t, PENDENTE, EXECUTANDO, CONCLUIDA, FALHOU
+from app import busca
+
+
+class ConfigComFila(TestingConfig):
+    # Tarefas de verdade na tabela, executadas só por executar_proxima()
+    TAREFAS_IMEDIATAS = False
+    TAREFAS_TRABALHADORES = 0
+    TAREFAS_ESPERA_BASE = 2.0
+    TAREFAS_MAX_TENTATIVAS = 3
+    CACHE_TIPO = 'lru'
+
+
+@pytest.fixture
+def config():
+    return ConfigComFila
+
+
+@pytest.fixture
+def contexto(app):
+    with app.app_context():
+        yield
+
+
+@pytest.fixture
+def instavel():
+    # Tarefa de teste que falha nas primeiras `instavel['falhas']` execuções
+    estado = {'falhas': 0, 'execucoes': 0}
+
+    def executar(conexao, valor):
+        estado['execucoes'] += 1
+        if estado['falhas']:
+            estado['falhas'] -= 1
+            raise RuntimeError('falha de teste')
+
+    fila.tarefa('teste.instavel')(executar)
+    yield estado
+    del fila.tipos['teste.instavel']
+
+
+def _enfileirar(chave=None, **argumentos):
+    id_ = fila.enfileirar(db.session.connection(), 'teste.instavel', chave=chave, **argumentos)
+    db.session.commit()
+    return id_
+
+
+def _tarefa(id_):
+    with db.engine.connect() as conexao:
+        return conexao.execute(sa.select(tarefa_t).where(tarefa_t.c.id == id_)).one()
+
+
+def _liberar(id_):
+    # Adianta a próxima tentativa, sem aguardar a espera exponencial
+    with db.engine.begin() as conexao:
+        conexao.execute(sa.update(tarefa_t).where(tarefa_t.c.id == id_).values(executar_em=0))
+
+
+def test_nova_tentativa_com_espera_exponencial(contexto, instavel):
+    instavel['falhas'] = 2
+    id_ = _enfileirar(valor=1)
+
+    antes = time.time()
+    assert fila.executar_proxima() is True
+    tarefa = _tarefa(id_)
+    assert (tarefa.estado, tarefa.tentativas) == (PENDENTE, 1)
+    # Espera base de 2 s, com variação entre 50% e 100%
+    assert antes + 1.0 <= tarefa.executar_em <= time.time() + 2.0
+    assert fila.executar_proxima() is False
+
+    _liberar(id_)
+    antes = time.time()
+    fila.executar_proxima()
+    tarefa = _tarefa(id_)
+    assert (tarefa.estado, tarefa.tentativas) == (PENDENTE, 2)
+    assert antes + 2.0 <= tarefa.executar_em <= time.time() + 4.0
+
+    _liberar(id_)
+    fila.executar_proxima()
+    tarefa = _tarefa(id_)
+    assert (tarefa.estado, tarefa.tentativas, tarefa.erro) == (CONCLUIDA, 3, None)
+    assert instavel['execucoes'] == 3
+
+
+def test_falha_definitiva_depois_do_maximo_de_tentativas(contexto, instavel):
+    instavel['falhas'] = 10
+    id_ = _enfileirar(valor=1)
+
+    for _ in range(3):
+        _liberar(id_)
+        fila.executar_proxima()
+
+    tarefa = _tarefa(id_)
+    assert (tarefa.estado, tarefa.tentativas) == (FALHOU, 3)
+    assert 'falha de teste' in tarefa.erro
+    _liberar(id_)
+    assert fila.executar_proxima() is False
+
+
+def test_chave_evita_tarefa_repetida_enquanto_pendente(contexto, instavel):
+    primeira = _enfileirar(chave='teste:1', valor=1)
+    assert primeira is not None
+    assert _enfileirar(chave='teste:1', valor=2) is None
+    assert _enfileirar(chave='teste:2', valor=3) is not None
+    with db.engine.connect() as conexao:
+        assert conexao.scalar(sa.select(sa.func.count()).select_from(tarefa_t)) == 2
+
+    # Quando a tarefa começa a chave é liberada: uma nova escrita enfileira de novo
+    fila.executar_proxima()
+    assert _tarefa(primeira).chave is None
+    assert _enfileirar(chave='teste:1', valor=4) is not None
+
+
+def test_tarefa_enfileirada_e_desfeita_com_a_transacao(contexto, instavel):
+    fila.enfileirar(db.session.connection(), 'teste.instavel', valor=1)
+    db.session.rollback()
+
+    assert fila.executar_proxima() is False
+
+
+def test_indexacao_em_outro_processo_atualiza_a_busca_guardada(app, client, monkeypatch):
+    def adicionar(nome):
+        with app.app_context():
+            db.session.add(Componente(nome=nome, descricao='Servo', url='http://x.com', quantidade=1))
+            db.session.commit()
+            while fila.executar_proxima():
+                pass
+
+    adicionar('Servo SG90')
+    assert len(client.get('/api/search?q=servo').get_json()['componentes']) == 1
+
+    # O trabalhador está em outro processo: o cache deste não é avisado
+    monkeypatch.setattr(cache, 'invalidar', lambda *tags: 0)
+    adicionar('Servo MG995')
+
+    assert len(client.get('/api/search?q=servo').get_json()['componentes']) == 2
+
+
+def test_indexacao_de_componente_excluido(contexto):
+    with db.engine.begin() as conexao:
+        busca.enfileirar(conexao, [12345])
+
+    assert fila.executar_proxima() is True
+    assert fila.executar_proxima() is False
+    with db.engine.connect() as conexao:
+        assert conexao.scalar(sa.select(tarefa_t.c.estado)) == CONCLUIDA
+
+
+def test_fila_vazia_so_le(contexto, instavel, contar_comandos):
+    with contar_comandos() as comandos:
+        assert fila.executar_proxima() is False
+        assert fila.recuperar_expiradas() == 0
+        fila.profundidade()
+
+    # Nenhuma escrita (nem o lock de escrita do SQLite) sem tarefa pronta ou expirada
+    assert not [comando for comando, _ in comandos.comandos
+                if comando.split()[0].upper() in ('UPDATE', 'INSERT', 'DELETE') or 'IMMEDIATE' in comando]
+
+
+def test_recupera_tarefa_expirada(contexto, instavel):
+    id_ = _enfileirar(valor=1)
+    with db.engine.begin() as conexao:
+        conexao.execute(sa.update(tarefa_t).values(estado=EXECUTANDO, iniciada_em=0, tentativas=1))
+
+    assert fila.recuperar_expiradas() == 1
+    assert _tarefa(id_).estado == PENDENTE
+
+
+class EventoFalso:
+    # Registra as esperas do trabalhador e o para depois de algumas
+    def __init__(self, parar, acordar_em=()):
+        self.parar = parar
+        self.acordar_em = set(acordar_em)
+        self.esperas = []
+
+    def wait(self, segundos):
+        self.esperas.append(segundos)
+        if len(self.esperas) >= 7:
+            self.parar.set()
+        return len(self.esperas) in self.acordar_em
+
+    def clear(self):
+        pass
+
+
+def test_espera_dobra_com_a_fila_vazia(app, monkeypatch):
+    parar = threading.Event()
+    evento = EventoFalso(parar, acordar_em={4})
+    monkeypatch.setattr(fila, '_acordar', evento)
+    monkeypatch.setattr(fila, 'intervalo_maximo', 5.0)
+
+    with app.app_context():
+        fila.trabalhar(parar)
+
+    # Intervalo de 1 s dobrando até o máximo; um aviso de enfileiramento volta ao início
+    assert evento.esperas == [1.0, 2.0, 4.0, 5.0, 1.0, 2.0, 4.0]